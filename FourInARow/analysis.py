@@ -0,0 +1,300 @@
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from board import BitBoard
+from kernels import warm_up
+from players import PlayerController
+from tournament import PlayerConfig, parse_moves
+
+
+# A position to analyze: its index in the input, its moves as text or its packed board state
+Task = Tuple[int, Union[str, np.ndarray]]
+
+
+def read_moves(file: TextIO) -> Iterator[Task]:
+    """Reads positions as move sequences, one per line, like 3324 or 3,3,12,4 on boards wider than 10 columns
+    Empty lines and lines starting with # are skipped, the index counts the positions
+
+    Args:
+        file (TextIO): the opened file
+
+    Yields:
+        Task: the index and the moves of every position
+    """
+    index: int = 0
+    for line in file:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield index, line
+            index += 1
+
+
+def read_packed(path: str) -> Iterator[Task]:
+    """Reads packed board states from a .npy file with shape (positions, width, height), in the format of Board
+    The file is memory mapped, so only the position being read is loaded
+
+    Args:
+        path (str): path of the file
+
+    Yields:
+        Task: the index and the board state of every position
+    """
+    states: np.ndarray = np.load(path, mmap_mode='r')
+    for index in range(len(states)):
+        yield index, np.array(states[index])
+
+
+class Analyzer:
+    """Analyzes positions one by one with a player per side, keeping the solver tables and opening books
+    of the players between the positions
+
+    The players forget their transposition tables, move orderings and principal variations before every position
+    (see PlayerController.new_game), so the result of a position doesn't depend on the positions analyzed before it,
+    or on the worker that analyzes it. Only MCTS players without a seed give different results between runs.
+    A position that was analyzed before is answered from a bounded cache, positions in logs often repeat.
+    """
+    def __init__(self, spec: str, width: int, height: int, game_n: int, cache_size: int = 100000) -> None:
+        """
+        Args:
+            spec (str): specification of the analyzing player, like alphabeta:window:8:tt,solve=16
+            width (int): width of the boards
+            height (int): height of the boards
+            game_n (int): n in a row required to win
+            cache_size (int, optional): number of results kept for repeated positions. Defaults to 100000.
+        """
+        config: PlayerConfig = PlayerConfig(spec)
+        self.width: int = width
+        self.height: int = height
+        self.game_n: int = game_n
+        # Transposition table values are for the searching player, so each side gets its own player
+        self.players: Dict[int, PlayerController] = {player_id: config.create(player_id, game_n)
+                                                     for player_id in (1, 2)}
+        self.cache_size: int = cache_size
+        self.cache: OrderedDict = OrderedDict() # results per hash and player to move, least recently used first
+
+
+    def analyze(self, task: Task) -> Dict:
+        """
+        Args:
+            task (Task): index and moves or board state of the position
+
+        Returns:
+            Dict: the index, the player to move, and the best move, its score and the search statistics,
+                the winner if the game is over, or an error if the position is not valid
+        """
+        index, position = task
+        result: Dict = {'index': index}
+        if isinstance(position, str):
+            result['moves'] = position
+        try:
+            board, player_id = self._load(position)
+        except ValueError as error:
+            result['error'] = str(error)
+            return result
+        result['player'] = player_id
+
+        winner: int = board.is_winning(self.game_n)
+        if winner != 0:
+            result['winner'] = winner
+            return result
+
+        key: Tuple[int, int] = (board.hash_key, player_id)
+        cached: Optional[Dict] = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            result.update(cached)
+            result['cached'] = True
+            return result
+
+        player: PlayerController = self.players[player_id]
+        player.new_game()
+        analysis: Dict = {'move': player.search(board), 'score': float(player.best_score),
+                          'nodes': player.stats.nodes, 'depth': player.stats.depth, 'elapsed': player.stats.elapsed,
+                          'solved': player.stats.solved, 'book_move': player.stats.book_move}
+        self.cache[key] = analysis
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        result.update(analysis)
+        return result
+
+
+    def close(self) -> None:
+        """Releases the process pools and opening books of the players
+        """
+        for player in self.players.values():
+            player.close()
+
+
+    def _load(self, position: Union[str, np.ndarray]) -> Tuple[BitBoard, int]:
+        """
+        Args:
+            position (Union[str, np.ndarray]): moves or board state of the position
+
+        Raises:
+            ValueError: if the position is not valid
+
+        Returns:
+            Tuple[BitBoard, int]: the board and the player to move
+        """
+        if isinstance(position, str):
+            board: BitBoard = BitBoard(self.width, self.height)
+            moves: List[int] = parse_moves(position)
+            for i, col in enumerate(moves):
+                if not 0 <= col < self.width or not board.play(col, 1 + i % 2):
+                    raise ValueError(f'Invalid move {col} at ply {i}')
+                if i < len(moves) - 1 and board.is_winning_last_move(self.game_n) > 0:
+                    raise ValueError(f'The game is over after ply {i}')
+            return board, 1 + len(moves) % 2
+
+        if position.shape != (self.width, self.height):
+            raise ValueError(f'Board state of shape {position.shape} on a {self.width}x{self.height} board')
+        if not np.isin(position, (0, 1, 2)).all():
+            invalid: List[int] = sorted(set(np.unique(position).tolist()) - {0, 1, 2})
+            raise ValueError(f'Board state with fields {invalid}, expected 0, 1 or 2')
+        # Row 0 is the top, so a disc floats when the field below it, at the next row, is empty
+        floating: np.ndarray = np.argwhere((position[:, :-1] != 0) & (position[:, 1:] == 0))
+        if len(floating) > 0:
+            raise ValueError(f'Disc at {tuple(floating[0].tolist())} above an empty field')
+        discs: List[int] = [int(np.count_nonzero(position == player_id)) for player_id in (1, 2)]
+        if discs[0] - discs[1] not in (0, 1):
+            raise ValueError(f'Player 1 has {discs[0]} discs and player 2 has {discs[1]}')
+        return BitBoard(np.asarray(position, dtype=int)), 1 + discs[0] - discs[1]
+
+
+# The analyzer of a worker process, created once by _init_worker
+_analyzer: Optional[Analyzer] = None
+
+
+def _init_worker(spec: str, width: int, height: int, game_n: int, cache_size: int) -> None:
+    """Creates the analyzer of a worker process, which keeps its result cache and solver tables
+    for all positions the worker gets, and warms up the kernels
+
+    Args:
+        spec (str): specification of the analyzing player
+        width (int): width of the boards
+        height (int): height of the boards
+        game_n (int): n in a row required to win
+        cache_size (int): number of results kept for repeated positions
+    """
+    global _analyzer
+    _analyzer = Analyzer(spec, width, height, game_n, cache_size)
+    warm_up()
+
+
+def _analyze_chunk(tasks: List[Task]) -> List[Dict]:
+    """
+    Args:
+        tasks (List[Task]): positions to analyze in the worker
+
+    Returns:
+        List[Dict]: the results, in the same order
+    """
+    return [_analyzer.analyze(task) for task in tasks]
+
+
+def _chunks(tasks: Iterable[Task], chunk_size: int) -> Iterator[List[Task]]:
+    """
+    Args:
+        tasks (Iterable[Task]): the positions
+        chunk_size (int): number of positions per chunk
+
+    Yields:
+        List[Task]: consecutive positions
+    """
+    chunk: List[Task] = []
+    for task in tasks:
+        chunk.append(task)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze_positions(tasks: Iterable[Task], spec: str, width: int, height: int, game_n: int, workers: int = 1,
+                      chunk_size: int = 16, cache_size: int = 100000) -> Iterator[Dict]:
+    """Analyzes a stream of positions, the results come out in the order of the input
+
+    The positions are read lazily and at most two chunks per worker are in flight,
+    so the memory doesn't grow with the input.
+    Every worker keeps its result cache and the solver tables of its players for all the positions it analyzes,
+    the results are the same for any number of workers and chunk size.
+
+    Args:
+        tasks (Iterable[Task]): the positions, from read_moves or read_packed
+        spec (str): specification of the analyzing player, like alphabeta:window:8:tt,solve=16
+        width (int): width of the boards
+        height (int): height of the boards
+        game_n (int): n in a row required to win
+        workers (int, optional): number of worker processes, 1 analyzes in this process. Defaults to 1.
+        chunk_size (int, optional): number of positions sent to a worker at once. Defaults to 16.
+        cache_size (int, optional): number of results kept per worker for repeated positions. Defaults to 100000.
+
+    Yields:
+        Dict: the result of every position, see Analyzer.analyze
+    """
+    if workers == 1:
+        analyzer: Analyzer = Analyzer(spec, width, height, game_n, cache_size)
+        try:
+            for task in tasks:
+                yield analyzer.analyze(task)
+        finally:
+            analyzer.close()
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(spec, width, height, game_n, cache_size)) as executor:
+        in_flight: Deque[Future] = deque()
+        for chunk in _chunks(tasks, chunk_size):
+            in_flight.append(executor.submit(_analyze_chunk, chunk))
+            if len(in_flight) >= 2 * workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Analyzes a file of positions and writes one JSON result per line')
+    parser.add_argument('input', help='positions: a text file of move sequences, - for stdin, '
+                                      'or a .npy file of board states with shape (positions, width, height)')
+    parser.add_argument('--output', help='output file, default stdout')
+    parser.add_argument('--player', default='alphabeta:window:6:tt,killer',
+                        help='analyzing player, player:heuristic:depth[:options]')
+    parser.add_argument('--width', type=int, default=7)
+    parser.add_argument('--height', type=int, default=6)
+    parser.add_argument('--game-n', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-size', type=int, default=16, help='positions sent to a worker at once')
+    parser.add_argument('--cache-size', type=int, default=100000, help='results kept per worker for repeated positions')
+    args = parser.parse_args()
+
+    PlayerConfig(args.player) # fails early on an invalid specification
+    input_file: Optional[TextIO] = None
+    if args.input.endswith('.npy'):
+        positions: Iterator[Task] = read_packed(args.input)
+    else:
+        input_file = sys.stdin if args.input == '-' else open(args.input)
+        positions = read_moves(input_file)
+    output: TextIO = sys.stdout if args.output is None else open(args.output, 'w')
+
+    start_time: float = time.perf_counter()
+    counts: Dict[str, int] = {'positions': 0, 'errors': 0, 'cached': 0}
+    for analysis in analyze_positions(positions, args.player, args.width, args.height, args.game_n,
+                                      args.workers, args.chunk_size, args.cache_size):
+        output.write(json.dumps(analysis) + '\n')
+        counts['positions'] += 1
+        counts['errors'] += 'error' in analysis
+        counts['cached'] += analysis.get('cached', False)
+    elapsed: float = time.perf_counter() - start_time
+    if output is not sys.stdout:
+        output.close()
+    if input_file is not None and input_file is not sys.stdin:
+        input_file.close()
+    print(f"Analyzed {counts['positions']} positions in {elapsed:.2f} seconds "
+          f"({counts['positions'] / elapsed if elapsed else 0:.1f} positions/s), "
+          f"{counts['cached']} repeated, {counts['errors']} errors", file=sys.stderr)
@@ -1,9 +1,10 @@
-from heuristics import Heuristic, SimpleHeuristic
-from players import PlayerController, HumanPlayer, MinMaxPlayer, AlphaBetaPlayer
-from board import Board
+from heuristics import SimpleHeuristic
+from players import PlayerController, HumanPlayer
+from board import Board, BitBoard
+from stats import MemoryHook
+from tournament import PlayerConfig, SPEC_HELP
 from typing import List
-import numpy as np
-from numba import jit, int32
+import argparse
 
 
 def start_game(game_n: int, board: Board, players: List[PlayerController]) -> int:
@@ -30,9 +31,9 @@ def start_game(game_n: int, board: Board, players: List[PlayerController]) -> in
             move = current_player.make_move(board)
 
         current_player_index = 1 - current_player_index
-        winner = winning(board.get_board_state(), game_n)
+        winner = board.is_winning_last_move(game_n)
 
-    # Printing out winner, final board and number of evaluations after the game 
+    # Printing out winner, final board and number of evaluations after the game
     print(board)
 
     if winner < 0:
@@ -42,118 +43,33 @@ def start_game(game_n: int, board: Board, players: List[PlayerController]) -> in
 
     for p in players:
         print(f'Player {p} evaluated a boardstate {p.get_eval_count()} times!')
+        p.close()
 
     return winner
 
 
-@jit(nopython=True, cache=True)
-def winning(state: np.ndarray, game_n: int) -> int:
-    """Determines whether a player has won, and if so, which one
-
-    Args:
-        state (np.ndarray): the board to check
-        game_n (int): n in a row required to win
-
-    Returns:
-        int: 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
-    """
-    player: int
-    counter: int
-
-    # Vertical check
-    for col in state:
-        counter = 0
-        player = -1
-        for field in col[::-1]:
-            if field == 0:
-                break
-            elif field == player:
-                counter += 1
-                if counter >= game_n:
-                    return player
-            else:
-                counter = 1 
-                player = field
-            
-    # Horizintal check
-    for row in state.T:
-        counter = 0
-        player = -1
-        for field in row:
-            if field == 0:
-                counter = 0
-                player = -1
-            elif field == player:
-                counter += 1
-                if counter >= game_n:
-                    return player
-            else:
-                counter = 1
-                player = field
-
-    # Ascending diagonal check
-    for i, col in enumerate(state[:- game_n + 1]):
-        for j, field in enumerate(col[game_n - 1:]):
-            if field == 0:
-                continue
-            player = field
-            for x in range(game_n):
-                if state[i + x, j + game_n - 1 - x] != player:
-                    player = -1
-                    break
-            if player != -1:
-                return player
-            
-    # Descending diagonal check
-    for i, col in enumerate(state[game_n - 1:]):
-        for j, field in enumerate(col[game_n - 1:]):
-            if field == 0:
-                continue
-            player = field
-            for x in range(game_n):
-                if state[i + game_n - 1 - x, j + game_n - 1 - x] != player:
-                    player = -1
-                    break
-            if player != -1:
-                return player
-        
-    # Check for a draw
-    if np.all(state[:, 0]):
-        return -1 # The board is full, game is a draw
-
-    return 0 # Game is not over 
-    
-
-def get_players(game_n: int) -> List[PlayerController]:
+def get_players(game_n: int, specs: List[str], memory: bool = False) -> List[PlayerController]:
     """Gets the two players
 
     Args:
         game_n (int): n in a row required to win
+        specs (List[str]): specification of each player, human or player:heuristic:depth[:options]
+        memory (bool, optional): report the peak memory of every search, which slows it down. Defaults to False.
 
     Raises:
+        ValueError: if a specification can't be parsed
         AssertionError: if the players are incorrectly initialised
 
     Returns:
         List[PlayerController]: list with two players
     """
-    heuristic1: Heuristic = SimpleHeuristic(game_n)
-    heuristic2: Heuristic = SimpleHeuristic(game_n)
-
-    human1: PlayerController = HumanPlayer(1, game_n, heuristic1)
-    human2: PlayerController = HumanPlayer(2, game_n, heuristic2)
-
-    # TODO: Implement other PlayerControllers (MinMaxPlayer and AlphaBetaPlayer) -----------------------------------------------
-    # Initialize one HumanPlayer and one MinMaxPlayer
-    human_player: PlayerController = HumanPlayer(1, game_n, heuristic1)
-    #minimax_player: PlayerController = MinMaxPlayer(2, game_n, depth=6, heuristic=heuristic2)
-    alphaBeta_player: PlayerController = AlphaBetaPlayer(2, game_n, depth=6, heuristic=heuristic2)
-    # If you want to play MiniMax vs Alphabeta
-    minimax_player: PlayerController = MinMaxPlayer(1, game_n, depth=6, heuristic=heuristic1)
-    
-    # Change the hashtag if you want to play with the MinMax or the AlphaBeta or Alphabeta against Minimax
-    #players: List[PlayerController] = [human_player, minimax_player]
-    #players: List[PlayerController] = [human_player, alphaBeta_player]
-    players: List[PlayerController] = [minimax_player, alphaBeta_player]
+    players: List[PlayerController] = []
+    for player_id, spec in enumerate(specs, 1):
+        if spec == 'human':
+            # The human player gets the moves suggested by the simple heuristic
+            players.append(HumanPlayer(player_id, game_n, SimpleHeuristic(game_n)))
+        else:
+            players.append(PlayerConfig(spec).create(player_id, game_n, [MemoryHook()] if memory else None))
 
     assert players[0].player_id in {1, 2}, 'The player_id of the first player must be either 1 or 2'
     assert players[1].player_id in {1, 2}, 'The player_id of the second player must be either 1 or 2'
@@ -164,14 +80,26 @@ def get_players(game_n: int) -> List[PlayerController]:
     return players
 
 if __name__ == '__main__':
-    game_n: int = 4  # n in a row required to win
-    width: int = 7   # width of the board
-    height: int = 6  # height of the board
-    
+    parser = argparse.ArgumentParser(description='Plays a game of n in a row between two players',
+                                     epilog=f'A player can also be human. {SPEC_HELP}')
+    parser.add_argument('player1', nargs='?', default='minmax:simple:6', help='the player that moves first')
+    parser.add_argument('player2', nargs='?', default='alphabeta:simple:6', help='the player that moves second')
+    parser.add_argument('--memory', action='store_true',
+                        help='report the peak memory of every search, which slows it down')
+    parser.add_argument('--numpy-board', action='store_true', help='play on the numpy Board instead of the BitBoard')
+    parser.add_argument('--width', type=int, default=7)
+    parser.add_argument('--height', type=int, default=6)
+    parser.add_argument('--game-n', type=int, default=4, help='n in a row required to win')
+    args = parser.parse_args()
+
     # Check whether the game_n is possible
-    assert 1 < game_n <= min(width, height), 'game_n is not possible'
+    if not 1 < args.game_n <= min(args.width, args.height):
+        parser.error('game_n is not possible')
+
+    try:
+        game_players: List[PlayerController] = get_players(args.game_n, [args.player1, args.player2], args.memory)
+    except ValueError as error:
+        parser.error(str(error))
 
-    board: Board = Board(width, height)
-    start_game(game_n, board, get_players(game_n))
-    
-    
\ No newline at end of file
+    board: Board = Board(args.width, args.height) if args.numpy_board else BitBoard(args.width, args.height)
+    start_game(args.game_n, board, game_players)
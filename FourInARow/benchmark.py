@@ -0,0 +1,373 @@
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from board import BitBoard
+from players import SearchPlayer
+from stats import MemoryHook
+from tournament import PlayerConfig
+
+
+# Fixed positions: name, width, height, game_n and the moves, one digit per column, player 1 moves first
+CORPUS: List[Tuple[str, int, int, int, str]] = [
+    ('7x6-opening', 7, 6, 4, '0312'),
+    ('7x6-midgame', 7, 6, 4, '56555401431522'),
+    ('7x6-endgame', 7, 6, 4, '000523216541650053153413126332'),
+    ('8x7-opening', 8, 7, 4, '0045'),
+    ('8x7-midgame', 8, 7, 4, '26556101412750'),
+    ('8x7-endgame', 8, 7, 4, '77760127727516446621572502213300406325466045'),
+    ('9x8-opening', 9, 8, 4, '5123'),
+    ('9x8-midgame', 9, 8, 4, '04280058733360'),
+    ('9x8-endgame', 9, 8, 4, '072208764864545042805714748885558683277536420720240026537111'),
+]
+
+DEFAULT_PLAYERS: List[str] = ['minmax:simple', 'alphabeta:simple', 'alphabeta:simple:compiled', 'alphabeta:window',
+                               'alphabeta:simple:tt,killer', 'alphabeta:simple:tt,killer,pvs',
+                               'alphabeta:simple:tt,killer,mtdf']
+DEFAULT_DEPTHS: List[int] = [2, 4, 6]
+# Shorter runs are dominated by timer noise, their speed isn't compared
+MIN_ELAPSED: float = 0.005
+
+# Board sizes of the scaling benchmark: width, height and game_n
+SCALING_SIZES: List[Tuple[int, int, int]] = [(7, 6, 4), (10, 10, 5), (15, 15, 5), (19, 19, 5)]
+SCALING_PLAYERS: List[str] = ['alphabeta:window:tt,killer', 'alphabeta:window:tt,killer,near=2']
+SCALING_DEPTH: int = 4
+
+# Player of the startup benchmark, which measures a fresh process from its start to its first move
+STARTUP_PLAYER: str = 'alphabeta:simple:tt,killer'
+STARTUP_DEPTH: int = 4
+# Runs a fresh process up to its first move, see first_move
+STARTUP_SCRIPT: str = '''
+import sys, time
+start = time.perf_counter()
+if {without_numba}:
+    sys.modules['numba'] = None # as if numba was not installed
+import benchmark
+benchmark.first_move(start, {spec!r}, {position!r})
+'''
+
+
+def load_position(width: int, height: int, moves: str) -> Tuple[BitBoard, int]:
+    """Plays the moves of a corpus position
+
+    Args:
+        width (int): width of the board
+        height (int): height of the board
+        moves (str): the moves, one digit per column
+
+    Returns:
+        Tuple[BitBoard, int]: the board and the player to move
+    """
+    board: BitBoard = BitBoard(width, height)
+    for i, col in enumerate(moves):
+        board.play(int(col), 1 + i % 2)
+    return board, 1 + len(moves) % 2
+
+
+def scaling_position(width: int, height: int, game_n: int, plies: int) -> Tuple[BitBoard, int]:
+    """Plays a fixed sequence of moves close to the center that doesn't end the game, like a game in progress
+
+    Args:
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+        plies (int): number of moves
+
+    Returns:
+        Tuple[BitBoard, int]: the board and the player to move
+    """
+    rng: random.Random = random.Random(f'scaling-{width}x{height}')
+    board: BitBoard = BitBoard(width, height)
+    center: int = width // 2
+    while sum(board.heights) < plies:
+        player_id: int = 1 + sum(board.heights) % 2
+        col: int = center + rng.randint(-2, 2)
+        if board.play(col, player_id) and board.is_winning_last_move(game_n) != 0:
+            board.undo(col)
+    return board, 1 + plies % 2
+
+
+def player_spec(player: str, depth: int) -> str:
+    """Inserts the depth into a player specification without one, like alphabeta:simple:tt
+
+    Args:
+        player (str): player:heuristic[:options]
+        depth (int): search depth
+
+    Returns:
+        str: player:heuristic:depth[:options]
+    """
+    parts: List[str] = player.split(':')
+    return ':'.join(parts[:2] + [str(depth)] + parts[2:])
+
+
+def measure(config: PlayerConfig, board: BitBoard, player_id: int, game_n: int, memory: bool) -> Dict:
+    """Searches a position once with a fresh player
+
+    Args:
+        config (PlayerConfig): the player
+        board (BitBoard): the position
+        player_id (int): the player to move
+        game_n (int): n in a row required to win
+        memory (bool): trace the allocations, which slows the search down
+
+    Returns:
+        Dict: best move, score, nodes, evaluations, elapsed seconds and, when traced, the peak memory in bytes
+    """
+    player: SearchPlayer = config.create(player_id, game_n, [MemoryHook()] if memory else None)
+    move: int = player.search(board)
+    result: Dict = {'move': move, 'score': player.best_score, 'nodes': player.stats.nodes,
+                    'evaluations': player.stats.evaluations, 'elapsed': player.stats.elapsed}
+    if memory:
+        result['peak_memory'] = player.stats.peak_memory
+    player.close()
+    return result
+
+
+def run_benchmark(players: List[str], depths: List[int], positions: List[str], repeat: int = 3,
+                  verbose: bool = True) -> List[Dict]:
+    """Runs every player at every depth on the corpus
+
+    The time is the fastest of the repeats, the peak memory is measured in a separate traced run,
+    so tracing doesn't affect the time. A best move agrees with the first player with the same heuristic
+    when it is the same move or a move with the same score.
+
+    Args:
+        players (List[str]): player specifications without depth, like alphabeta:simple:tt
+        depths (List[int]): search depths
+        positions (List[str]): names of the corpus positions, all positions if empty
+        repeat (int, optional): number of timed runs per measurement. Defaults to 3.
+        verbose (bool, optional): print every measurement. Defaults to True.
+
+    Returns:
+        List[Dict]: one result per position, player and depth
+    """
+    results: List[Dict] = []
+    for name, width, height, game_n, moves in CORPUS:
+        if positions and name not in positions:
+            continue
+        board, player_id = load_position(width, height, moves)
+        for depth in depths:
+            references: Dict[str, Dict] = {} # first result per heuristic
+            for player in players:
+                config: PlayerConfig = PlayerConfig(player_spec(player, depth))
+                measure(config, board, player_id, game_n, False) # warm up, compiles the numba functions
+                runs: List[Dict] = [measure(config, board, player_id, game_n, False) for _ in range(repeat)]
+                traced: Dict = measure(config, board, player_id, game_n, True)
+                result: Dict = min(runs, key=lambda run: run['elapsed'])
+                reference: Dict = references.setdefault(config.heuristic, result)
+                result.update({'position': name, 'player': player, 'depth': depth,
+                               'nodes_per_second': result['nodes'] / result['elapsed'] if result['elapsed'] else 0,
+                               'peak_memory': traced['peak_memory'],
+                               'agrees': result['move'] == reference['move'] or result['score'] == reference['score']})
+                results.append(result)
+                if verbose:
+                    print(format_result(result), file=sys.stderr)
+    return results
+
+
+def run_scaling(players: List[str], depth: int, plies: int = 12, repeat: int = 3, verbose: bool = True) -> List[Dict]:
+    """Searches a position of the same number of discs on growing boards, to show how the speed scales
+
+    Args:
+        players (List[str]): player specifications without depth, like alphabeta:window:tt,near=2
+        depth (int): search depth
+        plies (int, optional): number of discs of the positions. Defaults to 12.
+        repeat (int, optional): number of timed runs per measurement. Defaults to 3.
+        verbose (bool, optional): print every measurement. Defaults to True.
+
+    Returns:
+        List[Dict]: one result per board size and player
+    """
+    results: List[Dict] = []
+    for width, height, game_n in SCALING_SIZES:
+        board, player_id = scaling_position(width, height, game_n, plies)
+        for player in players:
+            config: PlayerConfig = PlayerConfig(player_spec(player, depth))
+            measure(config, board, player_id, game_n, False) # warm up, compiles the numba functions
+            result: Dict = min((measure(config, board, player_id, game_n, False) for _ in range(repeat)),
+                               key=lambda run: run['elapsed'])
+            result.update({'position': f'{width}x{height}-n{game_n}', 'player': player, 'depth': depth,
+                           'nodes_per_second': result['nodes'] / result['elapsed'] if result['elapsed'] else 0})
+            results.append(result)
+            if verbose:
+                print(f"{result['position']:12} {player:40} move {result['move']:2}, {result['nodes']:8} nodes, "
+                      f"{result['elapsed']:8.4f} s, {result['nodes_per_second']:9.0f} nodes/s", file=sys.stderr)
+    return results
+
+
+def first_move(start_time: float, spec: str, position: str) -> None:
+    """Warms up the kernels and searches a corpus position, runs in the process started by run_startup
+    Prints the duration of the imports, the warm up and the search as JSON
+
+    Args:
+        start_time (float): time.perf_counter() at the start of the process, before the imports
+        spec (str): the player, player:heuristic:depth[:options]
+        position (str): name of the corpus position
+    """
+    import kernels
+    imported: float = time.perf_counter()
+    warm_up: float = kernels.warm_up()
+    name, width, height, game_n, moves = next(entry for entry in CORPUS if entry[0] == position)
+    board, player_id = load_position(width, height, moves)
+    search_start: float = time.perf_counter()
+    move: int = PlayerConfig(spec).create(player_id, game_n).search(board)
+    print(json.dumps({'import': imported - start_time, 'warm_up': warm_up,
+                      'first_move': time.perf_counter() - search_start, 'move': int(move),
+                      'numba': kernels.resolve()}))
+
+
+def run_startup(player: str, depth: int, repeat: int = 3, verbose: bool = True) -> List[Dict]:
+    """Measures the time from the start of a process to its first move, like a pool process or an analysis worker
+
+    The process is measured with the cache of the compiled kernels, with an empty cache, which compiles them,
+    and without numba. The time is the fastest of the repeats.
+
+    Args:
+        player (str): player specification without depth, like alphabeta:simple:tt
+        depth (int): search depth
+        repeat (int, optional): number of processes per measurement. Defaults to 3.
+        verbose (bool, optional): print every measurement. Defaults to True.
+
+    Returns:
+        List[Dict]: one result per mode, with the seconds of the whole process, the imports,
+            the warm up of the kernels and the first search
+    """
+    spec: str = player_spec(player, depth)
+    position: str = CORPUS[0][0]
+    results: List[Dict] = []
+    for mode in ('cached', 'cold cache', 'without numba'):
+        runs: List[Dict] = []
+        for _ in range(repeat):
+            env: Dict[str, str] = dict(os.environ)
+            with tempfile.TemporaryDirectory() as cache_dir:
+                if mode == 'cold cache':
+                    env['NUMBA_CACHE_DIR'] = cache_dir
+                script: str = STARTUP_SCRIPT.format(without_numba=mode == 'without numba', spec=spec,
+                                                    position=position)
+                start_time: float = time.perf_counter()
+                output: str = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                             env=env, capture_output=True, text=True, check=True).stdout
+                run: Dict = json.loads(output.splitlines()[-1])
+                run['process'] = time.perf_counter() - start_time
+            runs.append(run)
+        result: Dict = min(runs, key=lambda run: run['process'])
+        result.update({'mode': mode, 'player': spec, 'position': position})
+        results.append(result)
+        if verbose:
+            print(f"{mode:14} {spec:32} process {result['process']:7.3f} s: import {result['import']:6.3f} s, "
+                  f"warm up {result['warm_up']:6.3f} s, first move {result['first_move']:6.3f} s "
+                  f"(move {result['move']}, {'numba' if result['numba'] else 'plain Python'})", file=sys.stderr)
+    return results
+
+
+def format_result(result: Dict) -> str:
+    """
+    Args:
+        result (Dict): a benchmark result
+
+    Returns:
+        str: the result on one line
+    """
+    return (f"{result['position']:12} {result['player']:32} depth {result['depth']:2}: "
+            f"move {result['move']}{'' if result['agrees'] else '*'}, {result['nodes']:8} nodes, "
+            f"{result['elapsed']:8.4f} s, {result['nodes_per_second']:9.0f} nodes/s, "
+            f"{result['peak_memory'] / 1024:8.1f} KB")
+
+
+def compare(baseline: List[Dict], results: List[Dict], time_tolerance: float, memory_tolerance: float,
+            min_elapsed: float = MIN_ELAPSED) -> Tuple[List[str], List[str]]:
+    """Compares results with a baseline
+
+    Node counts and scores are deterministic, so any change is reported, unless there are fewer nodes.
+    Speed and memory vary between runs, they are only reported beyond the tolerance.
+    A drop of the speed of a run shorter than min_elapsed, in the baseline or now, is inconclusive instead,
+    timer noise alone moves the nodes per second of such runs beyond the tolerance.
+
+    Args:
+        baseline (List[Dict]): results of the baseline
+        results (List[Dict]): new results
+        time_tolerance (float): allowed relative drop of the nodes per second
+        memory_tolerance (float): allowed relative growth of the peak memory
+        min_elapsed (float, optional): shortest run in seconds whose speed is compared. Defaults to MIN_ELAPSED.
+
+    Returns:
+        Tuple[List[str], List[str]]: the regressions and changes, and the inconclusive speed drops,
+            both empty if there are none
+    """
+    old_results: Dict[Tuple[str, str, int], Dict] = {(old['position'], old['player'], old['depth']): old
+                                                     for old in baseline}
+    messages: List[str] = []
+    inconclusive: List[str] = []
+    for new in results:
+        key: Tuple[str, str, int] = (new['position'], new['player'], new['depth'])
+        old: Optional[Dict] = old_results.get(key)
+        label: str = f"{key[0]} {key[1]} depth {key[2]}"
+        if old is None:
+            continue
+        if new['score'] != old['score']:
+            messages.append(f"{label}: best move {old['move']} ({old['score']}) -> {new['move']} ({new['score']})")
+        if new['nodes'] > old['nodes']:
+            messages.append(f"{label}: nodes {old['nodes']} -> {new['nodes']}")
+        if new['nodes_per_second'] < old['nodes_per_second'] * (1 - time_tolerance):
+            message: str = f"{label}: nodes/s {old['nodes_per_second']:.0f} -> {new['nodes_per_second']:.0f}"
+            if min(old['elapsed'], new['elapsed']) < min_elapsed:
+                inconclusive.append(f"{message} in {old['elapsed'] * 1000:.2f} -> {new['elapsed'] * 1000:.2f} ms")
+            else:
+                messages.append(message)
+        if new['peak_memory'] > old['peak_memory'] * (1 + memory_tolerance):
+            messages.append(f"{label}: peak memory {old['peak_memory']} -> {new['peak_memory']} bytes")
+    return messages, inconclusive
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the search players on a fixed corpus of positions')
+    parser.add_argument('--players', nargs='+',
+                        help='player specifications without depth, player:heuristic[:options]')
+    parser.add_argument('--depths', nargs='+', type=int, help=f'search depths, default {DEFAULT_DEPTHS}')
+    parser.add_argument('--scaling', action='store_true',
+                        help=f'search on growing board sizes instead of the corpus, at the first depth (default {SCALING_DEPTH})')
+    parser.add_argument('--startup', action='store_true',
+                        help=f'measure fresh processes from their start to their first move, with the first player '
+                             f'(default {STARTUP_PLAYER}) at the first depth (default {STARTUP_DEPTH})')
+    parser.add_argument('--positions', nargs='*', default=[], help='names of the corpus positions, default all')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per measurement, the fastest counts')
+    parser.add_argument('--output', help='write the results to this baseline file')
+    parser.add_argument('--compare', help='compare the results with this baseline file')
+    parser.add_argument('--time-tolerance', type=float, default=0.2, help='allowed relative drop of nodes/s')
+    parser.add_argument('--memory-tolerance', type=float, default=0.2, help='allowed relative growth of peak memory')
+    parser.add_argument('--min-elapsed', type=float, default=MIN_ELAPSED,
+                        help='shortest run in seconds whose nodes/s are compared, shorter runs are inconclusive')
+    args = parser.parse_args()
+
+    if args.scaling:
+        run_scaling(args.players or SCALING_PLAYERS, args.depths[0] if args.depths else SCALING_DEPTH,
+                    repeat=args.repeat)
+        sys.exit(0)
+    if args.startup:
+        run_startup(args.players[0] if args.players else STARTUP_PLAYER,
+                    args.depths[0] if args.depths else STARTUP_DEPTH, args.repeat)
+        sys.exit(0)
+    benchmark_results: List[Dict] = run_benchmark(args.players or DEFAULT_PLAYERS, args.depths or DEFAULT_DEPTHS, args.positions,
+                                                  args.repeat)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': benchmark_results}, file, indent=1)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions, inconclusive = compare(json.load(file)['results'], benchmark_results,
+                                                args.time_tolerance, args.memory_tolerance, args.min_elapsed)
+        for message in regressions:
+            print(f'REGRESSION {message}')
+        for message in inconclusive:
+            print(f'INCONCLUSIVE {message}')
+        print(f'{len(regressions)} regressions compared with {args.compare}, '
+              f'{len(inconclusive)} inconclusive runs shorter than {args.min_elapsed * 1000:g} ms')
+        sys.exit(1 if regressions else 0)
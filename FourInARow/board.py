@@ -1,6 +1,9 @@
 from heuristics import Heuristic, SimpleHeuristic
 from players import PlayerController, HumanPlayer, MinMaxPlayer, AlphaBetaPlayer
-from typing import List
+from transposition import zobrist_keys, compute_hash
+from kernels import winning, winning_last_move
+from lines import WinningLines, winning_lines
+from typing import List, Optional, Tuple
 import numpy as np
 
 
@@ -25,12 +28,17 @@ class Board:
         self.width: int
         self.height: int
         self.board_state: np.ndarray
+        self.hash_key: int # Zobrist hash of the board state
+        self.last_move: Optional[Tuple[int, int]] = None # column and row of the last played disc, if known
+        self.history: List[Tuple[int, int]] = [] # column and row of the discs played on this board, used by undo
+        self.observers: List = [] # objects with on_play and on_undo methods, notified of every change (not copied)
         
         # Creates an empty board with the provided dimensions
         if len(args) == 2:
             assert isinstance(args[0], int) and isinstance(args[1], int)
             self.width, self.height = args
             self.board_state = np.full(args, 0, dtype=int)
+            self.hash_key = 0
         
         # Creates a copy of the provided board
         elif len(args) == 1 and isinstance(args[0], self.__class__):
@@ -38,6 +46,9 @@ class Board:
             self.width = other.width
             self.height = other.height
             self.board_state = other.get_board_state()
+            self.hash_key = other.hash_key
+            self.last_move = other.last_move
+            self.history = other.history.copy()
 
         # Creates a new board with the provided board state
         elif len(args) == 1 and isinstance(args[0], np.ndarray):
@@ -45,6 +56,7 @@ class Board:
             self.width = len(state)
             self.height = len(state[0])
             self.board_state = state
+            self.hash_key = compute_hash(state)
 
         # Raise an error if the parameters don't follow any of the correct formats
         else:
@@ -85,6 +97,33 @@ class Board:
         for i, field in enumerate(self.board_state[col][::-1]):
             if field == 0:
                 self.board_state[col, self.height - i - 1] = player_id
+                self.hash_key ^= zobrist_keys(self.width, self.height)[col][self.height - i - 1][player_id]
+                self.last_move = (col, self.height - i - 1)
+                self.history.append(self.last_move)
+                for observer in self.observers:
+                    observer.on_play(col, self.height - i - 1, player_id)
+                return True
+        return False
+
+
+    def undo(self, col: int) -> bool:
+        """Takes back the top disc of column 'col', the inverse of play
+
+        Args:
+            col (int): column of the action to take back
+
+        Returns:
+            bool: true if succeeded
+        """
+        for row, field in enumerate(self.board_state[col]):
+            if field != 0:
+                self.board_state[col, row] = 0
+                self.hash_key ^= zobrist_keys(self.width, self.height)[col][row][field]
+                if self.history and self.history[-1] == (col, row):
+                    self.history.pop()
+                self.last_move = self.history[-1] if self.history else None
+                for observer in self.observers:
+                    observer.on_undo(col, row, field)
                 return True
         return False
     
@@ -99,6 +138,14 @@ class Board:
             bool: true if spot is not taken yet
         """
         return self.board_state[col, 0] == 0
+
+
+    def occupied_columns(self) -> List[int]:
+        """
+        Returns:
+            List[int]: the columns that contain at least one disc, from left to right
+        """
+        return [int(col) for col in np.flatnonzero(self.board_state[:, self.height - 1])]
     
 
     def get_new_board(self, col: int, player_id: int) -> 'Board':
@@ -111,13 +158,9 @@ class Board:
         Returns:
             Board: a *new* Board object with the resulting state
         """
-        state: np.ndarray = self.get_board_state()
-        for i, field in enumerate(state[col][::-1]):
-            if field == 0:
-                state[col, self.height - i - 1] = player_id
-                return Board(state)
-            
-        return Board(state)
+        new_board: Board = Board(self)
+        new_board.play(col, player_id)
+        return new_board
     
 
     def __str__(self) -> str:
@@ -151,78 +194,327 @@ class Board:
         
         return output
 
-    def is_winning(self, game_n: int) -> bool:
-        """Determines whether a player has won, and if so, which one
+    def is_winning(self, game_n: int) -> int:
+        """Determines whether a player has won, and if so, which one, checking every winning line
 
         Args:
-            state (np.ndarray): the board to check
             game_n (int): n in a row required to win
 
         Returns:
             int: 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
         """
-        
-        state = self.get_board_state()
-        # Vertical check
-        for col in state:
-            counter = 0
-            player = -1
-            for field in col[::-1]:
+        return winning(self.board_state, winning_lines(self.width, self.height, game_n).lines)
+
+
+    def is_winning_last_move(self, game_n: int) -> int:
+        """Determines whether the last played disc won the game, by only checking the lines through it
+        Falls back to is_winning when the last move is unknown
+
+        Args:
+            game_n (int): n in a row required to win
+
+        Returns:
+            int: 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
+        """
+        if self.last_move is None:
+            return self.is_winning(game_n)
+        line_index: WinningLines = winning_lines(self.width, self.height, game_n)
+        return winning_last_move(self.board_state, *self.last_move, line_index.lines, line_index.field_starts,
+                                 line_index.field_lines)
+
+
+class BitBoard:
+    """A n in a row board that stores the discs of each player as an integer bitmask
+
+    The bits are laid out column by column, every column taking height + 1 bits.
+    Within a column bit 0 is the bottom field, the extra bit on top is always empty
+    so that shifted masks never wrap around into the next column.
+    Exposes the same interface as Board, so it can be used as a drop-in replacement.
+    """
+    def __init__(self, *args) -> None:
+        """Constructor for the BitBoard class
+
+        *args is one of three things:
+        - Two integers representing the width and height of the board respectively
+            An empty board is created with those dimensions
+        - Another board object (Board or BitBoard)
+            A copy of the board object is created
+        - A board state
+            A new board object is created with the provided board state
+
+        Raises:
+            TypeError: if none of the above mentioned formats are followed
+        """
+        # Initialising the attributes
+        self.width: int
+        self.height: int
+        self.masks: List[int] # bitmask per player id, index 0 is unused
+        self.heights: List[int] # number of discs in each column
+        self.hash_key: int # Zobrist hash of the board state, equal to that of a Board with the same state
+        self.last_move: Optional[Tuple[int, int]] = None # column and row of the last played disc, if known
+        self.history: List[Tuple[int, int]] = [] # column and row of the discs played on this board, used by undo
+        self.observers: List = [] # objects with on_play and on_undo methods, notified of every change (not copied)
+
+        # Creates an empty board with the provided dimensions
+        if len(args) == 2:
+            assert isinstance(args[0], int) and isinstance(args[1], int)
+            self.width, self.height = args
+            self.masks = [0, 0, 0]
+            self.heights = [0] * self.width
+            self.hash_key = 0
+
+        # Creates a copy of the provided bitboard
+        elif len(args) == 1 and isinstance(args[0], self.__class__):
+            other: 'BitBoard' = args[0]
+            self.width = other.width
+            self.height = other.height
+            self.masks = other.masks.copy()
+            self.heights = other.heights.copy()
+            self.hash_key = other.hash_key
+            self.last_move = other.last_move
+            self.history = other.history.copy()
+
+        # Creates a new board with the board state of the provided board
+        elif len(args) == 1 and isinstance(args[0], Board):
+            self._load_state(args[0].get_board_state())
+
+        # Creates a new board with the provided board state
+        elif len(args) == 1 and isinstance(args[0], np.ndarray):
+            self._load_state(args[0])
+
+        # Raise an error if the parameters don't follow any of the correct formats
+        else:
+            raise TypeError('BitBoard constructor has received a wrong type as parameter')
+
+
+    def _load_state(self, state: np.ndarray) -> None:
+        """Fills the bitmasks from a board state
+
+        Args:
+            state (np.ndarray): board state, indexed as [col, row] with row 0 at the top
+        """
+        self.width = len(state)
+        self.height = len(state[0])
+        self.masks = [0, 0, 0]
+        self.heights = [0] * self.width
+
+        for col in range(self.width):
+            for field in state[col][::-1]:
                 if field == 0:
                     break
-                elif field == player:
-                    counter += 1
-                    if counter >= game_n:
-                        return player
-                else:
-                    counter = 1 
-                    player = field
-                
-        # Horizintal check
-        for row in state.T:
-            counter = 0
-            player = -1
-            for field in row:
-                if field == 0:
-                    counter = 0
-                    player = -1
-                elif field == player:
-                    counter += 1
-                    if counter >= game_n:
-                        return player
-                else:
-                    counter = 1
-                    player = field
-
-        # Ascending diagonal check
-        for i, col in enumerate(state[:- game_n + 1]):
-            for j, field in enumerate(col[game_n - 1:]):
-                if field == 0:
-                    continue
-                player = field
-                for x in range(game_n):
-                    if state[i + x, j + game_n - 1 - x] != player:
-                        player = -1
-                        break
-                if player != -1:
-                    return player
-                
-        # Descending diagonal check
-        for i, col in enumerate(state[game_n - 1:]):
-            for j, field in enumerate(col[game_n - 1:]):
-                if field == 0:
-                    continue
-                player = field
-                for x in range(game_n):
-                    if state[i + game_n - 1 - x, j + game_n - 1 - x] != player:
-                        player = -1
-                        break
-                if player != -1:
-                    return player
-            
+                self.masks[field] |= 1 << (col * (self.height + 1) + self.heights[col])
+                self.heights[col] += 1
+        self.hash_key = compute_hash(state)
+
+
+    def _bit(self, col: int, row: int) -> int:
+        """
+        Args:
+            col (int): column of the field
+            row (int): row of the field, 0 is the top row
+
+        Returns:
+            int: the mask with only the bit of the requested field set
+        """
+        return 1 << (col * (self.height + 1) + self.height - 1 - row)
+
+
+    def get_value(self, col: int, row: int) -> int:
+        """Retrieves the value of a field in the board
+
+        Args:
+            col (int): column of the requested field
+            row (int): row of the requested field
+
+        Returns:
+            int: value of the requested field
+        """
+        bit: int = self._bit(col, row)
+        if self.masks[1] & bit:
+            return 1
+        if self.masks[2] & bit:
+            return 2
+        return 0
+
+
+    def get_board_state(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: the board state as a new array, in the same format as Board
+        """
+        state: np.ndarray = np.zeros((self.width, self.height), dtype=int)
+        for player_id in (1, 2):
+            bits: int = self.masks[player_id]
+            while bits:
+                lowest: int = bits & -bits
+                col, r = divmod(lowest.bit_length() - 1, self.height + 1)
+                state[col, self.height - 1 - r] = player_id
+                bits ^= lowest
+        return state
+
+
+    def play(self, col: int, player_id: int) -> bool:
+        """Let player playerId make a move in column 'col'
+
+        Args:
+            col (int): column of the action
+            player_id (int): player that takes the action
+
+        Returns:
+            bool: true if succeeded
+        """
+        if self.heights[col] >= self.height:
+            return False
+        self.masks[player_id] |= 1 << (col * (self.height + 1) + self.heights[col])
+        self.hash_key ^= zobrist_keys(self.width, self.height)[col][self.height - 1 - self.heights[col]][player_id]
+        self.last_move = (col, self.height - 1 - self.heights[col])
+        self.history.append(self.last_move)
+        self.heights[col] += 1
+        for observer in self.observers:
+            observer.on_play(*self.last_move, player_id)
+        return True
+
+
+    def undo(self, col: int) -> bool:
+        """Takes back the top disc of column 'col', the inverse of play
+
+        Args:
+            col (int): column of the action to take back
+
+        Returns:
+            bool: true if succeeded
+        """
+        if self.heights[col] == 0:
+            return False
+        self.heights[col] -= 1
+        bit: int = 1 << (col * (self.height + 1) + self.heights[col])
+        player_id: int = 1 if self.masks[1] & bit else 2
+        self.masks[player_id] ^= bit
+        row: int = self.height - 1 - self.heights[col]
+        self.hash_key ^= zobrist_keys(self.width, self.height)[col][row][player_id]
+        if self.history and self.history[-1] == (col, row):
+            self.history.pop()
+        self.last_move = self.history[-1] if self.history else None
+        for observer in self.observers:
+            observer.on_undo(col, row, player_id)
+        return True
+
+
+    def is_valid(self, col: int) -> bool:
+        """Returns if a move is valid
+
+        Args:
+            col (int): column of the action
+
+        Returns:
+            bool: true if spot is not taken yet
+        """
+        return self.heights[col] < self.height
+
+
+    def occupied_columns(self) -> List[int]:
+        """
+        Returns:
+            List[int]: the columns that contain at least one disc, from left to right
+        """
+        return [col for col, height in enumerate(self.heights) if height]
+
+
+    def get_new_board(self, col: int, player_id: int) -> 'BitBoard':
+        """Gets a new board given a player and their action
+
+        Args:
+            col (int): column of the action
+            player_id (int): player that takes the action
+
+        Returns:
+            BitBoard: a *new* BitBoard object with the resulting state
+        """
+        new_board: BitBoard = BitBoard(self)
+        new_board.play(col, player_id)
+        return new_board
+
+
+    def __str__(self) -> str:
+        """
+        Returns:
+            str: a human readable representation of the board
+        """
+        return str(Board(self.get_board_state()))
+
+
+    def has_n_in_row(self, bits: int, game_n: int) -> bool:
+        """Checks whether a mask contains n set bits in a row in any direction
+
+        Args:
+            bits (int): mask of the discs of one player
+            game_n (int): n in a row required to win
+
+        Returns:
+            bool: true if there are n discs in a row
+        """
+        # vertical, horizontal, descending and ascending diagonal
+        for shift in (1, self.height + 1, self.height, self.height + 2):
+            run: int = bits
+            for _ in range(game_n - 1):
+                run &= run >> shift
+            if run:
+                return True
+        return False
+
+
+    def is_winning(self, game_n: int) -> int:
+        """Determines whether a player has won, and if so, which one
+
+        Args:
+            game_n (int): n in a row required to win
+
+        Returns:
+            int: 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
+        """
+        for player_id in (1, 2):
+            if self.has_n_in_row(self.masks[player_id], game_n):
+                return player_id
+
         # Check for a draw
-        if np.all(state[:, 0]):
+        if all(h == self.height for h in self.heights):
             return -1 # The board is full, game is a draw
 
-        return 0 # Game is not over 
-        
+        return 0 # Game is not over
+
+
+    def is_winning_last_move(self, game_n: int) -> int:
+        """Determines whether the last played disc won the game, by only checking the lines through it
+        Falls back to is_winning when the last move is unknown
+
+        Args:
+            game_n (int): n in a row required to win
+
+        Returns:
+            int: 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
+        """
+        if self.last_move is None:
+            return self.is_winning(game_n)
+
+        bit: int = self._bit(*self.last_move)
+        player: int = 1 if self.masks[1] & bit else 2
+        bits: int = self.masks[player]
+        # vertical, horizontal, descending and ascending diagonal
+        for shift in (1, self.height + 1, self.height, self.height + 2):
+            counter: int = 1
+            neighbour: int = bit >> shift
+            while neighbour & bits:
+                counter += 1
+                neighbour >>= shift
+            neighbour = bit << shift
+            while neighbour & bits:
+                counter += 1
+                neighbour <<= shift
+            if counter >= game_n:
+                return player
+
+        # Check for a draw
+        if all(h == self.height for h in self.heights):
+            return -1 # The board is full, game is a draw
+
+        return 0 # Game is not over
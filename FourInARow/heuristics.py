@@ -1,8 +1,9 @@
 from __future__ import annotations
 import numpy as np
 from abc import abstractmethod
-from numba import jit
-from typing import TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
+from kernels import simple_evaluate, simple_evaluate_batch, winning, winning_last_move
+from lines import WinningLines, winning_lines
 if TYPE_CHECKING:
     from board import Board
 
@@ -29,30 +30,72 @@ class Heuristic:
         Returns:
             int: column with the best heuristic value
         """
-        min_util: int = -max(board.get_board_state().shape)
-        utils: np.ndarray = np.full(board.width, min_util - 1, dtype=int)
+        # Full columns get the lowest possible utility, so they're never picked while a valid column is left
+        utils: np.ndarray = np.full(board.width, np.iinfo(int).min, dtype=int)
 
-        for i in range(board.width):
-            if board.is_valid(i):
-                self.eval_count += 1
-                utils[i] = self.evaluate_board(player_id, board.get_new_board(i, player_id))
+        moves: List[int] = [i for i in range(board.width) if board.is_valid(i)]
+        utils[moves] = self.evaluate_moves(player_id, board, moves, player_id)
 
         return np.argmax(utils)
     
 
-    def evaluate_board(self, player_id: int, board: Board) -> int:
+    def evaluate_board(self, player_id: int, board: Board, winner: Optional[int] = None) -> int:
         """Helper function to assign a utility to a board
 
         Args:
             player_id (int): the player for which to compute the heuristic value
             board (Board): the board to evaluate
+            winner (Optional[int], optional): result of the board if the caller already determined it,
+                see winning. Defaults to None.
 
         Returns:
             int: the utility of a board
         """
         self.eval_count += 1
         state: np.ndarray = board.get_board_state()
-        return self._evaluate(player_id, state, self.winning(state, self.game_n))
+        if winner is None and board.last_move is not None:
+            winner = self.winning_last_move(state, *board.last_move, self.game_n)
+        elif winner is None:
+            winner = self.winning(state, self.game_n)
+        return self._evaluate(player_id, state, winner)
+
+
+    def evaluate_boards(self, player_id: int, states: np.ndarray, winners: np.ndarray) -> np.ndarray:
+        """Assigns a utility to a batch of board states at once
+
+        Args:
+            player_id (int): the player for which to compute the heuristic values
+            states (np.ndarray): the board states to evaluate, stacked with shape (k, width, height)
+            winners (np.ndarray): result of every board state, see winning
+
+        Returns:
+            np.ndarray: the utility of every board state
+        """
+        self.eval_count += len(states)
+        return self._evaluate_batch(player_id, states, winners)
+
+
+    def evaluate_moves(self, player_id: int, board: Board, moves: List[int], mover_id: int) -> np.ndarray:
+        """Assigns a utility to the boards that result from each of the moves, with a single batch evaluation
+        The board is left unchanged
+
+        Args:
+            player_id (int): the player for which to compute the heuristic values
+            board (Board): the board before the moves
+            moves (List[int]): valid columns to evaluate
+            mover_id (int): the player that makes the moves
+
+        Returns:
+            np.ndarray: the utility of the board after every move
+        """
+        states: np.ndarray = np.repeat(board.get_board_state()[np.newaxis], len(moves), axis=0)
+        winners: np.ndarray = np.zeros(len(moves), dtype=int)
+        for i, col in enumerate(moves):
+            board.play(col, mover_id)
+            states[i][board.last_move] = mover_id
+            winners[i] = board.is_winning_last_move(self.game_n)
+            board.undo(col)
+        return self.evaluate_boards(player_id, states, winners)
     
 
     @staticmethod
@@ -66,8 +109,24 @@ class Heuristic:
         Returns:
             int: 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
         """
-        from app import winning as app_winning # imported here to avoid circular imports
-        return app_winning(state, game_n)
+        return winning(state, winning_lines(*state.shape, game_n).lines)
+
+
+    @staticmethod
+    def winning_last_move(state: np.ndarray, col: int, row: int, game_n: int) -> int:
+        """Determines whether the disc at (col, row) won the game, only checking the lines through it
+
+        Args:
+            state (np.ndarray): the board to check
+            col (int): column of the last played disc
+            row (int): row of the last played disc
+            game_n (int): n in a row required to win
+
+        Returns:
+            int: 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
+        """
+        line_index: WinningLines = winning_lines(*state.shape, game_n)
+        return winning_last_move(state, col, row, line_index.lines, line_index.field_starts, line_index.field_lines)
     
 
     def __str__(self) -> str:
@@ -103,8 +162,25 @@ class Heuristic:
         pass    
 
 
+    def _evaluate_batch(self, player_id: int, states: np.ndarray, winners: np.ndarray) -> np.ndarray:
+        """Evaluates a batch of board states one by one
+        Subclasses with a compiled _evaluate can override this with a single compiled call
+
+        Args:
+            player_id (int): the player for which to compute the heuristic values
+            states (np.ndarray): the board states to evaluate, stacked with shape (k, width, height)
+            winners (np.ndarray): result of every board state, see winning
+
+        Returns:
+            np.ndarray: heuristic value for every board state
+        """
+        return np.array([self._evaluate(player_id, state, winner) for state, winner in zip(states, winners)],
+                        dtype=int)
+
+
 class SimpleHeuristic(Heuristic):
-    """A simple heuristic
+    """A simple heuristic, the longest row of discs of the player
+    Only rows within a winning line count, a row on a diagonal too short for n in a row can never win.
     Inherits from Heuristic
     """
     def __init__(self, game_n: int) -> None:
@@ -121,12 +197,24 @@ class SimpleHeuristic(Heuristic):
             str: the name of the heuristic; Simple
         """
         return 'Simple'
+
+
+    def _evaluate_batch(self, player_id: int, states: np.ndarray, winners: np.ndarray) -> np.ndarray:
+        """Evaluates a batch of board states in a single compiled call
+
+        Args:
+            player_id (int): the player for which to compute the heuristic values
+            states (np.ndarray): the board states to evaluate, stacked with shape (k, width, height)
+            winners (np.ndarray): result of every board state, see winning
+
+        Returns:
+            np.ndarray: heuristic value for every board state
+        """
+        return simple_evaluate_batch(player_id, states, winners, winning_lines(*states.shape[1:], self.game_n).lines)
     
     
-    @staticmethod
-    @jit(nopython=True, cache=True)
-    def _evaluate(player_id: int, state: np.ndarray, winner: int) -> int:
-        """Determine utility of a board state
+    def _evaluate(self, player_id: int, state: np.ndarray, winner: int) -> int:
+        """Determine utility of a board state, the longest row of discs of the player within a winning line
 
         Args:
             player_id (int): the player for which to compute the heuristic value
@@ -136,48 +224,198 @@ class SimpleHeuristic(Heuristic):
         Returns:
             int: heuristic value for the board state
         """
-        width: int
-        height: int
-        width, height = state.shape
+        return simple_evaluate(player_id, state, winner, winning_lines(*state.shape, self.game_n).lines)
+
+
+class WindowCounter:
+    """Counts the open windows of both players on a board
+    A window is n fields in a row, it is open for a player when it holds discs of that player and none of the other.
+    Observes a board, so the counts are updated in O(windows through the field) when a move is played or taken back.
+    The windows are the winning lines of the board size, see lines.WinningLines
+    """
+    def __init__(self, state: np.ndarray, game_n: int) -> None:
+        """
+        Args:
+            state (np.ndarray): the board state to start counting from
+            game_n (int): n in a row required to win
+        """
+        self.game_n: int = game_n
+        self.height: int = state.shape[1]
+        self.windows: WinningLines = winning_lines(*state.shape, game_n)
+        self.field_windows: List[List[int]] = self.windows.lines_of_field # windows through every flat field index
+
+        # The initial counts come from a single gather of the fields of all windows
+        cells: np.ndarray = self.windows.gather(state)
+        counts: List[np.ndarray] = [np.empty(0, dtype=int)] + [np.count_nonzero(cells == player_id, axis=1)
+                                                                for player_id in (1, 2)]
+        # number of discs in every window, per player id (index 0 is unused)
+        self.discs: List[List[int]] = [[], counts[1].tolist(), counts[2].tolist()]
+        # open_windows[player_id][k]: number of windows with k > 0 discs of the player and none of the other
+        self.open_windows: List[List[int]] = [[]]
+        for player_id in (1, 2):
+            open_counts: np.ndarray = np.bincount(counts[player_id][counts[3 - player_id] == 0], minlength=game_n + 1)
+            open_counts[0] = 0
+            self.open_windows.append(open_counts.tolist())
+
+
+    def on_play(self, col: int, row: int, player_id: int) -> None:
+        """Updates the counts after a disc was played
+
+        Args:
+            col (int): column of the disc
+            row (int): row of the disc
+            player_id (int): player that played the disc
+        """
+        mine: List[int] = self.discs[player_id]
+        theirs: List[int] = self.discs[3 - player_id]
+        for window in self.field_windows[col * self.height + row]:
+            if theirs[window] == 0:
+                # The window stays or becomes open for the player, with one more disc
+                if mine[window] > 0:
+                    self.open_windows[player_id][mine[window]] -= 1
+                self.open_windows[player_id][mine[window] + 1] += 1
+            elif mine[window] == 0:
+                # The window was open for the other player and is now blocked
+                self.open_windows[3 - player_id][theirs[window]] -= 1
+            mine[window] += 1
+
+
+    def on_undo(self, col: int, row: int, player_id: int) -> None:
+        """Updates the counts after a disc was taken back, the inverse of on_play
+
+        Args:
+            col (int): column of the disc
+            row (int): row of the disc
+            player_id (int): player that played the disc
+        """
+        mine: List[int] = self.discs[player_id]
+        theirs: List[int] = self.discs[3 - player_id]
+        for window in self.field_windows[col * self.height + row]:
+            mine[window] -= 1
+            if theirs[window] == 0:
+                self.open_windows[player_id][mine[window] + 1] -= 1
+                if mine[window] > 0:
+                    self.open_windows[player_id][mine[window]] += 1
+            elif mine[window] == 0:
+                self.open_windows[3 - player_id][theirs[window]] += 1
+
+
+class WindowHeuristic(Heuristic):
+    """A heuristic that weighs the open windows of both players, more discs in a window weigh heavier
+    The counts are maintained incrementally on the board, so evaluating a leaf of the search takes O(n)
+    Inherits from Heuristic
+    """
+    def __init__(self, game_n: int) -> None:
+        """
+        Args:
+            game_n (int): n in a row required to win
+        """
+        super().__init__(game_n)
+        # weight of an open window with k discs, every extra disc quadruples the weight
+        self.weights: List[int] = [0] + [4 ** (k - 1) for k in range(1, game_n)]
+
+
+    def _name(self) -> str:
+        """
+        Returns:
+            str: the name of the heuristic; Window
+        """
+        return 'Window'
+
+
+    def evaluate_board(self, player_id: int, board: Board, winner: Optional[int] = None) -> int:
+        """Assigns a utility to a board, using the window counts that are kept on the board
+
+        Args:
+            player_id (int): the player for which to compute the heuristic value
+            board (Board): the board to evaluate
+            winner (Optional[int], optional): result of the board if the caller already determined it,
+                see winning. Defaults to None.
+
+        Returns:
+            int: the utility of a board
+        """
+        self.eval_count += 1
+        if winner is None:
+            winner = board.is_winning_last_move(self.game_n)
+        return self._score(player_id, self._get_counter(board), winner)
+
+
+    def evaluate_moves(self, player_id: int, board: Board, moves: List[int], mover_id: int) -> np.ndarray:
+        """Assigns a utility to the boards that result from each of the moves
+        Every move is played and taken back on the board, which updates the window counts incrementally
+
+        Args:
+            player_id (int): the player for which to compute the heuristic values
+            board (Board): the board before the moves
+            moves (List[int]): valid columns to evaluate
+            mover_id (int): the player that makes the moves
+
+        Returns:
+            np.ndarray: the utility of the board after every move
+        """
+        self.eval_count += len(moves)
+        counter: WindowCounter = self._get_counter(board)
+        utils: np.ndarray = np.empty(len(moves), dtype=int)
+        for i, col in enumerate(moves):
+            board.play(col, mover_id)
+            utils[i] = self._score(player_id, counter, board.is_winning_last_move(self.game_n))
+            board.undo(col)
+        return utils
+
+
+    def _get_counter(self, board: Board) -> WindowCounter:
+        """Gets the window counter that observes the board, and attaches one if there is none yet
+
+        Args:
+            board (Board): the board
+
+        Returns:
+            WindowCounter: counter that is kept up to date with the board
+        """
+        for observer in board.observers:
+            if isinstance(observer, WindowCounter) and observer.game_n == self.game_n:
+                return observer
+        counter: WindowCounter = WindowCounter(board.get_board_state(), self.game_n)
+        board.observers.append(counter)
+        return counter
+
+
+    def _score(self, player_id: int, counter: WindowCounter, winner: int) -> int:
+        """Determine utility from the window counts
+
+        Args:
+            player_id (int): the player for which to compute the heuristic value
+            counter (WindowCounter): window counts of the board
+            winner (int): 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
+
+        Returns:
+            int: heuristic value for the board state
+        """
+        # higher than the value of any board without a winner
+        win_value: int = len(counter.windows) * self.weights[-1] + 1
 
         if winner == player_id: # player won
-            return max(width, height)
+            return win_value
         elif winner < 0: # draw
             return 0
         elif winner > 0: # player lost
-            return -max(width, height)
-        
-        # not winning or losing, return highest number of claimed squares in a row      
-        max_in_row: int = 0
-        for i in range(width):
-            for j in range(height):
-                if state[i, j] != player_id:
-                    continue
-
-                max_in_row = max(max_in_row, 1)
-
-                for x in range(1, width - i):
-                    if state[i + x, j] == player_id:
-                        max_in_row = max(max_in_row, x + 1)
-                    else:
-                        break
-
-                for y in range(1, height - j):
-                    if state[i, j + y] == player_id:
-                        max_in_row = max(max_in_row, y + 1)
-                    else:
-                        break
-
-                for d in range(1, min(width - i, height - j)):
-                    if state[i + d, j + d] == player_id:
-                        max_in_row = max(max_in_row, d + 1)
-                    else:
-                        break
-
-                for a in range(1, min(width - i, j)):
-                    if state[i + a, j - a] == player_id:
-                        max_in_row = max(max_in_row, a + 1)
-                    else:
-                        break
-
-        return max_in_row
+            return -win_value
+
+        mine: List[int] = counter.open_windows[player_id]
+        theirs: List[int] = counter.open_windows[3 - player_id]
+        return sum(weight * (mine[k] - theirs[k]) for k, weight in enumerate(self.weights))
+
+
+    def _evaluate(self, player_id: int, state: np.ndarray, winner: int) -> int:
+        """Determine utility of a board state, counting its windows from scratch
+
+        Args:
+            player_id (int): the player for which to compute the heuristic value
+            state (np.ndarray): the board to check
+            winner (int): 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
+
+        Returns:
+            int: heuristic value for the board state
+        """
+        return self._score(player_id, WindowCounter(state, self.game_n), winner)
@@ -0,0 +1,489 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import time
+import numpy as np
+from lines import WinningLines, winning_lines
+
+
+class Kernel:
+    """A function that is compiled with numba when a kernel is called for the first time
+
+    Importing numba and loading the compiled functions from its cache takes a while, which dominates
+    the start of short-lived processes, so numba is only imported once a kernel is needed.
+    Without numba the kernels run as plain Python, which gives the same results much slower.
+    """
+    def __init__(self, function: Callable, options: Dict) -> None:
+        """
+        Args:
+            function (Callable): the Python function
+            options (Dict): options of numba.jit
+        """
+        self.function: Callable = function
+        self.options: Dict = options
+        self.compiled: Optional[Callable] = None # numba dispatcher, or the function itself without numba
+        self.__name__: str = function.__name__
+        self.__doc__: Optional[str] = function.__doc__
+
+
+    def __call__(self, *args):
+        """Calls the compiled function, resolving all kernels first if needed
+        """
+        if self.compiled is None:
+            resolve()
+        return self.compiled(*args)
+
+
+    def __repr__(self) -> str:
+        """
+        Returns:
+            str: name of the kernel and whether it is resolved
+        """
+        return f'<Kernel {self.__name__}{"" if self.compiled is None else " resolved"}>'
+
+
+_kernels: List[Kernel] = [] # every kernel of this module, in definition order
+_numba: Optional[bool] = None # whether the kernels are compiled with numba, None until they are resolved
+
+
+def kernel(**options) -> Callable[[Callable], Kernel]:
+    """Decorator for the compiled functions, used like numba.jit(nopython=True, cache=True)
+
+    Args:
+        options: options of numba.jit
+
+    Returns:
+        Callable[[Callable], Kernel]: the decorator
+    """
+    def decorate(function: Callable) -> Kernel:
+        compiled: Kernel = Kernel(function, options)
+        _kernels.append(compiled)
+        return compiled
+    return decorate
+
+
+def resolve() -> bool:
+    """Imports numba and binds every kernel to its numba dispatcher, or to the plain function without numba
+    The numba functions are compiled or loaded from the cache at their first call, see warm_up
+
+    Returns:
+        bool: whether the kernels are compiled with numba
+    """
+    global _numba
+    if _numba is not None:
+        return _numba
+    try:
+        from numba import jit
+    except ImportError:
+        jit = None
+    for compiled in _kernels:
+        compiled.compiled = compiled.function if jit is None else jit(**compiled.options)(compiled.function)
+    # Kernels that call each other look their callees up in the globals of this module when they are compiled,
+    # so the names have to refer to the dispatchers instead of the Kernel objects
+    for name, value in list(globals().items()):
+        if isinstance(value, Kernel):
+            globals()[name] = value.compiled
+    _numba = jit is not None
+    return _numba
+
+
+def warm_up() -> float:
+    """Compiles every kernel for the argument types of the players and heuristics, or loads them from the cache
+    numba caches the compiled functions next to this file, so only the first warm up after a change compiles
+    and the later ones just load. Call this at the start of worker processes, so their first search doesn't
+    pay for it, or run this module once to build the cache
+
+    Returns:
+        float: elapsed time in seconds
+    """
+    start_time: float = time.perf_counter()
+    resolve()
+    line_index: WinningLines = winning_lines(7, 6, 4)
+    state: np.ndarray = np.zeros((7, 6), dtype=int)
+    state[3, 5] = 1
+    stop: np.ndarray = np.zeros(1, dtype=np.int8)
+    winning(state, line_index.lines)
+    winning_last_move(state, 3, 5, line_index.lines, line_index.field_starts, line_index.field_lines)
+    simple_evaluate(2, state, 0, line_index.lines)
+    simple_evaluate_batch(2, state[np.newaxis], np.zeros(1, dtype=int), line_index.lines)
+    rollouts(state, 2, 2, line_index.lines, line_index.field_starts, line_index.field_lines, 1)
+    alphabeta(state, 2, 2, 2, line_index.lines, line_index.field_starts, line_index.field_lines, 0, stop)
+    return time.perf_counter() - start_time
+
+
+@kernel(nopython=True, cache=True)
+def winning(state: np.ndarray, lines: np.ndarray) -> int:
+    """Determines whether a player has won, and if so, which one
+
+    Args:
+        state (np.ndarray): the board to check
+        lines (np.ndarray): the winning lines of the board size, see lines.WinningLines
+
+    Returns:
+        int: 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
+    """
+    flat: np.ndarray = state.reshape(-1)
+    game_n: int = lines.shape[1]
+    for k in range(len(lines)):
+        player: int = flat[lines[k, 0]]
+        if player == 0:
+            continue
+        i: int = 1
+        while i < game_n and flat[lines[k, i]] == player:
+            i += 1
+        if i == game_n:
+            return player
+
+    # Check for a draw
+    if np.all(state[:, 0]):
+        return -1 # The board is full, game is a draw
+
+    return 0 # Game is not over
+
+
+@kernel(nopython=True, cache=True)
+def _fills_line(flat: np.ndarray, field: int, lines: np.ndarray, field_starts: np.ndarray,
+                field_lines: np.ndarray) -> bool:
+    """
+    Args:
+        flat (np.ndarray): the board state, flattened
+        field (int): flat index of a disc
+        lines (np.ndarray): the winning lines of the board size, see lines.WinningLines
+        field_starts (np.ndarray): start of the lines of every field in field_lines
+        field_lines (np.ndarray): the lines through every field
+
+    Returns:
+        bool: whether a line through the field is filled with discs of the player of the disc
+    """
+    game_n: int = lines.shape[1]
+    player: int = flat[field]
+    for j in range(field_starts[field], field_starts[field + 1]):
+        k: int = field_lines[j]
+        i: int = 0
+        while i < game_n and flat[lines[k, i]] == player:
+            i += 1
+        if i == game_n:
+            return True
+    return False
+
+
+@kernel(nopython=True, cache=True)
+def winning_last_move(state: np.ndarray, col: int, row: int, lines: np.ndarray, field_starts: np.ndarray,
+                      field_lines: np.ndarray) -> int:
+    """Determines whether the disc at (col, row) won the game, only checking the lines through it
+
+    Args:
+        state (np.ndarray): the board to check
+        col (int): column of the last played disc
+        row (int): row of the last played disc
+        lines (np.ndarray): the winning lines of the board size, see lines.WinningLines
+        field_starts (np.ndarray): start of the lines of every field in field_lines
+        field_lines (np.ndarray): the lines through every field
+
+    Returns:
+        int: 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
+    """
+    if _fills_line(state.reshape(-1), col * state.shape[1] + row, lines, field_starts, field_lines):
+        return state[col, row]
+
+    # Check for a draw
+    if np.all(state[:, 0]):
+        return -1 # The board is full, game is a draw
+
+    return 0 # Game is not over
+
+
+@kernel(nopython=True, cache=True)
+def _simple_value(player_id: int, flat: np.ndarray, winner: int, lines: np.ndarray, win_value: int) -> int:
+    """simple_evaluate on a flattened board state
+
+    Args:
+        player_id (int): the player for which to compute the heuristic value
+        flat (np.ndarray): the board state, flattened
+        winner (int): 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
+        lines (np.ndarray): the winning lines of the board size, see lines.WinningLines
+        win_value (int): value of a won board, the larger side of the board
+
+    Returns:
+        int: heuristic value for the board state
+    """
+    if winner == player_id: # player won
+        return win_value
+    elif winner < 0: # draw
+        return 0
+    elif winner > 0: # player lost
+        return -win_value
+
+    # not winning or losing, return highest number of claimed squares in a row,
+    # which stays below n as n in a row would have won
+    game_n: int = lines.shape[1]
+    max_in_row: int = 0
+    for k in range(len(lines)):
+        # A row longer than max_in_row contains one of the fields max_in_row, 2 * max_in_row + 1, ...
+        # so only those are probed, and the row is measured around a probe that holds a disc of the player
+        i: int = max_in_row
+        while i < game_n:
+            if flat[lines[k, i]] != player_id:
+                i += max_in_row + 1
+                continue
+            start: int = i
+            while start > 0 and flat[lines[k, start - 1]] == player_id:
+                start -= 1
+            end: int = i + 1
+            while end < game_n and flat[lines[k, end]] == player_id:
+                end += 1
+            if end - start > max_in_row:
+                max_in_row = end - start
+                if max_in_row >= game_n - 1:
+                    return max_in_row
+            i = end + 1 + max_in_row
+    return max_in_row
+
+
+@kernel(nopython=True, cache=True)
+def simple_evaluate(player_id: int, state: np.ndarray, winner: int, lines: np.ndarray) -> int:
+    """Determine utility of a board state for SimpleHeuristic, the longest row of discs of the player
+    within a winning line
+
+    Args:
+        player_id (int): the player for which to compute the heuristic value
+        state (np.ndarray): the board to check
+        winner (int): 1 or 2 if the respective player won, -1 if the game is a draw, 0 otherwise
+        lines (np.ndarray): the winning lines of the board size, see lines.WinningLines
+
+    Returns:
+        int: heuristic value for the board state
+    """
+    return _simple_value(player_id, state.reshape(-1), winner, lines, max(state.shape[0], state.shape[1]))
+
+
+@kernel(nopython=True, cache=True)
+def simple_evaluate_batch(player_id: int, states: np.ndarray, winners: np.ndarray, lines: np.ndarray) -> np.ndarray:
+    """Loop of simple_evaluate over a batch of board states
+
+    Args:
+        player_id (int): the player for which to compute the heuristic values
+        states (np.ndarray): the board states to evaluate, stacked with shape (k, width, height)
+        winners (np.ndarray): result of every board state, see winning
+        lines (np.ndarray): the winning lines of the board size, see lines.WinningLines
+
+    Returns:
+        np.ndarray: heuristic value for every board state
+    """
+    flats: np.ndarray = states.reshape(len(states), -1)
+    win_value: int = max(states.shape[1], states.shape[2])
+    utils: np.ndarray = np.empty(len(states), dtype=np.int64)
+    for k in range(len(states)):
+        utils[k] = _simple_value(player_id, flats[k], winners[k], lines, win_value)
+    return utils
+
+
+@kernel(nopython=True, cache=True)
+def seed_rollouts(seed: int) -> None:
+    """Seeds the random generator of the compiled rollouts, which is separate from the one of numpy
+
+    Args:
+        seed (int): the seed
+    """
+    np.random.seed(seed)
+
+
+@kernel(nopython=True, cache=True)
+def rollouts(state: np.ndarray, mover_id: int, player_id: int, lines: np.ndarray, field_starts: np.ndarray,
+             field_lines: np.ndarray, count: int) -> float:
+    """Plays random games from a position until they end
+
+    Args:
+        state (np.ndarray): the position, it is not modified
+        mover_id (int): player to move
+        player_id (int): player whose result is counted
+        lines (np.ndarray): the winning lines of the board size, see lines.WinningLines
+        field_starts (np.ndarray): start of the lines of every field in field_lines
+        field_lines (np.ndarray): the lines through every field
+        count (int): number of games
+
+    Returns:
+        float: the results for player_id summed over the games, 1 for a win and 0.5 for a draw
+    """
+    width: int
+    height: int
+    width, height = state.shape
+    board: np.ndarray = np.empty_like(state)
+    flat: np.ndarray = board.reshape(-1) # view of the board for the win checks
+    free_rows: np.ndarray = np.empty(width, dtype=np.int64) # empty fields on top of every column
+    open_cols: np.ndarray = np.empty(width, dtype=np.int64)
+    total: float = 0.0
+
+    for _ in range(count):
+        board[:] = state
+        free: int = 0
+        for col in range(width):
+            row: int = 0
+            while row < height and board[col, row] == 0:
+                row += 1
+            free_rows[col] = row
+            free += row
+
+        mover: int = mover_id
+        winner: int = 0
+        while winner == 0 and free > 0:
+            open_count: int = 0
+            for col in range(width):
+                if free_rows[col] > 0:
+                    open_cols[open_count] = col
+                    open_count += 1
+            col = open_cols[np.random.randint(0, open_count)]
+            free_rows[col] -= 1
+            free -= 1
+            board[col, free_rows[col]] = mover
+            if _fills_line(flat, col * height + free_rows[col], lines, field_starts, field_lines):
+                winner = mover
+            elif free == 0:
+                winner = -1
+            mover = 3 - mover
+
+        if winner == player_id:
+            total += 1.0
+        elif winner <= 0:
+            total += 0.5
+    return total
+
+
+# Bound of the search window, beyond the value of any board
+_INFINITY: int = 1 << 62
+
+
+@kernel(nopython=True, nogil=True, cache=True)
+def alphabeta(state: np.ndarray, player_id: int, mover_id: int, depth: int, lines: np.ndarray,
+              field_starts: np.ndarray, field_lines: np.ndarray, root_winner: int,
+              stop: np.ndarray) -> Tuple[int, int, np.ndarray, int, int, bool]:
+    """Alpha-beta search with the simple heuristic, entirely compiled and without the GIL
+
+    The recursion is replaced by an explicit stack with one entry per ply of the current line,
+    and the moves are played and taken back on a single copy of the board, with the free fields of every column.
+    The moves are searched from left to right, like AlphaBetaPlayer.alphabetaprune with the static move ordering,
+    so it finds the same best move and score.
+
+    Args:
+        state (np.ndarray): the root position, it is not modified
+        player_id (int): the player the scores are for, the maximizing player
+        mover_id (int): player to move at the root
+        depth (int): depth of the search
+        lines (np.ndarray): the winning lines of the board size, see lines.WinningLines
+        field_starts (np.ndarray): start of the lines of every field in field_lines
+        field_lines (np.ndarray): the lines through every field
+        root_winner (int): result of the root position, see winning_last_move
+        stop (np.ndarray): flag array of length 1, the search is aborted when another thread sets it to nonzero
+
+    Returns:
+        Tuple[int, int, np.ndarray, int, int, bool]: best move (-1 at a leaf) and its score, the principal variation,
+            the number of nodes and heuristic evaluations, and whether the search was aborted
+    """
+    width: int
+    height: int
+    width, height = state.shape
+    if depth == 0 or root_winner != 0:
+        return -1, simple_evaluate(player_id, state, root_winner, lines), np.empty(0, dtype=np.int64), 1, 1, False
+
+    board: np.ndarray = state.copy()
+    flat: np.ndarray = board.reshape(-1) # view of the board for the win checks and the evaluation
+    win_value: int = max(width, height)
+    free_rows: np.ndarray = np.empty(width, dtype=np.int64) # empty fields on top of every column
+    free: int = 0
+    for col in range(width):
+        row: int = 0
+        while row < height and board[col, row] == 0:
+            row += 1
+        free_rows[col] = row
+        free += row
+
+    # The stack: per ply of the current line the next column to try, the window, the best move so far
+    # and the column that was played to reach the next ply
+    next_cols: np.ndarray = np.zeros(depth, dtype=np.int64)
+    alphas: np.ndarray = np.empty(depth, dtype=np.int64)
+    betas: np.ndarray = np.empty(depth, dtype=np.int64)
+    best_scores: np.ndarray = np.empty(depth, dtype=np.int64)
+    best_moves: np.ndarray = np.empty(depth, dtype=np.int64)
+    played: np.ndarray = np.empty(depth, dtype=np.int64)
+    # Triangular table of principal variations, pv[ply, ply:pv_ends[ply]] is the one below the node at ply
+    pv: np.ndarray = np.empty((depth, depth), dtype=np.int64)
+    pv_ends: np.ndarray = np.empty(depth, dtype=np.int64)
+
+    alphas[0] = -_INFINITY
+    betas[0] = _INFINITY
+    best_scores[0] = -_INFINITY if mover_id == player_id else _INFINITY
+    best_moves[0] = -1
+    pv_ends[0] = 0
+    nodes: int = 1
+    evaluations: int = 0
+    ply: int = 0
+    mover: int = mover_id
+
+    while True:
+        col = next_cols[ply]
+        while col < width and free_rows[col] == 0:
+            col += 1
+        child_score: int
+        if col < width and alphas[ply] < betas[ply]:
+            next_cols[ply] = col + 1
+            free_rows[col] -= 1
+            free -= 1
+            row = free_rows[col]
+            board[col, row] = mover
+            nodes += 1
+            if nodes % 256 == 0 and stop[0] != 0:
+                return -1, 0, np.empty(0, dtype=np.int64), nodes, evaluations, True
+            winner: int = 0
+            if _fills_line(flat, col * height + row, lines, field_starts, field_lines):
+                winner = mover
+            elif free == 0:
+                winner = -1 # draw
+            if ply + 1 < depth and winner == 0:
+                # Push the child
+                played[ply] = col
+                ply += 1
+                mover = 3 - mover
+                next_cols[ply] = 0
+                alphas[ply] = alphas[ply - 1]
+                betas[ply] = betas[ply - 1]
+                best_scores[ply] = -_INFINITY if mover == player_id else _INFINITY
+                best_moves[ply] = -1
+                pv_ends[ply] = ply
+                continue
+            child_score = _simple_value(player_id, flat, winner, lines, win_value)
+            evaluations += 1
+            board[col, row] = 0
+            free_rows[col] += 1
+            free += 1
+            child_end: int = ply + 1 # a leaf has no principal variation
+        else:
+            # All moves of the node are searched or cut off
+            if ply == 0:
+                return best_moves[0], best_scores[0], pv[0, :pv_ends[0]].copy(), nodes, evaluations, False
+            child_score = best_scores[ply]
+            child_end = pv_ends[ply]
+            ply -= 1
+            mover = 3 - mover
+            col = played[ply]
+            board[col, free_rows[col]] = 0
+            free_rows[col] += 1
+            free += 1
+
+        if (child_score > best_scores[ply]) if mover == player_id else (child_score < best_scores[ply]):
+            best_scores[ply] = child_score
+            best_moves[ply] = col
+            pv[ply, ply] = col
+            if child_end > ply + 1:
+                pv[ply, ply + 1:child_end] = pv[ply + 1, ply + 1:child_end]
+            pv_ends[ply] = child_end
+        if mover == player_id:
+            alphas[ply] = max(alphas[ply], best_scores[ply])
+        else:
+            betas[ply] = min(betas[ply], best_scores[ply])
+
+
+if __name__ == '__main__':
+    # Builds the cache of the compiled functions, for example when deploying, so no process has to compile them
+    elapsed: float = warm_up()
+    if _numba:
+        print(f'Compiled or loaded the kernels in {elapsed:.2f} seconds')
+    else:
+        print('numba is not installed, the kernels run as plain Python')
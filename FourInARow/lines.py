@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import List
+import numpy as np
+
+
+class WinningLines:
+    """Every line of n fields in a row on a board size, the lines a player has to fill to win
+
+    The fields are flat indices into a board state of shape (width, height), col * height + row,
+    so a line of a state is the gather state.ravel()[lines[k]]. The lines through a field are stored
+    like a sparse matrix: field_lines[field_starts[f]:field_starts[f + 1]] are the lines through field f.
+    Get the index with winning_lines, which builds it once per board size and n.
+    """
+    def __init__(self, width: int, height: int, game_n: int) -> None:
+        """
+        Args:
+            width (int): width of the board
+            height (int): height of the board
+            game_n (int): n in a row required to win
+        """
+        self.width: int = width
+        self.height: int = height
+        self.game_n: int = game_n
+        fields: List[List[int]] = []
+        # vertical, horizontal, descending and ascending diagonal
+        for dx, dy in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for col in range(width):
+                for row in range(height):
+                    end_col: int = col + dx * (game_n - 1)
+                    end_row: int = row + dy * (game_n - 1)
+                    if 0 <= end_col < width and 0 <= end_row < height:
+                        fields.append([(col + dx * i) * height + row + dy * i for i in range(game_n)])
+        self.lines: np.ndarray = np.array(fields, dtype=np.int64).reshape(len(fields), game_n) # (lines, n)
+
+        # Python lists of the lines through every field, for incremental updates in the interpreter
+        self.lines_of_field: List[List[int]] = [[] for _ in range(width * height)]
+        for index, line in enumerate(fields):
+            for field in line:
+                self.lines_of_field[field].append(index)
+        self.field_starts: np.ndarray = np.zeros(width * height + 1, dtype=np.int64)
+        self.field_starts[1:] = np.cumsum([len(lines) for lines in self.lines_of_field])
+        self.field_lines: np.ndarray = np.array([index for lines in self.lines_of_field for index in lines],
+                                                dtype=np.int64)
+        for array in (self.lines, self.field_starts, self.field_lines):
+            array.flags.writeable = False # shared by all boards
+
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: number of lines
+        """
+        return len(self.lines)
+
+
+    def gather(self, state: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            state (np.ndarray): board state of shape (width, height)
+
+        Returns:
+            np.ndarray: the fields of every line, with shape (lines, n)
+        """
+        return state.ravel()[self.lines]
+
+
+@lru_cache(maxsize=None)
+def winning_lines(width: int, height: int, game_n: int) -> WinningLines:
+    """
+    Args:
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+
+    Returns:
+        WinningLines: the lines of the board size, built at the first call and shared by all later ones
+    """
+    return WinningLines(width, height, game_n)
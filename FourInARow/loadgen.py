@@ -0,0 +1,168 @@
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import random
+import time
+from board import BitBoard
+from server import DEFAULT_ENGINE
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Args:
+        values (List[float]): the measurements
+        fraction (float): the percentile as a fraction, like 0.99
+
+    Returns:
+        float: the smallest value that at least this fraction of the values doesn't exceed, 0 without values
+    """
+    if not values:
+        return 0
+    ordered: List[float] = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(fraction * len(ordered) + 0.999999) - 1))]
+
+
+class LoadClient:
+    """Plays random moves against the engines of a game server, one game per connection
+    """
+    def __init__(self, host: str, port: int, path: Optional[str], width: int, height: int, game_n: int,
+                 engine: str, time_limit: float, abandon: float, seed: int) -> None:
+        """
+        Args:
+            host (str): TCP host of the server
+            port (int): TCP port of the server
+            path (Optional[str]): Unix socket of the server, replaces TCP when set
+            width (int): width of the board
+            height (int): height of the board
+            game_n (int): n in a row required to win
+            engine (str): specification of the engines
+            time_limit (float): time budget of the engines per move in seconds
+            abandon (float): chance that a game is abandoned by disconnecting while the engine searches
+            seed (int): seed of the random moves
+        """
+        self.host: str = host
+        self.port: int = port
+        self.path: Optional[str] = path
+        self.width: int = width
+        self.height: int = height
+        self.game_n: int = game_n
+        self.engine: str = engine
+        self.time_limit: float = time_limit
+        self.abandon: float = abandon
+        self.rng: random.Random = random.Random(seed)
+        self.latencies: List[float] = [] # round trip time of every request that got an engine move
+        self.moves: int = 0 # engine moves received
+        self.games: int = 0 # games played to the end
+        self.abandoned: int = 0
+        self.errors: List[str] = []
+
+
+    async def _request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: Dict) -> Dict:
+        """
+        Args:
+            reader (asyncio.StreamReader): responses of the server
+            writer (asyncio.StreamWriter): requests to the server
+            request (Dict): the request
+
+        Returns:
+            Dict: the response
+        """
+        writer.write(json.dumps(request).encode() + b'\n')
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+
+    async def play_game(self, engine_id: int) -> None:
+        """Plays one game on a new connection
+
+        Args:
+            engine_id (int): the player the engine plays, 1 moves first
+        """
+        if self.path is not None:
+            reader, writer = await asyncio.open_unix_connection(self.path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            board: BitBoard = BitBoard(self.width, self.height)
+            abandon: bool = self.rng.random() < self.abandon
+            start_time: float = time.perf_counter()
+            response: Dict = await self._request(reader, writer, {
+                'op': 'new', 'width': self.width, 'height': self.height, 'game_n': self.game_n,
+                'engine': self.engine, 'engine_id': engine_id, 'time_limit': self.time_limit})
+            while response['ok']:
+                if 'engine_col' in response:
+                    self.latencies.append(time.perf_counter() - start_time)
+                    self.moves += 1
+                    board.play(response['engine_col'], engine_id)
+                if response.get('winner', 0) != 0:
+                    self.games += 1
+                    return
+                col: int = self.rng.choice([col for col in range(self.width) if board.is_valid(col)])
+                board.play(col, 3 - engine_id)
+                if abandon and self.rng.random() < 0.2:
+                    # Disconnect while the engine searches its answer
+                    writer.write(json.dumps({'op': 'move', 'game': response['game'], 'col': col}).encode() + b'\n')
+                    await writer.drain()
+                    await asyncio.sleep(self.time_limit / 2)
+                    self.abandoned += 1
+                    return
+                start_time = time.perf_counter()
+                response = await self._request(reader, writer, {'op': 'move', 'game': response['game'], 'col': col})
+            self.errors.append(response['error'])
+        finally:
+            writer.close()
+
+
+async def run_load(client: LoadClient, games: int, concurrency: int) -> Dict:
+    """Plays games with a number of them running at the same time
+
+    Args:
+        client (LoadClient): the client that plays the games
+        games (int): number of games
+        concurrency (int): number of games played at the same time
+
+    Returns:
+        Dict: throughput in engine moves per second and the latencies of the engine moves in seconds
+    """
+    slots: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+    async def play(index: int) -> None:
+        async with slots:
+            await client.play_game(1 + index % 2)
+
+    start_time: float = time.perf_counter()
+    await asyncio.gather(*(play(index) for index in range(games)))
+    elapsed: float = time.perf_counter() - start_time
+    return {'games': client.games, 'abandoned': client.abandoned, 'errors': len(client.errors),
+            'moves': client.moves, 'elapsed': elapsed, 'moves_per_second': client.moves / elapsed,
+            'p50_latency': percentile(client.latencies, 0.5), 'p99_latency': percentile(client.latencies, 0.99),
+            'max_latency': max(client.latencies, default=0)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measures the throughput and move latency of a game server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='connect to this Unix socket instead of TCP')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=20, help='games played at the same time')
+    parser.add_argument('--width', type=int, default=7)
+    parser.add_argument('--height', type=int, default=6)
+    parser.add_argument('--game-n', type=int, default=4)
+    parser.add_argument('--engine', default=DEFAULT_ENGINE, help='player:heuristic:depth[:options]')
+    parser.add_argument('--time-limit', type=float, default=0.2, help='seconds per engine move')
+    parser.add_argument('--abandon', type=float, default=0, help='fraction of the games that are abandoned')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    load_client: LoadClient = LoadClient(args.host, args.port, args.unix, args.width, args.height, args.game_n,
+                                         args.engine, args.time_limit, args.abandon, args.seed)
+    summary: Dict = asyncio.run(run_load(load_client, args.games, args.concurrency))
+    print(f"{summary['games']} games, {summary['abandoned']} abandoned, {summary['errors']} errors "
+          f"in {summary['elapsed']:.2f} seconds")
+    print(f"{summary['moves']} engine moves, {summary['moves_per_second']:.1f} moves/s")
+    print(f"Move latency: p50 {summary['p50_latency'] * 1000:.1f} ms, p99 {summary['p99_latency'] * 1000:.1f} ms, "
+          f"max {summary['max_latency'] * 1000:.1f} ms")
+    for error in sorted(set(load_client.errors)):
+        print(f'Error: {error}')
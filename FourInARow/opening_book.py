@@ -0,0 +1,206 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+import argparse
+import mmap
+import random
+import struct
+import time
+if TYPE_CHECKING:
+    from board import Board
+
+# File layout: a header followed by fixed size records sorted by key
+HEADER: struct.Struct = struct.Struct('<4sHHHI') # magic, width, height, game_n, number of records
+RECORD: struct.Struct = struct.Struct('<Qhi') # key, best move, score
+MAGIC: bytes = b'C4OB'
+
+
+@lru_cache(maxsize=None)
+def side_keys(width: int, height: int) -> Tuple[int, int, int]:
+    """Gets the keys that mark the player to move in a book key
+
+    Args:
+        width (int): width of the board
+        height (int): height of the board
+
+    Returns:
+        Tuple[int, int, int]: 64 bit key per player_id, index 0 is unused
+    """
+    rng: random.Random = random.Random(f'side-{width}x{height}')
+    return 0, rng.getrandbits(64), rng.getrandbits(64)
+
+
+def book_key(board: Board, player_id: int) -> int:
+    """Computes the key of a position in the book
+
+    Args:
+        board (Board): the position
+        player_id (int): player to move
+
+    Returns:
+        int: Zobrist hash of the position combined with the player to move
+    """
+    return board.hash_key ^ side_keys(board.width, board.height)[player_id]
+
+
+class OpeningBook:
+    """Read-only opening book, memory mapped so a lookup only touches the pages it needs
+    """
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): path of a book file written by build_book
+
+        Raises:
+            ValueError: if the file is not an opening book
+        """
+        self.path: str = path
+        self._file = open(path, 'rb')
+        self._map: mmap.mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.game_n, self.size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not an opening book')
+        self.hits: int = 0
+        self.misses: int = 0
+
+
+    def lookup(self, board: Board, player_id: int, game_n: int) -> Optional[Tuple[int, int]]:
+        """Looks up a position with a binary search over the records
+
+        Args:
+            board (Board): the position
+            player_id (int): player to move
+            game_n (int): n in a row required to win
+
+        Returns:
+            Optional[Tuple[int, int]]: best move and its score for the player to move,
+                or None if the position is not in the book
+        """
+        if (board.width, board.height, game_n) != (self.width, self.height, self.game_n):
+            return None
+
+        key: int = book_key(board, player_id)
+        low: int = 0
+        high: int = self.size
+        while low < high:
+            middle: int = (low + high) // 2
+            record_key, move, score = RECORD.unpack_from(self._map, HEADER.size + middle * RECORD.size)
+            if record_key == key:
+                self.hits += 1
+                return move, score
+            elif record_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        self.misses += 1
+        return None
+
+
+    def close(self) -> None:
+        """Closes the memory map and the file
+        """
+        self._map.close()
+        self._file.close()
+
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: number of positions in the book
+        """
+        return self.size
+
+
+def write_book(path: str, width: int, height: int, game_n: int, entries: Dict[int, Tuple[int, int]]) -> None:
+    """Writes book entries to a file, sorted by key
+
+    Args:
+        path (str): path of the book file
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+        entries (Dict[int, Tuple[int, int]]): best move and score per book key
+    """
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, width, height, game_n, len(entries)))
+        for key in sorted(entries):
+            file.write(RECORD.pack(key, *entries[key]))
+
+
+def build_book(width: int, height: int, game_n: int, max_ply: int, depth: int, heuristic_name: str = 'simple',
+               verbose: bool = True) -> Dict[int, Tuple[int, int]]:
+    """Searches every position up to a number of moves into the game with the AlphaBetaPlayer
+
+    Both players are considered as the first player, every position is searched once.
+
+    Args:
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+        max_ply (int): positions with up to this many discs are included
+        depth (int): search depth per position
+        heuristic_name (str, optional): heuristic of the search, simple or window. Defaults to 'simple'.
+        verbose (bool, optional): print the progress per ply. Defaults to True.
+
+    Returns:
+        Dict[int, Tuple[int, int]]: best move and score per book key
+    """
+    # imported here, so looking up moves doesn't need the search code
+    from board import BitBoard
+    from heuristics import Heuristic, SimpleHeuristic, WindowHeuristic
+    from ordering import KillerHistoryOrdering
+    from players import AlphaBetaPlayer
+    from transposition import TranspositionTable
+
+    heuristic: Heuristic = WindowHeuristic(game_n) if heuristic_name == 'window' else SimpleHeuristic(game_n)
+    # The table values are scores for the searching player, so every player needs its own table
+    players: Dict[int, AlphaBetaPlayer] = {player_id: AlphaBetaPlayer(player_id, game_n, depth, heuristic,
+                                                                      TranspositionTable(),
+                                                                      move_ordering=KillerHistoryOrdering())
+                                           for player_id in (1, 2)}
+    entries: Dict[int, Tuple[int, int]] = {}
+
+    # Breadth first, one ply at a time, positions that transpose are only expanded once
+    for first_player in (1, 2):
+        # The table key doesn't include the player to move, which differs between the two passes
+        for player in players.values():
+            player.transposition_table.clear()
+        board: BitBoard = BitBoard(width, height)
+        layer: List[List[int]] = [[]]
+        for ply in range(max_ply + 1):
+            start_time: float = time.time()
+            player_id: int = first_player if ply % 2 == 0 else 3 - first_player
+            next_layer: List[List[int]] = []
+            for moves in layer:
+                for i, col in enumerate(moves):
+                    board.play(col, first_player if i % 2 == 0 else 3 - first_player)
+                key: int = book_key(board, player_id)
+                if key not in entries and board.is_winning(game_n) == 0:
+                    best_move: int = players[player_id].search(board)
+                    entries[key] = (best_move, int(players[player_id].best_score))
+                    next_layer.extend(moves + [col] for col in range(width) if board.is_valid(col))
+                for col in reversed(moves):
+                    board.undo(col)
+            if verbose:
+                print(f'First player {first_player}, ply {ply}: {len(layer)} positions '
+                      f'in {time.time() - start_time:.1f} seconds, {len(entries)} book entries')
+            layer = next_layer
+    return entries
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Builds an opening book with the AlphaBetaPlayer')
+    parser.add_argument('output', help='path of the book file')
+    parser.add_argument('--ply', type=int, default=4, help='include positions with up to this many discs')
+    parser.add_argument('--depth', type=int, default=6, help='search depth per position')
+    parser.add_argument('--heuristic', choices=['simple', 'window'], default='simple')
+    parser.add_argument('--width', type=int, default=7)
+    parser.add_argument('--height', type=int, default=6)
+    parser.add_argument('--game-n', type=int, default=4)
+    args = parser.parse_args()
+
+    book_entries: Dict[int, Tuple[int, int]] = build_book(args.width, args.height, args.game_n, args.ply,
+                                                          args.depth, args.heuristic)
+    write_book(args.output, args.width, args.height, args.game_n, book_entries)
+    print(f'Wrote {len(book_entries)} positions to {args.output}')
@@ -0,0 +1,305 @@
+from __future__ import annotations
+from abc import abstractmethod
+from typing import Dict, List, Set, TYPE_CHECKING
+if TYPE_CHECKING:
+    from board import Board
+
+
+class MoveOrdering:
+    """Abstract class defining the order in which a search tries the moves of a node
+    Keeps statistics of the cutoffs, a good ordering finds most cutoffs with the first move
+    """
+    def __init__(self) -> None:
+        self.cutoffs: int = 0 # number of nodes where the search stopped early
+        self.first_move_cutoffs: int = 0 # number of those where the first move was enough
+
+
+    def order_moves(self, board: Board, ply: int, player_id: int, first_moves: List[int]) -> List[int]:
+        """Orders the columns of a node
+
+        Args:
+            board (Board): board of the node
+            ply (int): distance of the node from the root
+            player_id (int): player to move
+            first_moves (List[int]): moves that go before all others, like the hash move
+
+        Returns:
+            List[int]: all columns, in the order to search them
+        """
+        moves: List[int] = [move for move in first_moves]
+        for move in self._order(board, ply, player_id):
+            if move not in moves:
+                moves.append(move)
+        return moves
+
+
+    def record_cutoff(self, move: int, ply: int, depth: int, player_id: int, index: int) -> None:
+        """Registers that a move caused a cutoff
+
+        Args:
+            move (int): the move that caused the cutoff
+            ply (int): distance of the node from the root
+            depth (int): remaining depth of the node
+            player_id (int): player that made the move
+            index (int): position of the move in the order of the node
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        self._on_cutoff(move, ply, depth, player_id)
+
+
+    def new_search(self) -> None:
+        """Called before the search of a move starts
+        """
+        pass
+
+
+    def clear(self) -> None:
+        """Forgets what the ordering learned from earlier searches, the cutoff statistics are kept
+        """
+        pass
+
+
+    def __str__(self) -> str:
+        """
+        Returns:
+            str: name of the ordering and its cutoff statistics
+        """
+        rate: float = self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0
+        return f'{self._name()}, {self.cutoffs} cutoffs, {rate:.0%} by the first move'
+
+
+    def _on_cutoff(self, move: int, ply: int, depth: int, player_id: int) -> None:
+        """Lets an ordering learn from a cutoff
+
+        Args:
+            move (int): the move that caused the cutoff
+            ply (int): distance of the node from the root
+            depth (int): remaining depth of the node
+            player_id (int): player that made the move
+        """
+        pass
+
+
+    @abstractmethod
+    def _name(self) -> str:
+        """Abstract method for naming the ordering
+
+        Returns:
+            str: name of the ordering
+        """
+        pass
+
+
+    @abstractmethod
+    def _order(self, board: Board, ply: int, player_id: int) -> List[int]:
+        """Abstract method for ordering the columns of a node
+
+        Args:
+            board (Board): board of the node
+            ply (int): distance of the node from the root
+            player_id (int): player to move
+
+        Returns:
+            List[int]: all columns, in the order to search them
+        """
+        pass
+
+
+class StaticOrdering(MoveOrdering):
+    """Searches the columns from left to right
+    Inherits from MoveOrdering
+    """
+    def _name(self) -> str:
+        """
+        Returns:
+            str: the name of the ordering; Static
+        """
+        return 'Static'
+
+
+    def _order(self, board: Board, ply: int, player_id: int) -> List[int]:
+        """
+        Args:
+            board (Board): board of the node
+            ply (int): distance of the node from the root
+            player_id (int): player to move
+
+        Returns:
+            List[int]: all columns from left to right
+        """
+        return list(range(board.width))
+
+
+class CenterFirstOrdering(MoveOrdering):
+    """Searches the columns from the center outwards, central discs are part of the most lines
+    Inherits from MoveOrdering
+    """
+    def _name(self) -> str:
+        """
+        Returns:
+            str: the name of the ordering; CenterFirst
+        """
+        return 'CenterFirst'
+
+
+    def _order(self, board: Board, ply: int, player_id: int) -> List[int]:
+        """
+        Args:
+            board (Board): board of the node
+            ply (int): distance of the node from the root
+            player_id (int): player to move
+
+        Returns:
+            List[int]: all columns, closest to the center first
+        """
+        return sorted(range(board.width), key=lambda col: abs(2 * col - (board.width - 1)))
+
+
+class KillerHistoryOrdering(CenterFirstOrdering):
+    """Searches the killer moves of the ply first, then the other columns by their history score
+    Killer moves caused a cutoff in a sibling node, the history score of a column grows with every cutoff it causes.
+    Columns with equal history are searched from the center outwards.
+    Inherits from CenterFirstOrdering
+    """
+    def __init__(self, killer_slots: int = 2) -> None:
+        """
+        Args:
+            killer_slots (int, optional): number of killer moves kept per ply. Defaults to 2.
+        """
+        super().__init__()
+        self.killer_slots: int = killer_slots
+        self.killers: Dict[int, List[int]] = {} # most recent killer moves per ply
+        self.history: Dict[int, Dict[int, int]] = {1: {}, 2: {}} # history score per player id and column
+
+
+    def _name(self) -> str:
+        """
+        Returns:
+            str: the name of the ordering; KillerHistory
+        """
+        return 'KillerHistory'
+
+
+    def new_search(self) -> None:
+        """Forgets the killer moves and halves the history scores, so older searches count less
+        """
+        self.killers = {}
+        for scores in self.history.values():
+            for col in scores:
+                scores[col] //= 2
+
+
+    def clear(self) -> None:
+        """Forgets the killer moves and the history scores
+        """
+        self.killers = {}
+        self.history = {1: {}, 2: {}}
+
+
+    def _order(self, board: Board, ply: int, player_id: int) -> List[int]:
+        """
+        Args:
+            board (Board): board of the node
+            ply (int): distance of the node from the root
+            player_id (int): player to move
+
+        Returns:
+            List[int]: all columns, killer moves first and then by history score
+        """
+        scores: Dict[int, int] = self.history[player_id]
+        moves: List[int] = [move for move in self.killers.get(ply, []) if move < board.width]
+        # sorted is stable, so columns with the same score stay in center first order
+        for move in sorted(super()._order(board, ply, player_id), key=lambda col: -scores.get(col, 0)):
+            if move not in moves:
+                moves.append(move)
+        return moves
+
+
+    def _on_cutoff(self, move: int, ply: int, depth: int, player_id: int) -> None:
+        """Makes the move a killer of the ply and raises its history score
+
+        Args:
+            move (int): the move that caused the cutoff
+            ply (int): distance of the node from the root
+            depth (int): remaining depth of the node
+            player_id (int): player that made the move
+        """
+        killers: List[int] = self.killers.setdefault(ply, [])
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.killer_slots:]
+
+        scores: Dict[int, int] = self.history[player_id]
+        scores[move] = scores.get(move, 0) + depth * depth
+
+
+class CandidateMoves:
+    """Limits the moves of a node to the columns near the discs on the board
+
+    On a large board most columns are far away from every disc, searching them only widens the tree.
+    A field that completes a line of either player has a disc of that line right next to it,
+    so within a radius of 1 or more no column with an immediate threat is left out.
+    An empty board only has the center column(s) as candidates.
+    """
+    def __init__(self, radius: int = 2) -> None:
+        """
+        Args:
+            radius (int, optional): max distance in columns to the nearest column with a disc. Defaults to 2.
+
+        Raises:
+            ValueError: if the radius is smaller than 1, which would miss threats
+        """
+        if radius < 1:
+            raise ValueError(f'Invalid candidate radius {radius}, it must be at least 1')
+        self.radius: int = radius
+        self.nodes: int = 0 # number of nodes whose moves were limited
+        self.pruned: int = 0 # number of valid moves left out in those nodes
+
+
+    def columns(self, board: Board) -> Set[int]:
+        """
+        Args:
+            board (Board): board of the node
+
+        Returns:
+            Set[int]: the candidate columns, full columns included
+        """
+        occupied: List[int] = board.occupied_columns()
+        if not occupied:
+            return {(board.width - 1) // 2, board.width // 2}
+        candidates: Set[int] = set()
+        for col in occupied:
+            candidates.update(range(max(0, col - self.radius), min(board.width, col + self.radius + 1)))
+        return candidates
+
+
+    def filter(self, board: Board, moves: List[int]) -> List[int]:
+        """Keeps the ordered moves that are candidates, or all moves when none of the candidates can be played
+
+        Args:
+            board (Board): board of the node
+            moves (List[int]): the ordered columns of the node
+
+        Returns:
+            List[int]: the candidate columns, in the same order
+        """
+        candidates: Set[int] = self.columns(board)
+        if len(candidates) == board.width:
+            return moves
+        limited: List[int] = [move for move in moves if move in candidates]
+        if not any(board.is_valid(move) for move in limited):
+            return moves
+        self.nodes += 1
+        self.pruned += sum(1 for move in moves if move not in candidates and board.is_valid(move))
+        return limited
+
+
+    def __str__(self) -> str:
+        """
+        Returns:
+            str: the radius and the number of moves left out
+        """
+        return f'radius {self.radius}, {self.pruned} moves left out in {self.nodes} nodes'
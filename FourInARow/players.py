@@ -1,14 +1,28 @@
 from __future__ import annotations
 from abc import abstractmethod
+from array import array
 import numpy as np
-from typing import TYPE_CHECKING
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+import copy
+import math
+import random
+import threading
 import time
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from ordering import CandidateMoves, MoveOrdering, StaticOrdering
+from opening_book import OpeningBook
+from stats import SearchHook, SearchStats
+from solver import Solver, result
+from kernels import alphabeta, rollouts, seed_rollouts
+from heuristics import SimpleHeuristic
+from lines import WinningLines, winning_lines
+from tree import SearchTree
 if TYPE_CHECKING:
     from heuristics import Heuristic
     from board import Board
 #import psutil
 #import os
-import tracemalloc
 
 class PlayerController:
     """Abstract class defining a player
@@ -31,6 +45,19 @@ class PlayerController:
             int: The amount of times the heuristic was used to evaluate a board state
         """
         return self.heuristic.eval_count
+
+
+    def new_game(self) -> None:
+        """Forgets what the player learned from earlier searches,
+        called before a position that doesn't follow from the previous one
+        """
+        pass
+
+
+    def close(self) -> None:
+        """Releases what the player keeps between moves, called once the game is over
+        """
+        pass
     
 
     def __str__(self) -> str:
@@ -54,49 +81,140 @@ class PlayerController:
             int: column to play in
         """
         pass
-class Tree:
-    def __init__(self, root):
-        self.root = root
-
-class Node:
-    def __init__(self, board, player, move = None, parent = None):
-        self.board = board
-        self.player = player
-        self.move = move
-        self.children_nodes = []
-        self.parent = parent
-        self.evaluation = None
-        
-    def generate_node(self, depth, max_depth = 5):
-        valid_moves = []
-        if depth >= max_depth:
-            return
-        for i in range(self.board.width):
-            if self.board.is_valid(i):
-                valid_moves.append(i)
-        for move in valid_moves:
-            new_board = self.board.get_new_board(move, self.player)
-            new_player = 3 - self.player
-            child_node = Node(new_board, new_player, move = move, parent = self)
-            self.children_nodes.append(child_node)
-            child_node.generate_node(depth + 1, max_depth)
-            
-    
-class MinMaxPlayer(PlayerController):
-    """Class for the minmax player using the minmax algorithm
-    Inherits from Playercontroller
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when the time budget of the move is used up
     """
-    def __init__(self, player_id: int, game_n: int, depth: int, heuristic: Heuristic) -> None:
+    pass
+
+
+_worker_tables: Dict[int, TranspositionTable] = {} # transposition table of a pool process, per table size
+
+
+def _search_root_move(player: SearchPlayer, board: Board, move: int, depth: int, table_size: int,
+                      previous_pv: List[int], deadline: Optional[float]) -> Tuple:
+    """Searches a single root move, runs inside a process of the pool of a parallel search
+
+    Args:
+        player (SearchPlayer): copy of the searching player
+        board (Board): the root position
+        move (int): the root move to search
+        depth (int): depth of the search, including the root move
+        table_size (int): number of entries of the transposition table, 0 to search without one
+        previous_pv (List[int]): principal variation of the previous iteration
+        deadline (Optional[float]): time at which the search is aborted
+
+    Returns:
+        Tuple: the move, its score (None if the search ran out of time), the principal variation,
+            the number of nodes, heuristic evaluations, table hits, table misses, cutoffs and first move cutoffs,
+            and the elapsed time
+    """
+    start_time: float = time.time()
+    eval_count: int = player.heuristic.eval_count
+    cutoffs: int = player.move_ordering.cutoffs
+    first_move_cutoffs: int = player.move_ordering.first_move_cutoffs
+    if table_size > 0:
+        if table_size not in _worker_tables:
+            _worker_tables[table_size] = TranspositionTable(table_size * TranspositionTable.ENTRY_BYTES)
+        # Cleared for every task, so the result doesn't depend on which tasks this process ran before
+        player.transposition_table = _worker_tables[table_size]
+        player.transposition_table.clear()
+        player.transposition_table.new_search(player._root_discs)
+
+    player.node_count = 0
+    player._deadline = deadline
+    player._root_depth = depth
+    player._pv_table = {}
+    player._previous_pv = previous_pv
+    player._follow_pv = len(previous_pv) > 0 and previous_pv[0] == move
+
+    board.play(move, player.player_id)
+    score: Optional[float]
+    try:
+        _, score = player._search_root(board, depth - 1, False)
+    except SearchTimeout:
+        score = None
+
+    hits: int = 0 if player.transposition_table is None else player.transposition_table.hits
+    misses: int = 0 if player.transposition_table is None else player.transposition_table.misses
+    return (move, score, [move] + player._pv_table.get(1, []), player.node_count,
+            player.heuristic.eval_count - eval_count, hits, misses, player.move_ordering.cutoffs - cutoffs,
+            player.move_ordering.first_move_cutoffs - first_move_cutoffs, time.time() - start_time)
+
+
+class SearchPlayer(PlayerController):
+    """Abstract class for players that search the game tree up to a depth
+    Inherits from PlayerController
+    """
+    name: str = 'Search' # name used when reporting the search statistics
+
+    def __init__(self, player_id: int, game_n: int, depth: int, heuristic: Heuristic,
+                 transposition_table: Optional[TranspositionTable] = None,
+                 time_limit: Optional[float] = None, workers: int = 1,
+                 move_ordering: Optional[MoveOrdering] = None, opening_book: Optional[OpeningBook] = None,
+                 hooks: Optional[List[SearchHook]] = None, solver_threshold: int = 0,
+                 candidate_moves: Optional[CandidateMoves] = None, ponder: bool = False) -> None:
         """
         Args:
             player_id (int): id of a player, can take values 1 or 2 (0 = empty)
             game_n (int): n in a row required to win
             depth (int): the max search depth
             heuristic (Heuristic): heuristic used by the player
+            transposition_table (Optional[TranspositionTable], optional): table with the results
+                of positions that were already searched. Defaults to None.
+            time_limit (Optional[float], optional): time budget per move in seconds. When set, the search
+                deepens one ply at a time until the budget or the max depth is reached. Defaults to None.
+            workers (int, optional): number of processes that search the root moves in parallel,
+                1 searches in this process. Defaults to 1.
+            move_ordering (Optional[MoveOrdering], optional): order in which the moves of a node are searched,
+                after the principal variation and hash move. Defaults to StaticOrdering, left to right.
+            opening_book (Optional[OpeningBook], optional): book that is consulted before searching,
+                closed with the player. Defaults to None.
+            hooks (Optional[List[SearchHook]], optional): callbacks for instrumenting the search,
+                like memory tracing. Defaults to None.
+            solver_threshold (int, optional): once at most this many fields are empty, the position is solved
+                exactly instead of searched with the heuristic, 0 never solves. Defaults to 0.
+            candidate_moves (Optional[CandidateMoves], optional): limits the search to the columns near the discs,
+                for large boards. Defaults to None, all columns are searched.
+            ponder (bool, optional): after every move, keep searching the likely replies of the opponent
+                in a background thread until the next move, see ponder. Defaults to False.
         """
         super().__init__(player_id, game_n, heuristic)
         self.depth: int = depth
         self.node_count = 0  # Count how many nodes are evaluated
+        self.transposition_table: Optional[TranspositionTable] = transposition_table
+        self.time_limit: Optional[float] = time_limit
+        self.completed_depth: int = 0 # depth of the last completed search
+        self.best_score: float = 0 # score of the best move of the last completed search
+        self.principal_variation: List[int] = [] # expected line of play of the last completed search
+        self._deadline: Optional[float] = None
+        self._root_depth: int = 0
+        self._root_discs: int = 0 # number of discs of the root position
+        self._pv_table: Dict[int, List[int]] = {} # principal variation below each ply
+        self._previous_pv: List[int] = []
+        self._follow_pv: bool = False
+        self.workers: int = workers
+        self.worker_time: float = 0 # time spent by all workers on the last move, in seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.move_ordering: MoveOrdering = StaticOrdering() if move_ordering is None else move_ordering
+        self.opening_book: Optional[OpeningBook] = opening_book
+        self.book_move: bool = False # whether the last move came from the opening book
+        self.hooks: List[SearchHook] = [] if hooks is None else hooks
+        self.solver_threshold: int = solver_threshold
+        self.candidate_moves: Optional[CandidateMoves] = candidate_moves
+        self.pondering: bool = ponder
+        self.ponder_nodes: int = 0 # nodes searched while pondering before the last search
+        self.ponder_depth: int = 0 # depth the position of the last search was pondered to, 0 if it wasn't
+        self._ponder_thread: Optional[threading.Thread] = None
+        self._ponder_stop: bool = False
+        self._ponder_results: Dict[int, Tuple[int, int, float, List[int]]] = {} # best move, depth, score and
+                                                                                # principal variation per hash
+        self.solver: Optional[Solver] = None # created at the first solved position, keeps its table between moves
+        self.solved: bool = False # whether the last move was found by the solver
+        self._node_hooks: List[SearchHook] = [] # hooks that are called for every node
+        self._stop_hooks: List[SearchHook] = [] # hooks that are polled for stopping the search
+        self.stats: SearchStats = SearchStats() # statistics of the last search
 
     """
     def memory_usage(self):
@@ -106,8 +224,7 @@ class MinMaxPlayer(PlayerController):
     """
 
     def make_move(self, board: Board) -> int:
-        """
-        Gets the column for the player to play in
+        """Gets the column for the player to play in
 
         Args:
             board (Board): the current board
@@ -115,49 +232,614 @@ class MinMaxPlayer(PlayerController):
         Returns:
             int: column to play in
         """
-        # Makes the best move using the Minimax algorithm.
-        self.node_count = 0  # Reset before each move
-        total_memory_used = 0  # Initialize total memory used
-        # Start tracemalloc for memory tracking
-        tracemalloc.start()
-        #start_memory = self.memory_usage()
-        start_time = time.time()  # Start the timer
-        best_move = self.minimax(Node(board, self.player_id), self.depth, True)[0]
-        end_time = time.time() # End the timer
-        #end_memory = self.memory_usage()
-        current, peak = tracemalloc.get_traced_memory()  # Get memory usage
-        total_memory_used += peak  # Add peak memory used for this move to total
-        tracemalloc.stop()  # Stop tracemalloc
-        print(f"Minimax evaluated {self.node_count} nodes in {end_time - start_time} seconds")
-        #print(f"Memory used: {round(end_memory - start_memory, 5)} Bytes")
-        print(f"Memory usage of MinMax: {current / 1024:.2f} KB")
-        print(f"Total memory used: {total_memory_used / 1024:.2f} KB")
+        best_move = self.search(board)
+        print(f"{self.name} evaluated {self.stats.nodes} nodes in {self.stats.elapsed} seconds")
+        if self.book_move:
+            print("Move taken from the opening book")
+        if self.solved:
+            print(f"Solved exactly: {['loss', 'draw', 'win'][result(int(self.best_score)) + 1]}")
+        if self.stats.ponder_nodes > 0:
+            print(f"Pondered {self.stats.ponder_nodes} nodes, this position to depth {self.stats.ponder_depth}")
+        if self.time_limit is not None:
+            print(f"Completed search depth: {self.completed_depth}")
+        if self.workers > 1:
+            print(f"{self.workers} workers searched for {self.worker_time:.2f} seconds in total")
+        if self.transposition_table is not None:
+            print(f"Transposition table: {self.transposition_table}")
+        if self.move_ordering.cutoffs > 0:
+            print(f"Move ordering: {self.move_ordering}")
+        if self.candidate_moves is not None:
+            print(f"Candidate moves: {self.candidate_moves}")
+        if self.stats.peak_memory is not None:
+            print(f"Peak memory of {self.name}: {self.stats.peak_memory / 1024:.2f} KB")
         print ("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
+        if self.pondering:
+            next_board: Board = type(board)(board)
+            next_board.play(best_move, self.player_id)
+            if next_board.is_winning_last_move(self.game_n) == 0:
+                self.ponder(next_board)
+        return best_move
+
+
+    def search(self, board: Board) -> int:
+        """Searches for the best move and attaches the statistics of the search to self.stats
+        Stops pondering first, the search continues from the pondered result of the position if there is one
+
+        Args:
+            board (Board): the current board
+
+        Returns:
+            int: column to play in
+        """
+        self.stop_pondering()
+        eval_count: int = self.heuristic.eval_count
+        cutoffs: int = self.move_ordering.cutoffs
+        first_move_cutoffs: int = self.move_ordering.first_move_cutoffs
+        hits: int = 0 if self.transposition_table is None else self.transposition_table.hits
+        misses: int = 0 if self.transposition_table is None else self.transposition_table.misses
+        self.node_count = 0
+        self._node_hooks = [hook for hook in self.hooks if hook.traces_nodes]
+        self._stop_hooks = [hook for hook in self.hooks if hook.stops_search]
+        for hook in self.hooks:
+            hook.on_search_start(self, board)
+
+        start_time: float = time.perf_counter()
+        best_move: int = self._search(board)
+        stats: SearchStats = SearchStats()
+        stats.elapsed = time.perf_counter() - start_time
+        stats.nodes = self.node_count
+        stats.evaluations = self.heuristic.eval_count - eval_count
+        stats.cutoffs = self.move_ordering.cutoffs - cutoffs
+        stats.first_move_cutoffs = self.move_ordering.first_move_cutoffs - first_move_cutoffs
+        if self.transposition_table is not None:
+            stats.table_hits = self.transposition_table.hits - hits
+            stats.table_misses = self.transposition_table.misses - misses
+        stats.depth = self.completed_depth
+        stats.worker_time = self.worker_time
+        stats.book_move = self.book_move
+        stats.solved = self.solved
+        stats.ponder_nodes = self.ponder_nodes
+        stats.ponder_depth = self.ponder_depth
+
+        for hook in self.hooks:
+            hook.on_search_end(self, stats)
+        self._node_hooks = []
+        self._stop_hooks = []
+        self.stats = stats
         return best_move
+
+
+    def _search(self, board: Board) -> int:
+        """Searches for the best move, with a fixed depth or within the time budget
+
+        With a time budget the search is repeated with increasing depth.
+        Every iteration first follows the principal variation of the previous one,
+        and the best move of the deepest completed iteration is returned.
+
+        Args:
+            board (Board): the current board
+
+        Returns:
+            int: column to play in
+        """
+        self._previous_pv = self._reusable_pv(board)
+        self.worker_time = 0
+        self.move_ordering.new_search()
+        pondered: Optional[Tuple[int, int, float, List[int]]] = self._ponder_results.get(board.hash_key)
+        self._ponder_results = {}
+        self.ponder_depth = 0 if pondered is None else pondered[1]
+
+        # A book move needs no search
+        self.book_move = False
+        if self.opening_book is not None:
+            entry: Optional[Tuple[int, int]] = self.opening_book.lookup(board, self.player_id, self.game_n)
+            if entry is not None and board.is_valid(entry[0]):
+                self.book_move = True
+                self.completed_depth = 0
+                self.principal_variation = [entry[0]]
+                self.best_score = entry[1]
+                return entry[0]
+
+        # Close to the end of the game the exact solver is faster than the heuristic search
+        empty_fields: int = sum(1 for col in range(board.width) for row in range(board.height)
+                                if board.get_value(col, row) == 0)
+        self._root_discs = board.width * board.height - empty_fields
+        if self.transposition_table is not None:
+            self.transposition_table.new_search(self._root_discs)
+        self.solved = empty_fields <= self.solver_threshold
+        if self.solved:
+            return self._solve(board, empty_fields)
+
+        if self.time_limit is None:
+            self._deadline = None
+            if pondered is not None and pondered[1] >= self.depth:
+                return self._resume_pondered(pondered)
+            return self._search_depth(board, self.depth)
+
+        # Searching deeper than the amount of empty fields can't find anything new
+        start_time: float = time.time()
+        best_move: Optional[int] = None
+        first_depth: int = 1
+        if pondered is not None:
+            best_move = self._resume_pondered(pondered)
+            first_depth = pondered[1] + 1
+        for depth in range(first_depth, max(1, min(self.depth, empty_fields)) + 1):
+            # The first iteration always completes, so there is a move to return
+            self._deadline = None if best_move is None else start_time + self.time_limit
+            try:
+                best_move = self._search_depth(board, depth)
+            except SearchTimeout:
+                break
+            self._previous_pv = self.principal_variation
+        self._deadline = None
+        return best_move
+
+
+    def _resume_pondered(self, pondered: Tuple[int, int, float, List[int]]) -> int:
+        """Takes over the result of pondering a position, as if it was the last completed iteration
+
+        Args:
+            pondered (Tuple[int, int, float, List[int]]): best move, depth, score and principal variation
+
+        Returns:
+            int: the best move
+        """
+        best_move, self.completed_depth, self.best_score, self.principal_variation = pondered
+        self._previous_pv = self.principal_variation
+        return best_move
+
+
+    def ponder(self, board: Board) -> None:
+        """Starts searching the likely replies of the opponent in a background thread, until the next search
+
+        The opponent is to move on the board. The positions after its replies are searched with increasing depth,
+        at every depth the reply predicted by the principal variation first and then from the center outwards,
+        and the result of every completed search is kept. When the next search gets one of these positions,
+        it continues from the deepest completed depth. While the opponent thinks the main thread usually waits
+        without holding the GIL, for example in input(), so the thread gets the processor.
+
+        Args:
+            board (Board): position after the move of this player, copied
+        """
+        self.stop_pondering()
+        self._ponder_results = {}
+        self._ponder_stop = False
+        self._ponder_thread = threading.Thread(target=self._ponder, args=(type(board)(board),), daemon=True)
+        self._ponder_thread.start()
+
+
+    def stop_pondering(self) -> None:
+        """Stops the pondering thread, if it runs, and waits for it, the results it completed are kept
+        """
+        if self._ponder_thread is None:
+            return
+        self._ponder_stop = True
+        self._deadline = 0 # the search of the thread aborts at its next time check
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        self._deadline = None
+
+
+    def _ponder(self, board: Board) -> None:
+        """Searches the positions after the replies of the opponent, runs in the pondering thread
+        The results only go to _ponder_results, the result of the last real search stays as it is
+
+        Args:
+            board (Board): position after the move of this player
+        """
+        self.node_count = 0
+        self.ponder_nodes = 0
+        # A deadline that never passes, until stop_pondering moves it, which it does after setting _ponder_stop
+        self._deadline = math.inf
+        predicted: Optional[int] = self.principal_variation[1] if len(self.principal_variation) > 1 else None
+        positions: List[Board] = []
+        for reply in sorted((col for col in range(board.width) if board.is_valid(col)),
+                            key=lambda col: (col != predicted, abs(2 * col - (board.width - 1)))):
+            position: Board = board.get_new_board(reply, 3 - self.player_id)
+            if position.is_winning_last_move(self.game_n) == 0:
+                positions.append(position)
+        empty_fields: int = sum(1 for col in range(board.width) for row in range(board.height)
+                                if board.get_value(col, row) == 0) - 1
+        # The solver answers positions close to the end at once
+        if not positions or empty_fields <= self.solver_threshold:
+            return
+
+        self._root_discs = board.width * board.height - empty_fields
+        if self.transposition_table is not None:
+            self.transposition_table.new_search(self._root_discs)
+        self.move_ordering.new_search()
+        try:
+            # Every position is searched to a depth before any position is searched deeper
+            for depth in range(1, max(1, min(self.depth, empty_fields)) + 1):
+                for position in positions:
+                    if self._ponder_stop:
+                        return
+                    previous: Optional[Tuple[int, int, float, List[int]]] = self._ponder_results.get(position.hash_key)
+                    self._previous_pv = [] if previous is None else previous[3]
+                    best_move, best_score, principal_variation = self._search_once(position, depth)
+                    self._ponder_results[position.hash_key] = (best_move, depth, best_score, principal_variation)
+        except SearchTimeout:
+            pass
+        finally:
+            self.ponder_nodes = self.node_count
+
+
+    def new_game(self) -> None:
+        """Stops pondering and forgets the transposition table, the move ordering and the last principal variation,
+        so the next search doesn't depend on the earlier ones. The solver table and opening book are kept,
+        their results are exact.
+        """
+        self.stop_pondering()
+        self._ponder_results = {}
+        if self.transposition_table is not None:
+            self.transposition_table.clear()
+        self.move_ordering.clear()
+        self.principal_variation = []
+        self.best_score = 0
+
+
+    def _reusable_pv(self, board: Board) -> List[int]:
+        """Finds the part of the last principal variation that is still ahead,
+        after this player played its first move and the opponent replied with the second
+
+        Args:
+            board (Board): the current board
+
+        Returns:
+            List[int]: the rest of the principal variation, empty if the game took another line
+        """
+        played: List[int] = [col for col, _ in board.history[-2:]]
+        if len(played) == 2 and self.principal_variation[:2] == played:
+            return self.principal_variation[2:]
+        return []
+
+
+    def _solve(self, board: Board, empty_fields: int) -> int:
+        """Finds the best move with the exact solver, the best score becomes the score of the solver
+
+        Args:
+            board (Board): the current board
+            empty_fields (int): number of empty fields
+
+        Returns:
+            int: the move with the fastest win, or else a draw, or else the slowest loss
+        """
+        if self.solver is None:
+            self.solver = Solver(self.game_n)
+        node_count: int = self.solver.node_count
+        best_move, self.best_score = self.solver.best_move(board, self.player_id)
+        self.node_count += self.solver.node_count - node_count
+        self.completed_depth = empty_fields
+        self.principal_variation = [best_move]
+        return best_move
+
+
+    def _search_depth(self, board: Board, depth: int) -> int:
+        """Runs a single search from the root, its result becomes the result of the last completed search
+
+        Args:
+            board (Board): the current board
+            depth (int): depth of the search
+
+        Returns:
+            int: the best move found by the search
+        """
+        best_move, self.best_score, self.principal_variation = self._search_once(board, depth)
+        self.completed_depth = depth
+        return best_move
+
+
+    def _search_once(self, board: Board, depth: int) -> Tuple[Optional[int], float, List[int]]:
+        """Runs a single search from the root, without changing the result of the last completed search
+
+        Args:
+            board (Board): the current board
+            depth (int): depth of the search
+
+        Returns:
+            Tuple[Optional[int], float, List[int]]: the best move, its score and the principal variation
+        """
+        self._root_depth = depth
+        self._pv_table = {}
+        self._follow_pv = True
+        # The pondering thread searches without the pool, which belongs to the real searches
+        if self.workers > 1 and threading.current_thread() is not self._ponder_thread:
+            best_move, best_score = self._parallel_search_root(board, depth)
+        else:
+            # The whole search plays and takes back moves on a single copy of the board
+            best_move, best_score = self._search_root(type(board)(board), depth)
+        # A search that was answered by the transposition table at the root only knows the best move
+        return best_move, best_score, self._pv_table.get(0, []) or ([] if best_move is None else [best_move])
+
+
+    def _parallel_search_root(self, board: Board, depth: int) -> Tuple[Optional[int], float]:
+        """Searches every root move in a separate task of the process pool
+
+        Each task searches the position after one root move with a full window,
+        so the scores don't depend on the order in which the tasks finish.
+        Equal scores are resolved by the root move order, like the serial search does.
+
+        Args:
+            board (Board): the root position
+            depth (int): depth of the search
+
+        Raises:
+            SearchTimeout: if a task ran out of time
+
+        Returns:
+            Tuple[Optional[int], float]: best move and its score
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        # The tasks get a copy of this player without the pool and the table
+        template: SearchPlayer = copy.copy(self)
+        template.workers = 1
+        template._executor = None
+        template.transposition_table = None
+        template.opening_book = None
+        template.hooks = []
+        template.solver = None
+        template._node_hooks = []
+        template._stop_hooks = []
+        template._ponder_results = {}
+        table_size: int = 0 if self.transposition_table is None else self.transposition_table.size
+
+        self.node_count += 1 # the root
+        moves: List[int] = [move for move in self._order_moves(board, depth, self.player_id) if board.is_valid(move)]
+        futures: List[Future] = [self._executor.submit(_search_root_move, template, board, move, depth, table_size,
+                                                       self._previous_pv, self._deadline) for move in moves]
+
+        best_move: Optional[int] = None
+        best_score: float = -np.inf
+        timed_out: bool = False
+        for future in futures:
+            move, score, pv, node_count, eval_count, hits, misses, cutoffs, first_move_cutoffs, elapsed = future.result()
+            self.node_count += node_count
+            self.move_ordering.cutoffs += cutoffs
+            self.move_ordering.first_move_cutoffs += first_move_cutoffs
+            self.heuristic.eval_count += eval_count
+            self.worker_time += elapsed
+            if self.transposition_table is not None:
+                self.transposition_table.hits += hits
+                self.transposition_table.misses += misses
+            if score is None:
+                timed_out = True
+            elif score > best_score:
+                best_score = score
+                best_move = move
+                self._pv_table[0] = pv
+
+        if timed_out:
+            raise SearchTimeout()
+        return best_move, best_score
+
+
+    def close(self) -> None:
+        """Stops pondering, shuts down the process pool of a parallel search and closes the opening book
+        """
+        self.stop_pondering()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.opening_book is not None:
+            self.opening_book.close()
+            self.opening_book = None
+
+
+    @abstractmethod
+    def _search_root(self, board: Board, depth: int, is_maximizing: bool = True) -> Tuple[Optional[int], float]:
+        """Abstract method for searching the game tree below a position
+
+        Args:
+            board (Board): the root position, the search may modify it
+            depth (int): depth of the search
+            is_maximizing (bool, optional): whether this player is to move. Defaults to True.
+
+        Returns:
+            Tuple[Optional[int], float]: best move and its score
+        """
+        pass
+
+
+    def _trace_node(self, board: Board, depth: int) -> None:
+        """Passes a node on to the hooks that trace nodes
+
+        Args:
+            board (Board): board of the node
+            depth (int): remaining depth of the node
+        """
+        for hook in self._node_hooks:
+            hook.on_node(self, board, depth)
+
+
+    def _check_time(self) -> None:
+        """Aborts the search when the deadline of the move has passed or a hook stops it
+
+        Raises:
+            SearchTimeout: if the time budget is used up or a hook stopped the search
+        """
+        if self.node_count % 256 == 0:
+            if self._deadline is not None and time.time() > self._deadline:
+                raise SearchTimeout()
+            for hook in self._stop_hooks:
+                if hook.should_stop(self):
+                    raise SearchTimeout()
+
+
+    def _order_moves(self, board: Board, depth: int, mover_id: int, hash_move: Optional[int] = None) -> List[int]:
+        """Orders the moves of a node, the move of the previous principal variation and the hash move go first,
+        the move ordering of the player decides the order of the others, the candidate moves which of them are searched
+
+        Args:
+            board (Board): board of the node
+            depth (int): remaining depth of the node
+            mover_id (int): player to move
+            hash_move (Optional[int], optional): best move stored in the transposition table. Defaults to None.
+
+        Returns:
+            List[int]: the columns to search, in order
+        """
+        ply: int = self._root_depth - depth
+        first_moves: List[int] = []
+        if self._follow_pv and ply < len(self._previous_pv):
+            first_moves.append(self._previous_pv[ply])
+        else:
+            self._follow_pv = False
+        if hash_move is not None and hash_move not in first_moves:
+            first_moves.append(hash_move)
+        moves: List[int] = self.move_ordering.order_moves(board, ply, mover_id, first_moves)
+        if self.candidate_moves is not None:
+            moves = self.candidate_moves.filter(board, moves)
+        return moves
+
+
+    def _record_cutoff(self, move: int, depth: int, mover_id: int, index: int) -> None:
+        """Passes a cutoff on to the move ordering
+
+        Args:
+            move (int): the move that caused the cutoff
+            depth (int): remaining depth of the node
+            mover_id (int): player that made the move
+            index (int): position of the move among the searched moves of the node
+        """
+        self.move_ordering.record_cutoff(move, self._root_depth - depth, depth, mover_id, index)
+
+
+    def _search_frontier(self, board: Board, depth: int, moves: List[int], alpha: float, beta: float,
+                         is_maximizing: bool) -> Tuple[Optional[int], float]:
+        """Searches a node whose children are all leaves
+        The children are evaluated with a single batch call of the heuristic,
+        then visited in order like in the recursive search, stopping at a cutoff
+
+        Args:
+            board (Board): board of the node
+            depth (int): remaining depth of the node, 1
+            moves (List[int]): the ordered columns to search
+            alpha (float): best score the maximizing player is already assured of
+            beta (float): best score the minimizing player is already assured of
+            is_maximizing (bool): whether this player is to move
+
+        Returns:
+            Tuple[Optional[int], float]: best move and its score
+        """
+        mover_id: int = self.player_id if is_maximizing else 3 - self.player_id
+        valid_moves: List[int] = [move for move in moves if board.is_valid(move)]
+        scores: List[int] = self.heuristic.evaluate_moves(self.player_id, board, valid_moves, mover_id).tolist()
+        self._clear_pv(depth - 1)
+
+        best_score: float = -np.inf if is_maximizing else np.inf
+        best_move: Optional[int] = None
+        for index, (move, score) in enumerate(zip(valid_moves, scores)):
+            self.node_count += 1
+            if self._node_hooks:
+                board.play(move, mover_id)
+                self._trace_node(board, depth - 1)
+                board.undo(move)
+            if (score > best_score) if is_maximizing else (score < best_score):
+                best_score = score
+                best_move = move
+                self._update_pv(depth, move)
+            if is_maximizing:
+                alpha = max(alpha, best_score)
+            else:
+                beta = min(beta, best_score)
+            if beta <= alpha:
+                self._record_cutoff(move, depth, mover_id, index)
+                break
+        return best_move, best_score
+
+
+    def _clear_pv(self, depth: int) -> None:
+        """Clears the principal variation below a node, called when the node has no best move
+
+        Args:
+            depth (int): remaining depth of the node
+        """
+        self._pv_table[self._root_depth - depth] = []
+
+
+    def _update_pv(self, depth: int, move: int) -> None:
+        """Records a new best move of a node in the principal variation
+
+        Args:
+            depth (int): remaining depth of the node
+            move (int): the new best move
+        """
+        ply: int = self._root_depth - depth
+        self._pv_table[ply] = [move] + self._pv_table.get(ply + 1, [])
+        # Only the first child of a node on the principal variation is still on it
+        self._follow_pv = False
+
+    
+class MinMaxPlayer(SearchPlayer):
+    """Class for the minmax player using the minmax algorithm
+    Inherits from SearchPlayer
+    """
+    name: str = 'MinMax'
+
+    def _search_root(self, board: Board, depth: int, is_maximizing: bool = True) -> Tuple[Optional[int], float]:
+        """
+        Args:
+            board (Board): the root position, the search may modify it
+            depth (int): depth of the search
+            is_maximizing (bool, optional): whether this player is to move. Defaults to True.
+
+        Returns:
+            Tuple[Optional[int], float]: best move and its score
+        """
+        return self.minimax(board, depth, is_maximizing)
     
-    def minimax(self, node: Node, depth: int, is_maximizing: bool):
+    def minimax(self, board: Board, depth: int, is_maximizing: bool):
         
         self.node_count += 1  # Increment for each node
+        if self._node_hooks:
+            self._trace_node(board, depth)
+        self._check_time()
+
+        # Reuse the score if this position was already searched at least as deep
+        if self.transposition_table is not None:
+            entry = self.transposition_table.probe(board.hash_key)
+            if entry is not None and entry[0] >= depth and entry[1] == EXACT:
+                self._clear_pv(depth)
+                return (None if entry[3] < 0 else entry[3]), entry[2]
+
+        best_move, best_score = self._minimax(board, depth, is_maximizing)
+        if self.transposition_table is not None:
+            self.transposition_table.store(board.hash_key, depth, EXACT, best_score, best_move,
+                                           self._root_discs + self._root_depth - depth)
+        return best_move, best_score
+
+    def _minimax(self, board: Board, depth: int, is_maximizing: bool):
         
-        # Check for terminal node (win/loss or max depth reached)
-        if depth == 0 or node.board.is_winning(self.game_n):  # Lowercase board attribute
-            evaluation = self.heuristic.evaluate_board(self.player_id, node.board)
+        # Check for terminal node (win/loss or max depth reached), only the last played disc can have won
+        winner = board.is_winning_last_move(self.game_n)
+        if depth == 0 or winner != 0:
+            self._clear_pv(depth)
+            evaluation = self.heuristic.evaluate_board(self.player_id, board, winner)
             return None, evaluation  # No specific move at terminal, just return evaluation score
+
+        # All children are leaves, evaluate them together
+        if depth == 1:
+            mover_id = self.player_id if is_maximizing else 3 - self.player_id
+            return self._search_frontier(board, depth, self._order_moves(board, depth, mover_id), -np.inf, np.inf,
+                                         is_maximizing)
     
         if is_maximizing:
             best_score = -np.inf
             best_move = None
             # Loop through all valid moves
-            for move in range(node.board.width):
-                if node.board.is_valid(move):
-                    # Simulate the move by creating a new board state
-                    new_board = node.board.get_new_board(move, self.player_id)
+            for move in self._order_moves(board, depth, self.player_id):
+                # Simulate the move on the board, it is taken back after the recursive call
+                if board.play(move, self.player_id):
                     # Recursively call minimax for the opponent
-                    _, score = self.minimax(Node(new_board, self.player_id), depth - 1, False)  # Pass a new Node
+                    _, score = self.minimax(board, depth - 1, False)
+                    board.undo(move)
                     # Track the best score and the associated move
                     if score > best_score:
                         best_score = score
                         best_move = move
+                        self._update_pv(depth, move)
             return best_move, best_score
     
         else:
@@ -165,16 +847,17 @@ class MinMaxPlayer(PlayerController):
             best_score = np.inf
             best_move = None
             # Loop through all valid moves
-            for move in range(node.board.width):
-                if node.board.is_valid(move):
-                    # Simulate the opponent's move by creating a new board state
-                    new_board = node.board.get_new_board(move, opponent_id)
+            for move in self._order_moves(board, depth, opponent_id):
+                # Simulate the opponent's move on the board, it is taken back after the recursive call
+                if board.play(move, opponent_id):
                     # Recursively call minimax for the player's turn
-                    _, score = self.minimax(Node(new_board, opponent_id), depth - 1, True)  # Pass a new Node
+                    _, score = self.minimax(board, depth - 1, True)
+                    board.undo(move)
                     # Track the best (lowest) score and the associated move
                     if score < best_score:
                         best_score = score
                         best_move = move
+                        self._update_pv(depth, move)
             return best_move, best_score
     
     """
@@ -198,82 +881,341 @@ class MinMaxPlayer(PlayerController):
     """
 
 
-class AlphaBetaPlayer(PlayerController):
+class AlphaBetaPlayer(SearchPlayer):
     """Class for the minmax player using the minmax algorithm with alpha-beta pruning
-    Inherits from Playercontroller
+    Inherits from SearchPlayer
+
+    Besides plain alpha-beta, it can search with two negamax based modes that use null windows:
+    principal variation search (pvs) and MTD(f) (mtdf). Both rely on integer heuristic scores.
+    The compiled mode runs plain alpha-beta with the simple heuristic in a single compiled function,
+    see kernels.alphabeta.
     """
-    def __init__(self, player_id: int, game_n: int, depth: int, heuristic: Heuristic) -> None:
+    name: str = 'AlphaBeta'
+    SEARCH_MODES: Dict[str, str] = {'alphabeta': 'AlphaBeta', 'pvs': 'AlphaBeta-PVS', 'mtdf': 'AlphaBeta-MTD(f)',
+                                    'compiled': 'AlphaBeta-Compiled'}
+
+    def __init__(self, player_id: int, game_n: int, depth: int, heuristic: Heuristic, *args,
+                 search_mode: str = 'alphabeta', **kwargs) -> None:
         """
         Args:
             player_id (int): id of a player, can take values 1 or 2 (0 = empty)
             game_n (int): n in a row required to win
             depth (int): the max search depth
             heuristic (Heuristic): heuristic used by the player
+            search_mode (str, optional): alphabeta, pvs, mtdf or compiled. MTD(f) searches the same position
+                many times, so it gets a transposition table when none is given. The compiled search only supports
+                the simple heuristic and the static move ordering, without a transposition table, candidate moves
+                or hooks that trace nodes or stop the search. Defaults to 'alphabeta'.
+            The other arguments are passed on to SearchPlayer.
+
+        Raises:
+            ValueError: if the search mode is unknown, or the compiled search doesn't support an option
         """
-        super().__init__(player_id, game_n, heuristic)
-        self.depth: int = depth
-        self.node_count = 0
-        
-    """ 
-    def memory_usage(self):
-        process = psutil.Process(os.getpid())
-        memory_info = process.memory_info()
-        return memory_info.rss # Returns memory usage in Bytes
-    """
-    
-    def make_move(self, board: Board) -> int:
-        """Gets the column for the player to play in
+        super().__init__(player_id, game_n, depth, heuristic, *args, **kwargs)
+        if search_mode not in self.SEARCH_MODES:
+            raise ValueError(f'Unknown search mode {search_mode}, expected one of {", ".join(self.SEARCH_MODES)}')
+        self.search_mode: str = search_mode
+        self.name = self.SEARCH_MODES[search_mode]
+        if search_mode == 'mtdf' and self.transposition_table is None:
+            self.transposition_table = TranspositionTable()
+        if search_mode == 'compiled' and (not isinstance(heuristic, SimpleHeuristic)
+                                          or not isinstance(self.move_ordering, StaticOrdering)
+                                          or self.transposition_table is not None or self.candidate_moves is not None
+                                          or any(hook.traces_nodes or hook.stops_search for hook in self.hooks)):
+            raise ValueError('The compiled search only supports the simple heuristic and the static move ordering, '
+                             'without a transposition table, candidate moves or hooks that trace nodes '
+                             'or stop the search')
+        self._stop: np.ndarray = np.zeros(1, dtype=np.int8) # stop flag of the running compiled search
+
+
+    def _search_root(self, board: Board, depth: int, is_maximizing: bool = True) -> Tuple[Optional[int], float]:
+        """
+        Args:
+            board (Board): the root position, the search may modify it
+            depth (int): depth of the search
+            is_maximizing (bool, optional): whether this player is to move. Defaults to True.
+
+        Returns:
+            Tuple[Optional[int], float]: best move and its score
+        """
+        if self.search_mode == 'alphabeta':
+            return self.alphabetaprune(board, depth, -np.inf, np.inf, is_maximizing)
+        if self.search_mode == 'compiled':
+            return self.compiled_search(board, depth, is_maximizing)
+
+        # Negamax scores are seen from the player to move, the color turns them into scores of this player
+        color: int = 1 if is_maximizing else -1
+        if self.search_mode == 'mtdf':
+            return self.mtdf(board, depth, color * self.best_score, color)
+        best_move, best_score = self.negamax(board, depth, -np.inf, np.inf, color)
+        return best_move, color * best_score
+
+
+    def compiled_search(self, board: Board, depth: int, is_maximizing: bool) -> Tuple[Optional[int], float]:
+        """Searches with the compiled alpha-beta, which runs without the GIL
+        The deadline is enforced by a timer that sets the stop flag of the search
 
         Args:
-            board (Board): the current board
+            board (Board): the root position
+            depth (int): depth of the search
+            is_maximizing (bool): whether this player is to move
+
+        Raises:
+            SearchTimeout: if the time budget is used up
 
         Returns:
-            int: column to play in
+            Tuple[Optional[int], float]: best move and its score
         """
-        self.node_count = 0  # Reset before each move
-        total_memory_used = 0  # Initialize total memory used
-        start_time = time.time()  # Start the timer
-        tracemalloc.start()
-        #start_memory = self.memory_usage()
-        best_move = self.alphabetaprune(Node(board, self.player_id), self.depth, -np.inf, np.inf, True)[0]
-        end_time = time.time() # End the timer
-        #end_memory = self.memory_usage()
-        current, peak = tracemalloc.get_traced_memory()  # Get memory usage
-        total_memory_used += peak  # Add peak memory used for this move to total
-        tracemalloc.stop()  # Stop tracemalloc
-        print(f'AlphaBeta evaluated {self.node_count} nodes in {end_time - start_time} seconds')
-        #print(f"Memory used: {(end_memory - start_memory)} Bytes")
-        print(f"Memory usage of AlphaBeta: {current / 1024:.2f} KB")
-        print(f"Total memory used: {total_memory_used / 1024:.2f} KB")
-        print ("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-        return best_move
+        # A new flag per search, stop_pondering sets the flag of the search that runs
+        stop: np.ndarray = np.zeros(1, dtype=np.int8)
+        self._stop = stop
+        timer: Optional[threading.Timer] = None
+        if self._deadline is not None:
+            if time.time() > self._deadline:
+                raise SearchTimeout()
+            if self._deadline != math.inf:
+                timer = threading.Timer(self._deadline - time.time(), stop.fill, (1,))
+                timer.start()
+        mover_id: int = self.player_id if is_maximizing else 3 - self.player_id
+        line_index: WinningLines = winning_lines(board.width, board.height, self.game_n)
+        try:
+            best_move, best_score, pv, nodes, evaluations, aborted = alphabeta(
+                board.get_board_state(), self.player_id, mover_id, depth, line_index.lines, line_index.field_starts,
+                line_index.field_lines, board.is_winning_last_move(self.game_n), stop)
+        finally:
+            if timer is not None:
+                timer.cancel()
+        self.node_count += nodes
+        self.heuristic.eval_count += evaluations
+        if aborted:
+            raise SearchTimeout()
+        self._pv_table[self._root_depth - depth] = pv.tolist()
+        return (None if best_move < 0 else int(best_move)), int(best_score)
+
+
+    def stop_pondering(self) -> None:
+        """Stops the pondering thread like SearchPlayer.stop_pondering, and a compiled search it runs
+        """
+        if self._ponder_thread is not None:
+            self._deadline = 0
+            self._stop.fill(1)
+        super().stop_pondering()
+
+
+    def mtdf(self, board: Board, depth: int, guess: float, color: int) -> Tuple[Optional[int], float]:
+        """Finds the score with a series of null window searches that move a lower and an upper bound
+        towards each other, the transposition table keeps the work of the earlier searches
+
+        Args:
+            board (Board): the root position
+            depth (int): depth of the search
+            guess (float): first guess of the score, for the player to move, like the score of the last search
+            color (int): 1 if this player is to move, -1 otherwise
+
+        Returns:
+            Tuple[Optional[int], float]: best move and its score, for this player
+        """
+        score: float = guess
+        lower: float = -np.inf
+        upper: float = np.inf
+        best_move: Optional[int] = None
+        pv: List[int] = []
+        while lower < upper:
+            beta: float = max(score, lower + 1)
+            move, score = self.negamax(board, depth, beta - 1, beta, color)
+            if score < beta:
+                upper = score
+            else:
+                # Only a search that fails high proves its move reaches the score
+                lower = score
+                best_move = move
+                pv = self._pv_table.get(self._root_depth - depth, [])
+        self._pv_table[self._root_depth - depth] = pv
+        return best_move, color * score
+
+
+    def negamax(self, board: Board, depth: int, alpha: float, beta: float, color: int) -> Tuple[Optional[int], float]:
+        """Alpha-beta in negamax form, the scores and the window are seen from the player to move
+
+        Args:
+            board (Board): board of the node
+            depth (int): remaining depth of the node
+            alpha (float): score the player to move is already assured of
+            beta (float): score the opponent is already assured of
+            color (int): 1 if this player is to move, -1 otherwise
+
+        Returns:
+            Tuple[Optional[int], float]: best move and its score, for the player to move
+        """
+        self.node_count += 1
+        if self._node_hooks:
+            self._trace_node(board, depth)
+        self._check_time()
+
+        # The player to move follows from the position, so the stored scores are for the player to move as well
+        alpha_orig: float = alpha
+        hash_move: Optional[int] = None
+        if self.transposition_table is not None:
+            entry: Optional[Tuple[int, int, int, int]] = self.transposition_table.probe(board.hash_key)
+            if entry is not None:
+                entry_depth, flag, value, move = entry
+                hash_move = None if move < 0 else move
+                if entry_depth >= depth:
+                    if flag == EXACT:
+                        self._clear_pv(depth)
+                        return hash_move, value
+                    elif flag == LOWER:
+                        alpha = max(alpha, value)
+                    else:
+                        beta = min(beta, value)
+                    if beta <= alpha:
+                        self._clear_pv(depth)
+                        return hash_move, value
+
+        best_move, best_score = self._negamax(board, depth, alpha, beta, color, hash_move)
+
+        if self.transposition_table is not None:
+            if best_score <= alpha_orig:
+                flag = UPPER
+            elif best_score >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.transposition_table.store(board.hash_key, depth, flag, best_score, best_move,
+                                           self._root_discs + self._root_depth - depth)
+        return best_move, best_score
+
+
+    def _negamax(self, board: Board, depth: int, alpha: float, beta: float, color: int,
+                 hash_move: Optional[int] = None) -> Tuple[Optional[int], float]:
+        """Searches the children of a node, in principal variation search only the first child gets the full window
+
+        Args:
+            board (Board): board of the node
+            depth (int): remaining depth of the node
+            alpha (float): score the player to move is already assured of
+            beta (float): score the opponent is already assured of
+            color (int): 1 if this player is to move, -1 otherwise
+            hash_move (Optional[int], optional): best move stored in the transposition table. Defaults to None.
+
+        Returns:
+            Tuple[Optional[int], float]: best move and its score, for the player to move
+        """
+        winner: int = board.is_winning_last_move(self.game_n)
+        if depth == 0 or winner != 0:
+            self._clear_pv(depth)
+            return None, color * self.heuristic.evaluate_board(self.player_id, board, winner)
+
+        mover_id: int = self.player_id if color == 1 else 3 - self.player_id
+        moves: List[int] = [move for move in self._order_moves(board, depth, mover_id, hash_move)
+                            if board.is_valid(move)]
+
+        if depth == 1:  # All children are leaves, the frontier search works with scores of this player
+            if color == 1:
+                return self._search_frontier(board, depth, moves, alpha, beta, True)
+            best_move, best_score = self._search_frontier(board, depth, moves, -beta, -alpha, False)
+            return best_move, -best_score
+
+        best_score: float = -np.inf
+        best_move: Optional[int] = None
+        for index, move in enumerate(moves):
+            board.play(move, mover_id)
+            if index == 0 or self.search_mode != 'pvs':
+                score: float = -self.negamax(board, depth - 1, -beta, -alpha, -color)[1]
+            else:
+                # Try to prove the move is worse than the best one so far, search it again if it isn't
+                score = -self.negamax(board, depth - 1, -alpha - 1, -alpha, -color)[1]
+                if alpha < score < beta:
+                    score = -self.negamax(board, depth - 1, -beta, -alpha, -color)[1]
+            board.undo(move)
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                self._update_pv(depth, move)
+            alpha = max(alpha, score)
+
+            if alpha >= beta:
+                self._record_cutoff(move, depth, mover_id, index)
+                break
+        return best_move, best_score
     
-    def alphabetaprune(self, node: Node, depth: int, alpha: float, beta: float, is_maximizing: bool):
+    def alphabetaprune(self, board: Board, depth: int, alpha: float, beta: float, is_maximizing: bool):
         
         self.node_count += 1  # Increment for each node
-        
-        if depth == 0 or node.board.is_winning(self.game_n):  # Terminal node
-            evaluation = self.heuristic.evaluate_board(self.player_id, node.board)
+        if self._node_hooks:
+            self._trace_node(board, depth)
+        self._check_time()
+
+        # Narrow the window with the bound of an earlier search of this position
+        alpha_orig, beta_orig = alpha, beta
+        hash_move: Optional[int] = None
+        if self.transposition_table is not None:
+            entry = self.transposition_table.probe(board.hash_key)
+            if entry is not None:
+                entry_depth, flag, value, move = entry
+                hash_move = None if move < 0 else move
+                if entry_depth >= depth:
+                    if flag == EXACT:
+                        self._clear_pv(depth)
+                        return hash_move, value
+                    elif flag == LOWER:
+                        alpha = max(alpha, value)
+                    else:
+                        beta = min(beta, value)
+                    if beta <= alpha:
+                        self._clear_pv(depth)
+                        return hash_move, value
+
+        best_move, best_score = self._alphabetaprune(board, depth, alpha, beta, is_maximizing, hash_move)
+
+        if self.transposition_table is not None:
+            if best_score <= alpha_orig:
+                flag = UPPER
+            elif best_score >= beta_orig:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.transposition_table.store(board.hash_key, depth, flag, best_score, best_move,
+                                           self._root_discs + self._root_depth - depth)
+        return best_move, best_score
+
+    def _alphabetaprune(self, board: Board, depth: int, alpha: float, beta: float, is_maximizing: bool,
+                        hash_move: Optional[int] = None):
+
+        winner = board.is_winning_last_move(self.game_n)  # Only the last played disc can have won
+        if depth == 0 or winner != 0:  # Terminal node
+            self._clear_pv(depth)
+            evaluation = self.heuristic.evaluate_board(self.player_id, board, winner)
             return None, evaluation 
         
+        # Search the move of the previous principal variation and the best move of an earlier search first,
+        # then the others in the order of the move ordering
+        mover_id = self.player_id if is_maximizing else 3 - self.player_id
+        moves: List[int] = [move for move in self._order_moves(board, depth, mover_id, hash_move)
+                            if board.is_valid(move)]
+
+        if depth == 1:  # All children are leaves, evaluate them together
+            return self._search_frontier(board, depth, moves, alpha, beta, is_maximizing)
 
         if is_maximizing:
             best_score = -np.inf
             best_move = None
 
-            for move in range(node.board.width):
-                if node.board.is_valid(move):
+            for index, move in enumerate(moves):
+                board.play(move, self.player_id)
+                _, score = self.alphabetaprune(board, depth - 1, alpha, beta, False)
+                board.undo(move)
 
-                    new_board = node.board.get_new_board(move, self.player_id)
-                    _, score = self.alphabetaprune(Node(new_board, self.player_id), depth - 1, alpha, beta, False)
-
-                    if score > best_score:
-                        best_score = score
-                        best_move = move
-                    alpha = max(alpha, best_score)
-                    
-                    if beta <= alpha:
-                        break  
+                if score > best_score:
+                    best_score = score
+                    best_move = move
+                    self._update_pv(depth, move)
+                alpha = max(alpha, best_score)
+                
+                if beta <= alpha:
+                    self._record_cutoff(move, depth, self.player_id, index)
+                    break  
             return best_move, best_score
 
         else:  
@@ -281,22 +1223,275 @@ class AlphaBetaPlayer(PlayerController):
             best_score = np.inf
             best_move = None
 
-            for move in range(node.board.width):
-                if node.board.is_valid(move):
+            for index, move in enumerate(moves):
+                board.play(move, opponent_id)
+                _, score = self.alphabetaprune(board, depth - 1, alpha, beta, True)
+                board.undo(move)
 
-                    new_board = node.board.get_new_board(move, opponent_id)
-                    _, score = self.alphabetaprune(Node(new_board, opponent_id), depth - 1, alpha, beta, True)
+                if score < best_score:
+                    best_score = score
+                    best_move = move
+                    self._update_pv(depth, move)
+                beta = min(beta, best_score)
 
-                    if score < best_score:
-                        best_score = score
-                        best_move = move
-                    beta = min(beta, best_score)
-
-                    if beta <= alpha:
-                        break
+                if beta <= alpha:
+                    self._record_cutoff(move, depth, opponent_id, index)
+                    break
             return best_move, best_score
 
 
+def _mcts_root_task(player: MCTSPlayer, board: Board, playouts: int, deadline: Optional[float],
+                    seed: int) -> Tuple[Dict[int, Tuple[int, float]], int, int]:
+    """Grows an independent tree from the root, runs inside a process of the pool of a parallel search
+
+    Args:
+        player (MCTSPlayer): copy of the searching player
+        board (Board): the root position
+        playouts (int): playout budget of this task
+        deadline (Optional[float]): time at which the search stops
+        seed (int): seed of the random generators of this task
+
+    Returns:
+        Tuple[Dict[int, Tuple[int, float]], int, int]: visits and wins per root move, playouts and tree nodes
+    """
+    tree: SearchTree = player._grow_tree(board, playouts, deadline, seed)
+    return ({tree.move[child]: (tree.visits[child], tree.value[child]) for child in tree.children(0)},
+            player.playout_count, player.node_count)
+
+
+class MCTSPlayer(PlayerController):
+    """Class for the player using Monte-Carlo tree search with the UCT selection rule
+    Inherits from PlayerController
+
+    The tree is stored in a SearchTree. Every iteration visits one new node, from which a batch of random games
+    is played by the compiled rollouts. The move with the most visits is played.
+    """
+    name: str = 'MCTS' # name used when reporting the search statistics
+
+    def __init__(self, player_id: int, game_n: int, heuristic: Heuristic, playouts: int = 20000,
+                 time_limit: Optional[float] = None, exploration: float = 1.4, rollouts_per_leaf: int = 8,
+                 workers: int = 1, seed: Optional[int] = None, hooks: Optional[List[SearchHook]] = None) -> None:
+        """
+        Args:
+            player_id (int): id of a player, can take values 1 or 2 (0 = empty)
+            game_n (int): n in a row required to win
+            heuristic (Heuristic): heuristic of the player, not used by the search
+            playouts (int, optional): number of random games per move. Defaults to 20000.
+            time_limit (Optional[float], optional): time budget per move in seconds,
+                the search stops at the budget or the playouts, whichever comes first. Defaults to None.
+            exploration (float, optional): weight of the exploration term of UCT. Defaults to 1.4.
+            rollouts_per_leaf (int, optional): random games played from every new node in one batch. Defaults to 8.
+            workers (int, optional): number of processes that each grow their own tree from the root,
+                the visits of the root moves are added up. Defaults to 1.
+            seed (Optional[int], optional): seed of the random generators, for reproducible games. Defaults to None.
+            hooks (Optional[List[SearchHook]], optional): callbacks for instrumenting the search, on_node is never
+                called. In a parallel search only the time budget stops the workers. Defaults to None.
+        """
+        super().__init__(player_id, game_n, heuristic)
+        self.playouts: int = playouts
+        self.time_limit: Optional[float] = time_limit
+        self.exploration: float = exploration
+        self.rollouts_per_leaf: int = rollouts_per_leaf
+        self.workers: int = workers
+        self.seed: Optional[int] = seed
+        self._rng: random.Random = random.Random(seed)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.hooks: List[SearchHook] = [] if hooks is None else hooks
+        self.node_count: int = 0 # nodes in the tree of the last search
+        self.playout_count: int = 0 # random games of the last search
+        self.best_score: float = 0 # share of the playouts through the best move that it won, draws count half
+        self.stats: SearchStats = SearchStats() # statistics of the last search
+
+
+    def make_move(self, board: Board) -> int:
+        """Gets the column for the player to play in
+
+        Args:
+            board (Board): the current board
+
+        Returns:
+            int: column to play in
+        """
+        best_move: int = self.search(board)
+        print(f"{self.name} played {self.playout_count} playouts in {self.stats.elapsed} seconds")
+        print(f"Tree of {self.node_count} nodes")
+        if self.workers > 1:
+            print(f"{self.workers} workers searched for {self.stats.worker_time:.2f} seconds in total")
+        print ("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
+        return best_move
+
+
+    def search(self, board: Board) -> int:
+        """Searches for the best move and attaches the statistics of the search to self.stats
+
+        Args:
+            board (Board): the current board
+
+        Raises:
+            SearchTimeout: if a hook stopped the search before the first playout
+
+        Returns:
+            int: column to play in
+        """
+        for hook in self.hooks:
+            hook.on_search_start(self, board)
+        start_time: float = time.perf_counter()
+        deadline: Optional[float] = None if self.time_limit is None else time.time() + self.time_limit
+        seed: int = self._rng.getrandbits(31)
+        stats: SearchStats = SearchStats()
+
+        if self.workers > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            # The tasks get a copy of this player without the pool
+            template: MCTSPlayer = copy.copy(self)
+            template.workers = 1
+            template._executor = None
+            template.hooks = []
+            futures: List[Future] = [self._executor.submit(_mcts_root_task, template, board,
+                                                           -(-self.playouts // self.workers), deadline, seed + i)
+                                     for i in range(self.workers)]
+            visits: Dict[int, Tuple[int, float]] = {}
+            self.playout_count = 0
+            self.node_count = 0
+            for future in futures:
+                task_visits, playout_count, node_count = future.result()
+                for move, (move_visits, wins) in task_visits.items():
+                    total_visits, total_wins = visits.get(move, (0, 0))
+                    visits[move] = (total_visits + move_visits, total_wins + wins)
+                self.playout_count += playout_count
+                self.node_count += node_count
+            stats.worker_time = time.perf_counter() - start_time
+        else:
+            tree: SearchTree = self._grow_tree(board, self.playouts, deadline, seed)
+            visits = {tree.move[child]: (tree.visits[child], tree.value[child]) for child in tree.children(0)}
+
+        if not visits:
+            raise SearchTimeout()
+        # The most visited move is the most reliable one, the order of the columns breaks ties
+        best_move: int = max(sorted(visits), key=lambda move: visits[move][0])
+        self.best_score = visits[best_move][1] / visits[best_move][0] if visits[best_move][0] else 0
+        stats.elapsed = time.perf_counter() - start_time
+        stats.nodes = self.node_count
+        stats.evaluations = self.playout_count
+        for hook in self.hooks:
+            hook.on_search_end(self, stats)
+        self.stats = stats
+        return best_move
+
+
+    def new_game(self) -> None:
+        """Restarts the random generator from the seed,
+        so with a seed the next search doesn't depend on the earlier ones
+        """
+        self._rng = random.Random(self.seed)
+
+
+    def close(self) -> None:
+        """Shuts down the process pool of a parallel search
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+    def _grow_tree(self, board: Board, playouts: int, deadline: Optional[float], seed: int) -> SearchTree:
+        """Runs the iterations of the search: selection, expansion, a batch of playouts and backpropagation
+
+        A node is expanded the first time the search passes through it, its children are stored in random order
+        and visited in that order before UCT chooses between them.
+
+        Args:
+            board (Board): the root position
+            playouts (int): playout budget
+            deadline (Optional[float]): time at which the search stops
+            seed (int): seed of the random generators
+
+        Returns:
+            SearchTree: the tree
+        """
+        rng: random.Random = random.Random(seed)
+        seed_rollouts(seed)
+        board = type(board)(board) # played on and taken back during the search
+        tree: SearchTree = SearchTree(board, 3 - self.player_id)
+        visits: array = tree.visits
+        stop_hooks: List[SearchHook] = [hook for hook in self.hooks if hook.stops_search]
+        line_index: WinningLines = winning_lines(board.width, board.height, self.game_n)
+        self.playout_count = 0
+
+        while self.playout_count < playouts and (deadline is None or time.time() < deadline) \
+                and not any(hook.should_stop(self) for hook in stop_hooks):
+            # Selection, down to a child that wasn't visited yet or the end of the game
+            index: int = 0
+            path: List[int] = []
+            while tree.winner[index] == 0:
+                if not tree.is_expanded(index):
+                    moves: List[int] = [col for col in range(board.width) if board.is_valid(col)]
+                    rng.shuffle(moves)
+                    tree.expand(index, moves)
+                children: range = tree.children(index)
+                # The children are visited in order, so the last one is visited once all of them are
+                new_node: bool = visits[children.stop - 1] == 0
+                if new_node:
+                    index = next(child for child in children if visits[child] == 0)
+                else:
+                    index = self._select(tree, children)
+                board.play(tree.move[index], tree.mover[index])
+                path.append(tree.move[index])
+                if new_node:
+                    tree.winner[index] = board.is_winning_last_move(self.game_n)
+                    tree.hash_key[index] = board.hash_key
+                    break
+
+            # Playouts, a finished game has a known result
+            count: int = self.rollouts_per_leaf
+            mover: int = tree.mover[index]
+            winner: int = tree.winner[index]
+            if winner == 0:
+                wins: float = rollouts(board.get_board_state(), 3 - mover, mover, line_index.lines,
+                                       line_index.field_starts, line_index.field_lines, count)
+            else:
+                wins = count if winner == mover else count / 2 if winner < 0 else 0
+            self.playout_count += count
+
+            # Backpropagation, the result flips for the other player at every level
+            while index >= 0:
+                visits[index] += count
+                tree.value[index] += wins
+                wins = count - wins
+                index = tree.parent[index]
+            for move in reversed(path):
+                board.undo(move)
+        self.node_count = len(tree)
+        return tree
+
+
+    def _select(self, tree: SearchTree, children: range) -> int:
+        """Picks the child with the highest upper confidence bound
+
+        Args:
+            tree (SearchTree): the tree
+            children (range): the children of a node, all visited
+
+        Returns:
+            int: the selected child
+        """
+        values: array = tree.value
+        visits: array = tree.visits
+        sqrt = math.sqrt
+        exploration: float = self.exploration
+        log_visits: float = math.log(visits[tree.parent[children.start]])
+        best_child: int = children.start
+        best_bound: float = -math.inf
+        for child in children:
+            child_visits: int = visits[child]
+            bound: float = values[child] / child_visits + exploration * sqrt(log_visits / child_visits)
+            if bound > best_bound:
+                best_child = child
+                best_bound = bound
+        return best_child
+
+
 class HumanPlayer(PlayerController):
     """Class for the human player
     Inherits from Playercontroller
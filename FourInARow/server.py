@@ -0,0 +1,481 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import time
+from board import BitBoard
+from kernels import warm_up
+from players import SearchPlayer, SearchTimeout
+from stats import SearchHook
+from tournament import PlayerConfig
+
+
+DEFAULT_ENGINE: str = 'alphabeta:simple:42:tt,killer'
+MAX_BOARD_SIZE: int = 20 # max width and height of a game, bigger boards take too much memory and time per move
+
+# Cancel flag per search slot, shared with the workers by _init_worker
+_cancel_flags = None
+
+
+def _init_worker(flags) -> None:
+    """Runs once in every worker process, and warms up the kernels,
+    so the first move of a game doesn't pay for loading the numba functions
+
+    Args:
+        flags: shared array with the cancel flag of every search slot
+    """
+    global _cancel_flags
+    _cancel_flags = flags
+    warm_up()
+
+
+def _ready() -> bool:
+    """
+    Returns:
+        bool: True, once the worker has started
+    """
+    return True
+
+
+class CancelHook(SearchHook):
+    """Stops the search of a worker soon after the server raises the cancel flag of its slot
+    The flag is polled with the time budget, so the search keeps its batched leaf evaluations.
+    A search with a time budget then returns the best move of its deepest completed iteration,
+    a Monte-Carlo search the best move of its playouts so far.
+    Inherits from SearchHook
+    """
+    stops_search: bool = True
+
+    def __init__(self, slot: int) -> None:
+        """
+        Args:
+            slot (int): search slot of the search
+        """
+        self.slot: int = slot
+
+
+    def should_stop(self, player: SearchPlayer) -> bool:
+        """
+        Args:
+            player (SearchPlayer): the searching player
+
+        Returns:
+            bool: whether the search was cancelled
+        """
+        return _cancel_flags[self.slot] != 0
+
+
+def engine_move(spec: str, player_id: int, game_n: int, width: int, height: int, moves: List[int],
+                slot: int) -> Tuple[Optional[int], Dict]:
+    """Searches the move of an engine, runs in a worker process
+
+    Args:
+        spec (str): specification of the engine, like alphabeta:simple:42:tt,time=1
+        player_id (int): the player the engine plays
+        game_n (int): n in a row required to win
+        width (int): width of the board
+        height (int): height of the board
+        moves (List[int]): the moves of the game so far, player 1 moved first
+        slot (int): search slot, its cancel flag stops the search
+
+    Returns:
+        Tuple[Optional[int], Dict]: the move, None if the search was cancelled before it found one,
+            and the statistics of the search
+    """
+    board: BitBoard = BitBoard(width, height)
+    for i, col in enumerate(moves):
+        board.play(col, 1 + i % 2)
+    player = PlayerConfig(spec).create(player_id, game_n, [CancelHook(slot)])
+    try:
+        move: int = player.search(board)
+    except SearchTimeout:
+        return None, {}
+    finally:
+        player.close()
+    return move, player.stats.to_dict()
+
+
+def with_time_limit(spec: str, time_limit: float) -> str:
+    """Sets the time budget of a player specification, replacing the one it may have
+
+    Args:
+        spec (str): player:heuristic:depth[:options]
+        time_limit (float): time budget per move in seconds
+
+    Returns:
+        str: the specification with the time option
+    """
+    parts: List[str] = spec.split(':')
+    options: List[str] = [option for option in (parts[3].split(',') if len(parts) > 3 else [])
+                          if not option.startswith('time=')]
+    return ':'.join(parts[:3] + [','.join(options + [f'time={time_limit}'])])
+
+
+class Game:
+    """A game between a client and an engine hosted by the server
+    """
+    def __init__(self, game_id: int, width: int, height: int, game_n: int, engine: str, engine_id: int,
+                 time_limit: float) -> None:
+        """
+        Args:
+            game_id (int): id of the game
+            width (int): width of the board
+            height (int): height of the board
+            game_n (int): n in a row required to win
+            engine (str): specification of the engine, with a time budget
+            engine_id (int): the player the engine plays, 1 moves first
+            time_limit (float): time budget of the engine per move in seconds
+        """
+        self.game_id: int = game_id
+        self.game_n: int = game_n
+        self.engine: str = engine
+        self.engine_id: int = engine_id
+        self.time_limit: float = time_limit
+        self.board: BitBoard = BitBoard(width, height)
+        self.moves: List[int] = []
+        self.winner: int = 0 # 1 or 2 for a win, -1 for a draw, 0 while the game goes on
+
+
+    def to_move(self) -> int:
+        """
+        Returns:
+            int: the player to move
+        """
+        return 1 + len(self.moves) % 2
+
+
+    def play(self, col: int) -> None:
+        """Plays a move of the player to move
+
+        Args:
+            col (int): column of the move
+
+        Raises:
+            ValueError: if the game is over or the move is not valid
+        """
+        if self.winner != 0:
+            raise ValueError(f'Game {self.game_id} is over')
+        if not 0 <= col < self.board.width or not self.board.is_valid(col):
+            raise ValueError(f'Invalid move {col} in game {self.game_id}')
+        self.board.play(col, self.to_move())
+        self.moves.append(col)
+        self.winner = self.board.is_winning_last_move(self.game_n)
+
+
+class GameServer:
+    """Hosts many concurrent games of clients against engines, speaking JSON lines over TCP or a Unix socket
+
+    Every request is a JSON object on one line with an op, and gets one JSON line as response:
+    - {"op": "new", "width": 7, "height": 6, "game_n": 4, "engine": "alphabeta:simple:42:tt",
+      "engine_id": 2, "time_limit": 1.0} starts a game, all fields are optional.
+      When the engine moves first, the response contains its move.
+    - {"op": "move", "game": 1, "col": 3} plays a move and answers with the move of the engine.
+    - {"op": "close", "game": 1} ends a game.
+    - {"op": "stats"} returns the counters of the server.
+    A response has "ok": true, or "ok": false with an "error".
+
+    The engine searches run in a bounded process pool. At most max_pending searches are submitted at a time,
+    further moves wait, and a connection whose requests queue up isn't read from, which slows its client down.
+    Every search gets the time budget of its game, and is stopped once it runs past the budget and the grace period,
+    counted from its submission, so with more pending searches than workers the waiting time counts as well.
+    A game belongs to its connection: when the client disconnects, its games are dropped
+    and their searches are cancelled.
+    """
+    def __init__(self, workers: int = 2, max_games: int = 1000, max_pending: Optional[int] = None,
+                 time_limit: float = 1.0, grace: float = 1.0, engine: str = DEFAULT_ENGINE,
+                 queue_size: int = 4) -> None:
+        """
+        Args:
+            workers (int, optional): number of search processes. Defaults to 2.
+            max_games (int, optional): number of games hosted at once, further games are refused. Defaults to 1000.
+            max_pending (Optional[int], optional): number of searches submitted to the pool at once.
+                Defaults to the number of workers.
+            time_limit (float, optional): default and max time budget per engine move in seconds. Defaults to 1.0.
+            grace (float, optional): time a search may run past its budget before it is stopped. Defaults to 1.0.
+            engine (str, optional): engine of games that don't choose one. Defaults to DEFAULT_ENGINE.
+            queue_size (int, optional): number of requests read ahead per connection. Defaults to 4.
+        """
+        self.workers: int = workers
+        self.max_games: int = max_games
+        self.max_pending: int = workers if max_pending is None else max_pending
+        self.time_limit: float = time_limit
+        self.grace: float = grace
+        self.engine: str = engine
+        self.queue_size: int = queue_size
+        self.games: Dict[int, Game] = {}
+        self.moves: int = 0 # engine moves played
+        self.cancelled: int = 0 # searches cancelled because their game was abandoned
+        self.timeouts: int = 0 # searches stopped after their budget and the grace period
+        self._game_ids = itertools.count(1)
+        self._flags = multiprocessing.RawArray('b', self.max_pending)
+        self._free_slots: List[int] = list(range(self.max_pending))
+        self._pending: Optional[asyncio.Semaphore] = None # created in the event loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: ProcessPoolExecutor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                                                  initargs=(self._flags,))
+
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765, path: Optional[str] = None) -> asyncio.AbstractServer:
+        """Starts the workers and then listens, on a Unix socket when a path is given and otherwise on TCP
+
+        Args:
+            host (str, optional): TCP host. Defaults to '127.0.0.1'.
+            port (int, optional): TCP port, 0 picks a free port. Defaults to 8765.
+            path (Optional[str], optional): path of the Unix socket. Defaults to None.
+
+        Returns:
+            asyncio.AbstractServer: the listening server
+        """
+        self._loop = asyncio.get_running_loop()
+        self._pending = asyncio.Semaphore(self.max_pending)
+        await asyncio.gather(*(self._loop.run_in_executor(self._executor, _ready) for _ in range(self.workers)))
+        if path is not None:
+            return await asyncio.start_unix_server(self._handle, path=path)
+        return await asyncio.start_server(self._handle, host, port)
+
+
+    def close(self) -> None:
+        """Stops all searches and shuts the process pool down
+        """
+        for slot in range(self.max_pending):
+            self._flags[slot] = 1
+        self._executor.shutdown(cancel_futures=True)
+
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            Dict: the counters of the server
+        """
+        return {'games': len(self.games), 'moves': self.moves, 'pending': self.max_pending - len(self._free_slots),
+                'cancelled': self.cancelled, 'timeouts': self.timeouts}
+
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves a connection until the client disconnects
+        Reading and answering run in separate tasks, so a disconnect is noticed while a search is running
+
+        Args:
+            reader (asyncio.StreamReader): the requests of the client
+            writer (asyncio.StreamWriter): the responses to the client
+        """
+        requests: asyncio.Queue = asyncio.Queue(self.queue_size)
+        owned: Set[int] = set() # games of the connection
+        answering: asyncio.Task = asyncio.create_task(self._answer(requests, writer, owned))
+        try:
+            while not answering.done():
+                line: bytes = await reader.readline()
+                if not line:
+                    break
+                # Blocks while the queue is full, so the client is not read from until it catches up
+                await requests.put(line)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            answering.cancel()
+            for game_id in owned:
+                self.games.pop(game_id, None)
+            writer.close()
+
+
+    async def _answer(self, requests: asyncio.Queue, writer: asyncio.StreamWriter, owned: Set[int]) -> None:
+        """Answers the requests of a connection in order
+
+        Args:
+            requests (asyncio.Queue): lines read from the connection
+            writer (asyncio.StreamWriter): the responses to the client
+            owned (Set[int]): the games of the connection
+        """
+        while True:
+            line: bytes = await requests.get()
+            try:
+                request: Dict = json.loads(line)
+                response: Dict = await self.handle_request(request, owned)
+            except (ValueError, KeyError, TypeError, AttributeError) as error:
+                response = {'ok': False, 'error': str(error)}
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+
+    async def handle_request(self, request: Dict, owned: Set[int]) -> Dict:
+        """
+        Args:
+            request (Dict): the request
+            owned (Set[int]): the games of the connection, new games are added
+
+        Raises:
+            ValueError: if the request is not valid
+            KeyError: if a required field is missing
+
+        Returns:
+            Dict: the response
+        """
+        op: str = request.get('op')
+        if op == 'stats':
+            return {'ok': True, **self.stats()}
+        if op == 'new':
+            return await self._new_game(request, owned)
+
+        game_id: int = int(request['game'])
+        if game_id not in owned:
+            raise ValueError(f'Unknown game {game_id}')
+        game: Game = self.games[game_id]
+        if op == 'close':
+            owned.discard(game_id)
+            del self.games[game_id]
+            return {'ok': True, 'game': game_id}
+        if op == 'move':
+            if game.to_move() == game.engine_id:
+                raise ValueError(f'Not your turn in game {game_id}')
+            game.play(int(request['col']))
+            response: Dict = {'ok': True, 'game': game_id, 'winner': game.winner}
+            if game.winner == 0:
+                response.update(await self._engine_turn(game))
+            return response
+        raise ValueError(f'Unknown op {op}')
+
+
+    async def _new_game(self, request: Dict, owned: Set[int]) -> Dict:
+        """
+        Args:
+            request (Dict): the new request
+            owned (Set[int]): the games of the connection
+
+        Raises:
+            ValueError: if the server is full or the game is not valid
+
+        Returns:
+            Dict: the response with the id of the game
+        """
+        if len(self.games) >= self.max_games:
+            raise ValueError(f'The server hosts {self.max_games} games already')
+        width: int = int(request.get('width', 7))
+        height: int = int(request.get('height', 6))
+        game_n: int = int(request.get('game_n', 4))
+        engine_id: int = int(request.get('engine_id', 2))
+        time_limit: float = min(float(request.get('time_limit', self.time_limit)), self.time_limit)
+        if not (1 <= width <= MAX_BOARD_SIZE and 1 <= height <= MAX_BOARD_SIZE):
+            raise ValueError(f'Invalid board size {width}x{height}, at most {MAX_BOARD_SIZE}x{MAX_BOARD_SIZE}')
+        if not 1 <= game_n <= max(width, height):
+            raise ValueError(f'Invalid game_n {game_n}, a {width}x{height} board fits at most {max(width, height)}')
+        if engine_id not in (1, 2) or time_limit <= 0:
+            raise ValueError('Invalid game')
+        engine: str = with_time_limit(request.get('engine', self.engine), time_limit)
+        if PlayerConfig(engine).search_mode == 'compiled': # raises a ValueError for an invalid specification
+            raise ValueError('Compiled engines can not be cancelled, the server does not host them')
+
+        game: Game = Game(next(self._game_ids), width, height, game_n, engine, engine_id, time_limit)
+        self.games[game.game_id] = game
+        owned.add(game.game_id)
+        response: Dict = {'ok': True, 'game': game.game_id}
+        if engine_id == 1:
+            response.update(await self._engine_turn(game))
+        return response
+
+
+    async def _engine_turn(self, game: Game) -> Dict:
+        """Lets the engine of a game move
+
+        Args:
+            game (Game): the game, with the engine to move
+
+        Raises:
+            ValueError: if the search was stopped before it found a move
+
+        Returns:
+            Dict: the move of the engine, the winner after it and the latency of the move in seconds
+        """
+        start_time: float = time.perf_counter()
+        move, stats = await self._search(game)
+        if move is None:
+            raise ValueError(f'The engine of game {game.game_id} found no move in time')
+        if self.games.get(game.game_id) is game: # the game may have been closed in the meantime
+            game.play(move)
+            self.moves += 1
+        return {'engine_col': move, 'winner': game.winner, 'nodes': stats.get('nodes', 0),
+                'latency': time.perf_counter() - start_time}
+
+
+    async def _search(self, game: Game) -> Tuple[Optional[int], Dict]:
+        """Runs the search of an engine move in the process pool
+
+        A slot and its cancel flag are held until the worker is done with the search,
+        even when the game is abandoned, so a flag is never reused by a search that is still running.
+
+        Args:
+            game (Game): the game, with the engine to move
+
+        Returns:
+            Tuple[Optional[int], Dict]: the move, None if the search was stopped before it found one,
+                and the statistics of the search
+        """
+        await self._pending.acquire()
+        slot: int = self._free_slots.pop()
+        self._flags[slot] = 0
+        future: Future = self._executor.submit(engine_move, game.engine, game.engine_id, game.game_n,
+                                               game.board.width, game.board.height, list(game.moves), slot)
+        future.add_done_callback(lambda _: self._loop.call_soon_threadsafe(self._release, slot))
+        waiting: asyncio.Future = asyncio.wrap_future(future)
+        try:
+            done, _ = await asyncio.wait({waiting}, timeout=game.time_limit + self.grace)
+            if not done:
+                self._flags[slot] = 1
+                self.timeouts += 1
+            return await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            self._flags[slot] = 1
+            future.cancel() # only succeeds when the search didn't start yet
+            self.cancelled += 1
+            raise
+
+
+    def _release(self, slot: int) -> None:
+        """Frees the slot of a search the worker is done with
+
+        Args:
+            slot (int): the search slot
+        """
+        self._free_slots.append(slot)
+        self._pending.release()
+
+
+async def serve(server: GameServer, host: str, port: int, path: Optional[str]) -> None:
+    """Runs the server until it is interrupted
+
+    Args:
+        server (GameServer): the game server
+        host (str): TCP host
+        port (int): TCP port
+        path (Optional[str]): path of the Unix socket, replaces TCP when set
+    """
+    listener: asyncio.AbstractServer = await server.start(host, port, path)
+    print(f"Serving on {path or f'{host}:{port}'} with {server.workers} workers")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hosts many concurrent engine games over JSON lines')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on this Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--max-games', type=int, default=1000)
+    parser.add_argument('--max-pending', type=int, help='searches submitted at once, default the number of workers')
+    parser.add_argument('--time-limit', type=float, default=1.0, help='default and max seconds per engine move')
+    parser.add_argument('--grace', type=float, default=1.0, help='seconds a search may overrun before it is stopped')
+    parser.add_argument('--engine', default=DEFAULT_ENGINE, help='default engine, player:heuristic:depth[:options]')
+    args = parser.parse_args()
+
+    game_server: GameServer = GameServer(args.workers, args.max_games, args.max_pending, args.time_limit,
+                                         args.grace, args.engine)
+    try:
+        asyncio.run(serve(game_server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
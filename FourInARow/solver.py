@@ -0,0 +1,316 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+if TYPE_CHECKING:
+    from board import Board
+
+
+# Results of a solved position, for the player to move
+WIN: int = 1
+DRAW: int = 0
+LOSS: int = -1
+
+
+class SolverTable:
+    """Table with the bounds of the solved positions, indexed by the compact encoding of the position
+
+    The encoding is exact, so unlike the transposition table of the search an entry can't belong to another position.
+    When the table is full it is emptied, the next solves fill it again.
+    """
+    def __init__(self, max_entries: int = 1 << 20) -> None:
+        """
+        Args:
+            max_entries (int, optional): number of positions after which the table is emptied. Defaults to 2^20.
+        """
+        self.max_entries: int = max_entries
+        self.bounds: Dict[int, Tuple[int, int]] = {} # lower and upper bound of the score per position
+        self.hits: int = 0
+        self.misses: int = 0
+
+
+    def probe(self, key: int) -> Optional[Tuple[int, int]]:
+        """
+        Args:
+            key (int): encoding of the position
+
+        Returns:
+            Optional[Tuple[int, int]]: lower and upper bound of the score, or None if the position is not in the table
+        """
+        bounds: Optional[Tuple[int, int]] = self.bounds.get(key)
+        if bounds is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return bounds
+
+
+    def store(self, key: int, lower: int, upper: int) -> None:
+        """
+        Args:
+            key (int): encoding of the position
+            lower (int): lower bound of the score
+            upper (int): upper bound of the score
+        """
+        if len(self.bounds) >= self.max_entries and key not in self.bounds:
+            self.bounds.clear()
+        self.bounds[key] = (lower, upper)
+
+
+    def clear(self) -> None:
+        """Removes all entries and resets the statistics
+        """
+        self.bounds.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: number of positions in the table
+        """
+        return len(self.bounds)
+
+
+class Solver:
+    """Exact solver for n in a row positions
+
+    A position is encoded as two integers in the BitBoard layout: the discs of the player to move and all discs.
+    The score of a position is for the player to move: 0 for a draw, positive for a win and negative for a loss.
+    A win scores (e + 1) // 2, where e is the number of empty fields before the winning move,
+    so faster wins score higher and slower losses score higher.
+
+    The search is negamax with alpha-beta pruning and threat-aware pruning: a winning move is played at once,
+    a single threat of the opponent must be blocked, two threats or only moves below a threat lose,
+    and the score is bounded by the number of empty fields.
+    """
+    def __init__(self, game_n: int, table: Optional[SolverTable] = None) -> None:
+        """
+        Args:
+            game_n (int): n in a row required to win
+            table (Optional[SolverTable], optional): table with the solved positions. Defaults to a new table.
+        """
+        self.game_n: int = game_n
+        self.table: SolverTable = SolverTable() if table is None else table
+        self.node_count: int = 0
+        self._size: Tuple[int, int] = (0, 0) # board size the masks below were computed for
+        self._board_mask: int = 0 # all fields of the board
+        self._bottom_mask: int = 0 # the bottom field of every column
+        self._column_masks: List[int] = []
+        self._order: List[int] = [] # columns from the center outwards
+        self._windows: List[List[int]] = [] # for every direction and position of a field within a line, the offsets of the other fields
+
+
+    def _prepare(self, width: int, height: int) -> None:
+        """Computes the masks of a board size
+
+        Args:
+            width (int): width of the board
+            height (int): height of the board
+        """
+        if self._size == (width, height):
+            return
+        # The same encoding means another position on another board size
+        self.table.clear()
+        self._size = (width, height)
+        column: int = (1 << height) - 1
+        self._column_masks = [column << (col * (height + 1)) for col in range(width)]
+        self._board_mask = sum(self._column_masks)
+        self._bottom_mask = sum(1 << (col * (height + 1)) for col in range(width))
+        self._order = sorted(range(width), key=lambda col: abs(2 * col - (width - 1)))
+        self._windows = [[(i - j) * shift for i in range(self.game_n) if i != j]
+                         for shift in (1, height, height + 1, height + 2) for j in range(self.game_n)]
+
+
+    def encode(self, board: Board, player_id: int) -> Tuple[int, int, int]:
+        """Encodes a position in the layout of a BitBoard
+
+        Args:
+            board (Board): the position, a Board or a BitBoard
+            player_id (int): player to move
+
+        Returns:
+            Tuple[int, int, int]: the discs of the player to move, all discs and the number of empty fields
+        """
+        from board import BitBoard # board imports the players, which import the solver
+        bitboard: BitBoard = board if isinstance(board, BitBoard) else BitBoard(board)
+        self._prepare(bitboard.width, bitboard.height)
+        return (bitboard.masks[player_id], bitboard.masks[1] | bitboard.masks[2],
+                bitboard.width * bitboard.height - sum(bitboard.heights))
+
+
+    def solve(self, board: Board, player_id: int, weak: bool = False) -> int:
+        """Solves a position that isn't over yet
+
+        Args:
+            board (Board): the position
+            player_id (int): player to move
+            weak (bool, optional): only find out whether the position is a win, draw or loss,
+                which is faster. Defaults to False.
+
+        Returns:
+            int: the score of the position for the player to move, WIN, DRAW or LOSS when weak
+        """
+        current, mask, empty = self.encode(board, player_id)
+        if weak:
+            return result(self._negamax(current, mask, empty, -1, 1))
+        return self._negamax(current, mask, empty, -(empty // 2), (empty + 1) // 2)
+
+
+    def solve_moves(self, board: Board, player_id: int) -> Dict[int, int]:
+        """Solves every move of a position that isn't over yet
+
+        Args:
+            board (Board): the position
+            player_id (int): player to move
+
+        Returns:
+            Dict[int, int]: the score of every valid move, for the player to move
+        """
+        current, mask, empty = self.encode(board, player_id)
+        scores: Dict[int, int] = {}
+        for col in self._order:
+            move: int = (mask + self._bottom_mask) & self._column_masks[col]
+            if move == 0:
+                continue
+            if self._winning_fields(current, mask) & move:
+                scores[col] = (empty + 1) // 2
+            else:
+                scores[col] = -self._negamax(current ^ mask, mask | move, empty - 1, -(empty // 2), empty // 2)
+        return scores
+
+
+    def best_move(self, board: Board, player_id: int) -> Tuple[int, int]:
+        """Finds the move with the best score, a faster win or a slower loss
+
+        Args:
+            board (Board): the position, the game must not be over yet
+            player_id (int): player to move
+
+        Returns:
+            Tuple[int, int]: the best move and its score, for the player to move
+        """
+        current, mask, empty = self.encode(board, player_id)
+        self.node_count += 1 # the root
+        best_move: int = -1
+        alpha: int = -(empty // 2) - 1
+        beta: int = (empty + 1) // 2
+        for col in self._order:
+            move: int = (mask + self._bottom_mask) & self._column_masks[col]
+            if move == 0:
+                continue
+            if self._winning_fields(current, mask) & move:
+                return col, (empty + 1) // 2
+            # Only a score better than the best so far matters, a worse move fails low
+            score: int = -self._negamax(current ^ mask, mask | move, empty - 1, -beta, -alpha)
+            if score > alpha:
+                best_move = col
+                alpha = score
+        return best_move, alpha
+
+
+    def _winning_fields(self, position: int, mask: int) -> int:
+        """Finds the empty fields that complete n in a row for a player, playable or not
+
+        Args:
+            position (int): the discs of the player
+            mask (int): all discs
+
+        Returns:
+            int: mask of the fields
+        """
+        fields: int = 0
+        for offsets in self._windows:
+            window: int = self._board_mask
+            for offset in offsets:
+                window &= position >> offset if offset > 0 else position << -offset
+            fields |= window
+        return fields & (self._board_mask ^ mask)
+
+
+    def _negamax(self, current: int, mask: int, empty: int, alpha: int, beta: int) -> int:
+        """Solves a position where the opponent of the player to move didn't win with the last move
+
+        Args:
+            current (int): the discs of the player to move
+            mask (int): all discs
+            empty (int): number of empty fields
+            alpha (int): score the player to move is already assured of
+            beta (int): score the opponent is already assured of
+
+        Returns:
+            int: the score of the position if it lies within the window, otherwise a bound on the wrong side of it
+        """
+        self.node_count += 1
+        if empty == 0:
+            return 0
+
+        possible: int = (mask + self._bottom_mask) & self._board_mask
+        if self._winning_fields(current, mask) & possible:
+            return (empty + 1) // 2
+
+        # A threat of the opponent that can be played now has to be blocked, two of them can't be
+        opponent_wins: int = self._winning_fields(current ^ mask, mask)
+        forced: int = possible & opponent_wins
+        if forced:
+            if forced & (forced - 1):
+                return -(empty // 2)
+            possible = forced
+        # Playing right below a threat of the opponent lets the opponent win
+        possible &= ~(opponent_wins >> 1)
+        if possible == 0:
+            return -(empty // 2)
+        if empty == 1:
+            return 0
+
+        # Neither player can win with the next move, which bounds the score
+        upper: int = (empty - 1) // 2
+        lower: int = -((empty - 2) // 2)
+        key: int = current + mask
+        bounds: Optional[Tuple[int, int]] = self.table.probe(key)
+        if bounds is not None:
+            lower = max(lower, bounds[0])
+            upper = min(upper, bounds[1])
+        if lower >= beta or lower == upper:
+            return lower
+        if upper <= alpha:
+            return upper
+        alpha = max(alpha, lower)
+        beta = min(beta, upper)
+
+        # Moves that create the most threats first, then from the center outwards
+        moves: List[Tuple[int, int]] = []
+        for col in self._order:
+            move: int = possible & self._column_masks[col]
+            if move:
+                moves.append((-bin(self._winning_fields(current | move, mask | move)).count('1'), move))
+        moves.sort(key=lambda item: item[0])
+
+        alpha_orig: int = alpha
+        best_score: int = -empty
+        for _, move in moves:
+            score: int = -self._negamax(current ^ mask, mask | move, empty - 1, -beta, -alpha)
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= alpha_orig:
+            self.table.store(key, lower, best_score)
+        elif best_score >= beta:
+            self.table.store(key, best_score, upper)
+        else:
+            self.table.store(key, best_score, best_score)
+        return best_score
+
+
+def result(score: int) -> int:
+    """
+    Args:
+        score (int): score of a solved position
+
+    Returns:
+        int: WIN, DRAW or LOSS
+    """
+    return (score > 0) - (score < 0)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+from typing import Dict, Optional, TextIO, TYPE_CHECKING
+import tracemalloc
+if TYPE_CHECKING:
+    from board import Board
+    from players import SearchPlayer
+
+
+class SearchStats:
+    """Statistics of a single search, attached to the player as player.stats after every search
+    """
+    def __init__(self) -> None:
+        self.nodes: int = 0 # nodes visited, including the root and the leaves
+        self.evaluations: int = 0 # boards scored by the heuristic
+        self.cutoffs: int = 0 # nodes where the search stopped early
+        self.first_move_cutoffs: int = 0 # of those, the nodes where the first move was enough
+        self.table_hits: int = 0 # positions found in the transposition table
+        self.table_misses: int = 0 # positions not found in the transposition table
+        self.depth: int = 0 # deepest completed search depth, 0 for a book move
+        self.elapsed: float = 0 # wall clock time of the search in seconds
+        self.worker_time: float = 0 # time spent by the workers of a parallel search in seconds
+        self.book_move: bool = False # whether the move came from the opening book
+        self.solved: bool = False # whether the move came from the exact solver
+        self.ponder_nodes: int = 0 # nodes searched while pondering before this search
+        self.ponder_depth: int = 0 # depth this position was pondered to, 0 if it wasn't
+        self.peak_memory: Optional[int] = None # peak traced memory in bytes, only set by a MemoryHook
+
+
+    def nodes_per_second(self) -> float:
+        """
+        Returns:
+            float: search speed, 0 if no time was measured
+        """
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0
+
+
+    def to_dict(self) -> Dict:
+        """
+        Returns:
+            Dict: the statistics, for writing them as JSON
+        """
+        return dict(vars(self))
+
+
+    def __str__(self) -> str:
+        """
+        Returns:
+            str: the statistics on one line
+        """
+        text: str = (f'{self.nodes} nodes in {self.elapsed:.4f} seconds ({self.nodes_per_second():.0f} nodes/s), '
+                     f'depth {self.depth}, {self.evaluations} evaluations, {self.cutoffs} cutoffs, '
+                     f'{self.table_hits} table hits')
+        if self.peak_memory is not None:
+            text += f', peak memory {self.peak_memory / 1024:.2f} KB'
+        return text
+
+
+class SearchHook:
+    """Base class of the callbacks a player calls during a search, the default callbacks do nothing
+
+    Hooks are opt-in: a player without hooks pays nothing for them.
+    on_node is only called when traces_nodes is True, since it runs for every node.
+    should_stop is only polled when stops_search is True, every 256 nodes like the time budget.
+    In a parallel search the node callbacks only see the nodes searched in the main process.
+    An MCTSPlayer calls on_search_start, on_search_end and should_stop, with itself as the player.
+    """
+    traces_nodes: bool = False # whether the player has to call on_node
+    stops_search: bool = False # whether the player has to poll should_stop
+
+    def on_search_start(self, player: SearchPlayer, board: Board) -> None:
+        """Called before a search starts
+
+        Args:
+            player (SearchPlayer): the searching player
+            board (Board): the root position
+        """
+        pass
+
+
+    def on_node(self, player: SearchPlayer, board: Board, depth: int) -> None:
+        """Called for every node of the search
+
+        Args:
+            player (SearchPlayer): the searching player
+            board (Board): position of the node, only valid during the call
+            depth (int): remaining depth of the node
+        """
+        pass
+
+
+    def should_stop(self, player: SearchPlayer) -> bool:
+        """Polled during the search, a Monte-Carlo search polls it before every batch of playouts
+
+        Args:
+            player (SearchPlayer): the searching player
+
+        Returns:
+            bool: True to abort the search like a used up time budget
+        """
+        return False
+
+
+    def on_search_end(self, player: SearchPlayer, stats: SearchStats) -> None:
+        """Called after a search, before the statistics are attached to the player
+
+        Args:
+            player (SearchPlayer): the searching player
+            stats (SearchStats): statistics of the search, a hook may add to them
+        """
+        pass
+
+
+class MemoryHook(SearchHook):
+    """Measures the peak memory of a search with tracemalloc, which slows down every allocation
+    Inherits from SearchHook
+    """
+    def __init__(self) -> None:
+        self._started: bool = False # whether this hook started tracemalloc
+
+
+    def on_search_start(self, player: SearchPlayer, board: Board) -> None:
+        """Starts tracing, or resets the peak when something else already traces
+
+        Args:
+            player (SearchPlayer): the searching player
+            board (Board): the root position
+        """
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+
+
+    def on_search_end(self, player: SearchPlayer, stats: SearchStats) -> None:
+        """Stores the peak memory in the statistics
+
+        Args:
+            player (SearchPlayer): the searching player
+            stats (SearchStats): statistics of the search
+        """
+        stats.peak_memory = tracemalloc.get_traced_memory()[1]
+        if self._started:
+            tracemalloc.stop()
+
+
+class NodeTraceHook(SearchHook):
+    """Counts the nodes per remaining depth, and optionally writes every node to a file
+    Inherits from SearchHook
+    """
+    traces_nodes: bool = True
+
+    def __init__(self, output: Optional[TextIO] = None) -> None:
+        """
+        Args:
+            output (Optional[TextIO], optional): file that gets a line with the depth and hash of every node.
+                Defaults to None.
+        """
+        self.output: Optional[TextIO] = output
+        self.nodes_per_depth: Dict[int, int] = {} # nodes of the last search per remaining depth
+
+
+    def on_search_start(self, player: SearchPlayer, board: Board) -> None:
+        """
+        Args:
+            player (SearchPlayer): the searching player
+            board (Board): the root position
+        """
+        self.nodes_per_depth = {}
+
+
+    def on_node(self, player: SearchPlayer, board: Board, depth: int) -> None:
+        """
+        Args:
+            player (SearchPlayer): the searching player
+            board (Board): position of the node
+            depth (int): remaining depth of the node
+        """
+        self.nodes_per_depth[depth] = self.nodes_per_depth.get(depth, 0) + 1
+        if self.output is not None:
+            self.output.write(f'{depth} {board.hash_key:016x}\n')
+
+
+    def __str__(self) -> str:
+        """
+        Returns:
+            str: the number of nodes per remaining depth
+        """
+        return ', '.join(f'depth {depth}: {count}' for depth, count in sorted(self.nodes_per_depth.items(), reverse=True))
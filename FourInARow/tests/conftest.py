@@ -0,0 +1,34 @@
+from typing import List, Optional
+import os
+import random
+import sys
+
+# The modules import each other by name, as when app.py is run from the FourInARow directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from board import Board
+
+
+def random_game(board: Board, plies: int, rng: random.Random, game_n: Optional[int] = None) -> List[int]:
+    """Plays random legal moves in turn, player 1 first
+
+    Args:
+        board (Board): the empty board to play on, a Board or a BitBoard
+        plies (int): number of moves, fewer when the board is full or the game is won
+        rng (random.Random): random generator of the moves
+        game_n (Optional[int], optional): n in a row required to win, the game stops at a win.
+            Defaults to None, playing on after a win.
+
+    Returns:
+        List[int]: the columns of the moves
+    """
+    moves: List[int] = []
+    for ply in range(plies):
+        cols: List[int] = [col for col in range(board.width) if board.is_valid(col)]
+        if not cols:
+            break
+        moves.append(rng.choice(cols))
+        board.play(moves[-1], 1 + ply % 2)
+        if game_n is not None and board.is_winning_last_move(game_n) > 0:
+            break
+    return moves
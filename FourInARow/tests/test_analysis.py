@@ -0,0 +1,73 @@
+from typing import Dict, List
+import io
+import random
+import numpy as np
+from analysis import Task, analyze_positions, read_moves, read_packed
+from board import Board
+from conftest import random_game
+from tournament import format_moves
+
+
+SPEC: str = 'alphabeta:simple:4:tt,killer,solve=8'
+
+
+def random_move_lines(count: int, seed: int) -> List[str]:
+    """
+    Args:
+        count (int): number of positions
+        seed (int): seed of the random moves
+
+    Returns:
+        List[str]: moves of 7x6 positions, some of them won, full or repeated
+    """
+    rng: random.Random = random.Random(seed)
+    lines: List[str] = []
+    for _ in range(count):
+        moves: List[int] = random_game(Board(7, 6), rng.randrange(1, 43), rng, 4)
+        lines.append(format_moves(moves, 7))
+    return lines + lines[:count // 4]
+
+
+def analyses(results: List[Dict]) -> List[Dict]:
+    """
+    Args:
+        results (List[Dict]): results of analyze_positions
+
+    Returns:
+        List[Dict]: the results without the elapsed seconds, which differ between runs,
+            and without the cached flag, since every worker has its own cache
+    """
+    return [{key: value for key, value in result.items() if key not in ('elapsed', 'cached')} for result in results]
+
+
+def test_workers_give_the_same_results() -> None:
+    lines: List[str] = random_move_lines(40, 1) + ['3x', '7', '0000000', '0101010', '01010101']
+    tasks: List[Task] = list(read_moves(io.StringIO('# positions\n\n' + '\n'.join(lines))))
+    assert [position for _, position in tasks] == lines
+    single: List[Dict] = list(analyze_positions(tasks, SPEC, 7, 6, 4))
+    parallel: List[Dict] = list(analyze_positions(tasks, SPEC, 7, 6, 4, workers=2, chunk_size=4))
+    assert analyses(parallel) == analyses(single)
+    assert [result['index'] for result in single] == list(range(len(lines)))
+    assert sum('error' in result for result in single) == 4
+    assert any('winner' in result for result in single) and any(result.get('cached') for result in single)
+
+
+def test_packed_states(tmp_path) -> None:
+    rng: random.Random = random.Random(2)
+    states: List[np.ndarray] = []
+    for _ in range(20):
+        board: Board = Board(7, 6)
+        random_game(board, rng.randrange(30), rng, 4)
+        states.append(board.get_board_state())
+    floating: np.ndarray = np.zeros((7, 6), dtype=int)
+    floating[3, 2] = 1
+    too_many: np.ndarray = np.zeros((7, 6), dtype=int)
+    too_many[3, 4:] = 1
+    states += [floating, too_many, np.full((7, 6), 3)]
+    np.save(tmp_path / 'states.npy', np.array(states))
+
+    single: List[Dict] = list(analyze_positions(read_packed(str(tmp_path / 'states.npy')), SPEC, 7, 6, 4))
+    parallel: List[Dict] = list(analyze_positions(read_packed(str(tmp_path / 'states.npy')), SPEC, 7, 6, 4,
+                                                  workers=2, chunk_size=3))
+    assert analyses(parallel) == analyses(single)
+    assert [('error' in result) for result in single] == [False] * 20 + [True] * 3
@@ -0,0 +1,56 @@
+from typing import Dict, List
+from benchmark import compare, player_spec
+
+
+def result(position: str = '7x6-opening', score: int = 2, nodes: int = 1000, nodes_per_second: float = 50000,
+           elapsed: float = 0.02, peak_memory: int = 4000) -> Dict:
+    """
+    Args:
+        position (str, optional): name of the corpus position. Defaults to '7x6-opening'.
+        score (int, optional): score of the best move. Defaults to 2.
+        nodes (int, optional): searched nodes. Defaults to 1000.
+        nodes_per_second (float, optional): search speed. Defaults to 50000.
+        elapsed (float, optional): duration of the search in seconds. Defaults to 0.02.
+        peak_memory (int, optional): peak traced memory in bytes. Defaults to 4000.
+
+    Returns:
+        Dict: a benchmark result of alphabeta:simple at depth 4
+    """
+    return {'position': position, 'player': 'alphabeta:simple', 'depth': 4, 'move': 3, 'score': score,
+            'nodes': nodes, 'nodes_per_second': nodes_per_second, 'elapsed': elapsed, 'peak_memory': peak_memory}
+
+
+def test_unchanged_results_pass() -> None:
+    baseline: List[Dict] = [result(), result('7x6-midgame')]
+    assert compare(baseline, [result(nodes_per_second=45000), result('7x6-midgame', nodes=900)], 0.2, 0.2) == ([], [])
+
+
+def test_changes_are_regressions() -> None:
+    messages, inconclusive = compare([result()], [result(score=3, nodes=1001, nodes_per_second=30000,
+                                                         peak_memory=5000)], 0.2, 0.2)
+    assert len(messages) == 4 and not inconclusive
+    assert any('best move' in message for message in messages)
+    assert any('nodes 1000 -> 1001' in message for message in messages)
+    assert any('nodes/s' in message for message in messages)
+    assert any('peak memory' in message for message in messages)
+
+
+def test_slow_short_runs_are_inconclusive() -> None:
+    # The speed of a run shorter than min_elapsed, in the baseline or now, is dominated by timer noise
+    for old, new in [(result(elapsed=0.001), result(nodes_per_second=20000, elapsed=0.05)),
+                     (result(elapsed=0.02), result(nodes_per_second=20000, elapsed=0.002))]:
+        messages, inconclusive = compare([old], [new], 0.2, 0.2, min_elapsed=0.005)
+        assert messages == [] and len(inconclusive) == 1
+        assert 'nodes/s 50000 -> 20000' in inconclusive[0]
+    # A score change of a short run is still a regression
+    messages, inconclusive = compare([result(elapsed=0.001)], [result(score=1, nodes_per_second=20000)], 0.2, 0.2)
+    assert len(messages) == 1 and len(inconclusive) == 1
+
+
+def test_new_results_without_baseline_are_ignored() -> None:
+    assert compare([result()], [result('9x8-endgame', score=-9)], 0.2, 0.2) == ([], [])
+
+
+def test_player_spec_inserts_the_depth() -> None:
+    assert player_spec('alphabeta:simple', 6) == 'alphabeta:simple:6'
+    assert player_spec('alphabeta:simple:tt,killer', 4) == 'alphabeta:simple:4:tt,killer'
@@ -0,0 +1,76 @@
+from typing import List, Tuple
+import random
+import numpy as np
+import pytest
+from board import Board, BitBoard
+from conftest import random_game
+from transposition import compute_hash
+
+
+# Board sizes: width, height and game_n, the last one can't be won
+SIZES: List[Tuple[int, int, int]] = [(7, 6, 4), (8, 7, 4), (5, 5, 3), (4, 3, 5)]
+
+
+def assert_same_position(board: Board, bitboard: BitBoard, game_n: int) -> None:
+    """
+    Args:
+        board (Board): the reference board
+        bitboard (BitBoard): the board that has to match it
+        game_n (int): n in a row required to win
+    """
+    assert np.array_equal(bitboard.get_board_state(), board.get_board_state())
+    assert bitboard.hash_key == board.hash_key == compute_hash(board.get_board_state())
+    assert bitboard.last_move == board.last_move
+    assert bitboard.is_winning(game_n) == board.is_winning(game_n)
+    assert bitboard.is_winning_last_move(game_n) == board.is_winning_last_move(game_n)
+    assert [bitboard.is_valid(col) for col in range(board.width)] == [board.is_valid(col) for col in range(board.width)]
+
+
+@pytest.mark.parametrize('width, height, game_n', SIZES)
+def test_random_games_match_board(width: int, height: int, game_n: int) -> None:
+    rng: random.Random = random.Random(width * 100 + height)
+    for _ in range(30):
+        board: Board = Board(width, height)
+        bitboard: BitBoard = BitBoard(width, height)
+        player_id: int = 1
+        while board.is_winning_last_move(game_n) == 0:
+            col: int = rng.randrange(width) # may be a full column, which both boards refuse
+            played: bool = board.play(col, player_id)
+            assert bitboard.play(col, player_id) == played
+            if played:
+                player_id = 3 - player_id
+            assert_same_position(board, bitboard, game_n)
+
+
+@pytest.mark.parametrize('width, height, game_n', SIZES)
+def test_undo_restores_every_position(width: int, height: int, game_n: int) -> None:
+    rng: random.Random = random.Random(width * 100 + height)
+    board: Board = Board(width, height)
+    bitboard: BitBoard = BitBoard(width, height)
+    positions: List[Tuple[np.ndarray, int]] = []
+    moves: List[int] = random_game(Board(width, height), width * height // 2, rng)
+    for i, col in enumerate(moves):
+        positions.append((board.get_board_state(), board.hash_key))
+        board.play(col, 1 + i % 2)
+        bitboard.play(col, 1 + i % 2)
+    for col in reversed(moves):
+        assert bitboard.undo(col) and board.undo(col)
+        state, hash_key = positions.pop()
+        assert np.array_equal(board.get_board_state(), state) and board.hash_key == hash_key
+        assert_same_position(board, bitboard, game_n)
+    assert not bitboard.undo(0) and not board.undo(0)
+
+
+def test_conversions_and_copies() -> None:
+    board: Board = Board(7, 6)
+    for i, col in enumerate([3, 3, 2, 4, 4, 6]):
+        board.play(col, 1 + i % 2)
+    for bitboard in (BitBoard(board), BitBoard(board.get_board_state())):
+        assert np.array_equal(bitboard.get_board_state(), board.get_board_state())
+        assert bitboard.hash_key == board.hash_key
+    bitboard = BitBoard(7, 6)
+    for i, col in enumerate([3, 3, 2, 4, 4, 6]):
+        bitboard.play(col, 1 + i % 2)
+    child: BitBoard = bitboard.get_new_board(5, 1)
+    assert child.get_value(5, 5) == 1 and bitboard.get_value(5, 5) == 0
+    assert BitBoard(bitboard).history == bitboard.history
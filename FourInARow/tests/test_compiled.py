@@ -0,0 +1,66 @@
+from typing import List
+import random
+import numpy as np
+import pytest
+from board import Board
+from conftest import random_game
+from heuristics import SimpleHeuristic
+from kernels import alphabeta
+from lines import WinningLines, winning_lines
+from players import AlphaBetaPlayer
+from transposition import TranspositionTable
+
+
+def random_positions(width: int, height: int, game_n: int, count: int, seed: int) -> List[Board]:
+    """
+    Args:
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+        count (int): number of positions
+        seed (int): seed of the random moves
+
+    Returns:
+        List[Board]: positions after a random number of random moves, some of them won
+    """
+    rng: random.Random = random.Random(seed)
+    positions: List[Board] = []
+    for _ in range(count):
+        board: Board = Board(width, height)
+        random_game(board, rng.randrange(width * height // 2), rng, game_n)
+        positions.append(board)
+    return positions
+
+
+@pytest.mark.parametrize('width, height, game_n, depth', [(7, 6, 4, 4), (5, 4, 3, 3), (9, 7, 5, 2)])
+def test_compiled_search_matches_alphabeta(width: int, height: int, game_n: int, depth: int) -> None:
+    for board in random_positions(width, height, game_n, 20, depth):
+        if board.is_winning_last_move(game_n) != 0:
+            continue
+        for player_id in (1, 2):
+            players: List[AlphaBetaPlayer] = [AlphaBetaPlayer(player_id, game_n, depth, SimpleHeuristic(game_n),
+                                                              search_mode=mode) for mode in ('alphabeta', 'compiled')]
+            interpreted, compiled = [player.search(Board(board)) for player in players]
+            assert compiled == interpreted
+            assert players[1].best_score == players[0].best_score
+            assert players[1].principal_variation == players[0].principal_variation
+            # The interpreted search evaluates the leaves in batches, so only the nodes are the same
+            assert players[1].node_count == players[0].node_count
+
+
+def test_kernel_aborts_on_the_stop_flag() -> None:
+    board: Board = Board(7, 6)
+    line_index: WinningLines = winning_lines(7, 6, 4)
+    stop: np.ndarray = np.ones(1, dtype=np.int8)
+    aborted: bool = alphabeta(board.get_board_state(), 1, 1, 8, line_index.lines, line_index.field_starts,
+                              line_index.field_lines, 0, stop)[-1]
+    assert aborted
+    stop.fill(0)
+    best_move, best_score, pv, nodes, evaluations, aborted = alphabeta(
+        board.get_board_state(), 1, 1, 2, line_index.lines, line_index.field_starts, line_index.field_lines, 0, stop)
+    assert not aborted and best_move == pv[0] and len(pv) == 2 and 0 < evaluations < nodes <= 1 + 7 + 49
+
+
+def test_compiled_mode_rejects_unsupported_options() -> None:
+    with pytest.raises(ValueError):
+        AlphaBetaPlayer(1, 4, 4, SimpleHeuristic(4), search_mode='compiled', transposition_table=TranspositionTable())
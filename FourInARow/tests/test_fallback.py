@@ -0,0 +1,50 @@
+from typing import Dict
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+
+# Searches a few positions and prints the results as JSON, in a fresh process
+SCRIPT: str = '''
+import json, sys
+if {without_numba}:
+    sys.modules['numba'] = None # as if numba was not installed
+from board import Board, BitBoard
+from heuristics import SimpleHeuristic, WindowHeuristic
+from players import AlphaBetaPlayer
+import kernels
+results = {{'numba_imported_early': sys.modules.get('numba') is not None}}
+board = BitBoard(7, 6)
+for i, col in enumerate([3, 3, 2, 4, 4, 2]):
+    board.play(col, 1 + i % 2)
+for mode, heuristic in [('alphabeta', SimpleHeuristic), ('compiled', SimpleHeuristic), ('alphabeta', WindowHeuristic)]:
+    player = AlphaBetaPlayer(1, 4, 3, heuristic(4), search_mode=mode)
+    results[f'{{mode}} {{heuristic.__name__}}'] = [player.search(board), player.best_score, player.node_count]
+results['win'] = [Board(board.get_board_state()).is_winning(4), board.is_winning_last_move(4)]
+results['numba'] = kernels.resolve()
+print(json.dumps(results))
+'''
+
+
+def run(without_numba: bool) -> Dict:
+    """
+    Args:
+        without_numba (bool): hide numba from the process
+
+    Returns:
+        Dict: the results of SCRIPT
+    """
+    directory: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output: str = subprocess.run([sys.executable, '-c', textwrap.dedent(SCRIPT.format(without_numba=without_numba))],
+                                 cwd=directory, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_kernels_run_without_numba() -> None:
+    compiled: Dict = run(False)
+    plain: Dict = run(True)
+    assert compiled.pop('numba') and not plain.pop('numba')
+    assert plain == compiled
+    assert not compiled['numba_imported_early']
@@ -0,0 +1,166 @@
+from typing import List, Tuple
+import random
+import numpy as np
+import pytest
+from board import Board
+from conftest import random_game
+from heuristics import WindowCounter
+from kernels import simple_evaluate, simple_evaluate_batch, winning, winning_last_move
+from lines import WinningLines, winning_lines
+
+
+SIZES: List[Tuple[int, int, int]] = [(7, 6, 4), (8, 7, 4), (5, 5, 3), (6, 3, 4), (4, 3, 5)]
+
+DIRECTIONS: List[Tuple[int, int]] = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+def scan_winner(state: np.ndarray, col: int, row: int, game_n: int) -> bool:
+    """Checks the four directions through a disc field by field, like the win checks before the line index
+
+    Args:
+        state (np.ndarray): the board state
+        col (int): column of the disc
+        row (int): row of the disc
+        game_n (int): n in a row required to win
+
+    Returns:
+        bool: whether the disc is part of n in a row of its player
+    """
+    width, height = state.shape
+    player: int = state[col, row]
+    for dx, dy in DIRECTIONS:
+        count: int = 1
+        for sign in (1, -1):
+            x, y = col + sign * dx, row + sign * dy
+            while 0 <= x < width and 0 <= y < height and state[x, y] == player:
+                count += 1
+                x, y = x + sign * dx, y + sign * dy
+        if count >= game_n:
+            return True
+    return False
+
+
+def random_states(width: int, height: int, count: int, seed: int) -> List[np.ndarray]:
+    """
+    Args:
+        width (int): width of the board
+        height (int): height of the board
+        count (int): number of states
+        seed (int): seed of the random moves
+
+    Returns:
+        List[np.ndarray]: states after a random number of random moves, played on after a win,
+            so some have several rows of n
+    """
+    rng: random.Random = random.Random(seed)
+    states: List[np.ndarray] = []
+    for _ in range(count):
+        board: Board = Board(width, height)
+        random_game(board, rng.randrange(width * height + 1), rng)
+        states.append(board.get_board_state())
+    return states
+
+
+@pytest.mark.parametrize('width, height, game_n', SIZES)
+def test_lines_cover_every_row(width: int, height: int, game_n: int) -> None:
+    line_index: WinningLines = winning_lines(width, height, game_n)
+    assert winning_lines(width, height, game_n) is line_index
+    cols: int = max(width - game_n + 1, 0)
+    rows: int = max(height - game_n + 1, 0)
+    assert len(line_index) == width * rows + cols * height + 2 * cols * rows
+    assert line_index.lines.shape == (len(line_index), game_n)
+    found: set = set()
+    for line in line_index.lines.tolist():
+        fields: List[Tuple[int, int]] = [divmod(field, height) for field in line]
+        step: Tuple[int, int] = (fields[1][0] - fields[0][0], fields[1][1] - fields[0][1])
+        assert step in DIRECTIONS
+        assert all(fields[i] == (fields[0][0] + i * step[0], fields[0][1] + i * step[1]) for i in range(game_n))
+        found.add(tuple(line))
+    assert len(found) == len(line_index)
+
+
+@pytest.mark.parametrize('width, height, game_n', SIZES)
+def test_lines_of_every_field(width: int, height: int, game_n: int) -> None:
+    line_index: WinningLines = winning_lines(width, height, game_n)
+    for field in range(width * height):
+        expected: List[int] = [k for k, line in enumerate(line_index.lines.tolist()) if field in line]
+        assert line_index.lines_of_field[field] == expected
+        start, end = line_index.field_starts[field], line_index.field_starts[field + 1]
+        assert line_index.field_lines[start:end].tolist() == expected
+    assert not line_index.lines.flags.writeable
+
+
+@pytest.mark.parametrize('width, height, game_n', SIZES)
+def test_win_checks_match_direction_scan(width: int, height: int, game_n: int) -> None:
+    line_index: WinningLines = winning_lines(width, height, game_n)
+    for state in random_states(width, height, 200, width * height):
+        winners: set = {state[col, row] for col in range(width) for row in range(height)
+                        if state[col, row] != 0 and scan_winner(state, col, row, game_n)}
+        result: int = winning(state, line_index.lines)
+        if winners:
+            assert result in winners
+        else:
+            assert result == (-1 if np.all(state[:, 0]) else 0)
+        for col, row in np.argwhere(state != 0).tolist(): # a last move is always a disc
+            last: int = winning_last_move(state, col, row, line_index.lines, line_index.field_starts,
+                                          line_index.field_lines)
+            if scan_winner(state, col, row, game_n):
+                assert last == state[col, row]
+            else:
+                assert last == (-1 if np.all(state[:, 0]) else 0)
+
+
+@pytest.mark.parametrize('width, height, game_n', SIZES)
+def test_batch_evaluation_matches_single(width: int, height: int, game_n: int) -> None:
+    line_index: WinningLines = winning_lines(width, height, game_n)
+    states: np.ndarray = np.array(random_states(width, height, 100, game_n))
+    winners: np.ndarray = np.array([winning(state, line_index.lines) for state in states])
+    for player_id in (1, 2):
+        values: np.ndarray = simple_evaluate_batch(player_id, states, winners, line_index.lines)
+        assert values.tolist() == [simple_evaluate(player_id, state, winner, line_index.lines)
+                                   for state, winner in zip(states, winners)]
+
+
+def count_open_windows(state: np.ndarray, game_n: int, player_id: int) -> List[int]:
+    """
+    Args:
+        state (np.ndarray): the board state
+        game_n (int): n in a row required to win
+        player_id (int): the player
+
+    Returns:
+        List[int]: number of windows with k discs of the player and none of the other, for k from 0 to n
+    """
+    width, height = state.shape
+    counts: List[int] = [0] * (game_n + 1)
+    for dx, dy in DIRECTIONS:
+        for col in range(width):
+            for row in range(height):
+                fields: List[Tuple[int, int]] = [(col + dx * i, row + dy * i) for i in range(game_n)]
+                if not all(0 <= x < width and 0 <= y < height for x, y in fields):
+                    continue
+                discs: List[int] = [state[x, y] for x, y in fields]
+                if 3 - player_id not in discs and player_id in discs:
+                    counts[discs.count(player_id)] += 1
+    return counts
+
+
+@pytest.mark.parametrize('width, height, game_n', SIZES)
+def test_window_counter_matches_brute_force(width: int, height: int, game_n: int) -> None:
+    rng: random.Random = random.Random(width * 100 + height)
+    state: np.ndarray = np.zeros((width, height), dtype=int)
+    counter: WindowCounter = WindowCounter(state, game_n)
+    played: List[Tuple[int, int, int]] = []
+    for i, col in enumerate(random_game(Board(width, height), width * height, rng)):
+        row: int = height - 1 - int(np.count_nonzero(state[col]))
+        state[col, row] = 1 + i % 2
+        counter.on_play(col, row, 1 + i % 2)
+        played.append((col, row, 1 + i % 2))
+        for player_id in (1, 2):
+            assert counter.open_windows[player_id] == count_open_windows(state, game_n, player_id)
+    assert WindowCounter(state, game_n).open_windows == counter.open_windows
+    for col, row, player_id in reversed(played[len(played) // 2:]):
+        state[col, row] = 0
+        counter.on_undo(col, row, player_id)
+    for player_id in (1, 2):
+        assert counter.open_windows[player_id] == count_open_windows(state, game_n, player_id)
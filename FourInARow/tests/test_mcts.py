@@ -0,0 +1,66 @@
+from typing import List
+import numpy as np
+from board import Board
+from heuristics import SimpleHeuristic
+from kernels import rollouts, seed_rollouts
+from lines import WinningLines, winning_lines
+from players import MCTSPlayer
+
+
+def play_moves(moves: List[int], width: int = 7, height: int = 6) -> Board:
+    """
+    Args:
+        moves (List[int]): columns played in turn, player 1 first
+        width (int, optional): width of the board. Defaults to 7.
+        height (int, optional): height of the board. Defaults to 6.
+
+    Returns:
+        Board: the position
+    """
+    board: Board = Board(width, height)
+    for i, col in enumerate(moves):
+        board.play(col, 1 + i % 2)
+    return board
+
+
+def test_rollouts_count_results() -> None:
+    line_index: WinningLines = winning_lines(7, 6, 4)
+    state: np.ndarray = play_moves([3, 3, 2, 4]).get_board_state()
+    seed_rollouts(1)
+    wins: float = rollouts(state, 1, 1, line_index.lines, line_index.field_starts, line_index.field_lines, 200)
+    assert 0 < wins < 200
+    # Both players see every game, a draw counts half for each
+    seed_rollouts(1)
+    losses: float = rollouts(state, 1, 2, line_index.lines, line_index.field_starts, line_index.field_lines, 200)
+    assert wins + losses == 200
+    assert np.array_equal(state, play_moves([3, 3, 2, 4]).get_board_state())
+
+
+def test_rollouts_of_a_forced_win() -> None:
+    # 3x3 board with three in a row, the last empty field completes a diagonal for player 1
+    line_index: WinningLines = winning_lines(3, 3, 3)
+    state: np.ndarray = np.array([[0, 1, 2], [2, 1, 2], [1, 2, 1]])
+    assert rollouts(state, 1, 1, line_index.lines, line_index.field_starts, line_index.field_lines, 10) == 10
+    assert rollouts(state, 1, 2, line_index.lines, line_index.field_starts, line_index.field_lines, 10) == 0
+
+
+def test_mcts_takes_a_win() -> None:
+    board: Board = play_moves([0, 6, 1, 6, 2, 6])
+    player: MCTSPlayer = MCTSPlayer(1, 4, SimpleHeuristic(4), playouts=4000, seed=3)
+    assert player.search(board) == 3 # four in the bottom row, before player 2 completes column 6
+    assert player.playout_count >= 4000 and player.stats.evaluations == player.playout_count
+    board.play(5, 1)
+    player.player_id = 2
+    assert player.search(board) == 6
+
+
+def test_a_seed_repeats_the_search() -> None:
+    board: Board = play_moves([3, 3, 2])
+    players: List[MCTSPlayer] = [MCTSPlayer(2, 4, SimpleHeuristic(4), playouts=2000, seed=7) for _ in range(2)]
+    moves: List[int] = [player.search(board) for player in players]
+    assert moves[0] == moves[1]
+    assert players[0].best_score == players[1].best_score and players[0].node_count == players[1].node_count
+    # new_game restarts the random generator
+    players[0].search(board)
+    players[0].new_game()
+    assert players[0].search(board) == moves[0] and players[0].best_score == players[1].best_score
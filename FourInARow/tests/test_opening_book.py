@@ -0,0 +1,76 @@
+from typing import Dict, List, Tuple
+import random
+import pytest
+from board import BitBoard
+from conftest import random_game
+from heuristics import SimpleHeuristic
+from opening_book import OpeningBook, book_key, build_book, write_book
+from players import AlphaBetaPlayer
+
+
+def random_positions(count: int, seed: int) -> List[Tuple[BitBoard, int]]:
+    """
+    Args:
+        count (int): number of positions
+        seed (int): seed of the random moves
+
+    Returns:
+        List[Tuple[BitBoard, int]]: 7x6 positions after up to 8 random moves, and the player to move
+    """
+    rng: random.Random = random.Random(seed)
+    positions: List[Tuple[BitBoard, int]] = []
+    for _ in range(count):
+        board: BitBoard = BitBoard(7, 6)
+        moves: List[int] = random_game(board, rng.randrange(9), rng, 4)
+        positions.append((board, 1 + len(moves) % 2))
+    return positions
+
+
+def test_written_entries_are_found(tmp_path) -> None:
+    positions: List[Tuple[BitBoard, int]] = random_positions(100, 1)
+    entries: Dict[int, Tuple[int, int]] = {book_key(board, player_id): (i % 7, i - 50)
+                                           for i, (board, player_id) in enumerate(positions)}
+    write_book(str(tmp_path / 'book.bin'), 7, 6, 4, entries)
+    book: OpeningBook = OpeningBook(str(tmp_path / 'book.bin'))
+    assert len(book) == len(entries)
+    for board, player_id in positions:
+        assert book.lookup(board, player_id, 4) == entries[book_key(board, player_id)]
+    assert book.hits == len(positions) and book.misses == 0
+    book.close()
+
+
+def test_unknown_positions_are_not_found(tmp_path) -> None:
+    positions: List[Tuple[BitBoard, int]] = random_positions(100, 2)
+    known: List[Tuple[BitBoard, int]] = positions[:50]
+    write_book(str(tmp_path / 'book.bin'), 7, 6, 4, {book_key(board, player_id): (3, 0) for board, player_id in known})
+    book: OpeningBook = OpeningBook(str(tmp_path / 'book.bin'))
+    keys: set = {book_key(board, player_id) for board, player_id in known}
+    for board, player_id in positions[50:]:
+        if book_key(board, player_id) not in keys:
+            assert book.lookup(board, player_id, 4) is None
+    # The same discs with the other player to move, on another board size or with another n
+    board, player_id = known[0]
+    if book_key(board, 3 - player_id) not in keys:
+        assert book.lookup(board, 3 - player_id, 4) is None
+    assert book.lookup(board, player_id, 5) is None
+    assert book.lookup(BitBoard(8, 6), 1, 4) is None
+    book.close()
+
+
+def test_rejects_other_files(tmp_path) -> None:
+    (tmp_path / 'other.bin').write_bytes(b'not a book' * 10)
+    with pytest.raises(ValueError):
+        OpeningBook(str(tmp_path / 'other.bin'))
+
+
+def test_player_plays_the_book_move_and_closes_the_book(tmp_path) -> None:
+    entries: Dict[int, Tuple[int, int]] = build_book(5, 4, 3, 2, 2, verbose=False)
+    write_book(str(tmp_path / 'book.bin'), 5, 4, 3, entries)
+    book: OpeningBook = OpeningBook(str(tmp_path / 'book.bin'))
+    player: AlphaBetaPlayer = AlphaBetaPlayer(1, 3, 6, SimpleHeuristic(3), opening_book=book)
+    board: BitBoard = BitBoard(5, 4)
+    assert player.search(board) == entries[book_key(board, 1)][0]
+    assert player.book_move and player.node_count == 0
+    player.close()
+    assert player.opening_book is None and book._map.closed
+    player.close()
@@ -0,0 +1,59 @@
+from typing import List
+import time
+import pytest
+from board import BitBoard
+from heuristics import SimpleHeuristic
+from kernels import warm_up
+from players import AlphaBetaPlayer
+
+
+def play_moves(moves: List[int]) -> BitBoard:
+    """
+    Args:
+        moves (List[int]): columns played in turn, player 1 first
+
+    Returns:
+        BitBoard: the 7x6 position
+    """
+    board: BitBoard = BitBoard(7, 6)
+    for i, col in enumerate(moves):
+        board.play(col, 1 + i % 2)
+    return board
+
+
+@pytest.mark.parametrize('search_mode', ['alphabeta', 'compiled'])
+def test_pondered_result_is_reused(search_mode: str) -> None:
+    player: AlphaBetaPlayer = AlphaBetaPlayer(1, 4, 4, SimpleHeuristic(4), search_mode=search_mode)
+    board: BitBoard = play_moves([3, 3, 2])
+    player.ponder(board)
+    player._ponder_thread.join(30) # a fixed depth of 4 is pondered to the end
+    assert player._ponder_thread is not None and not player._ponder_thread.is_alive()
+
+    board.play(4, 2)
+    move: int = player.search(board)
+    assert player.stats.ponder_depth == 4 and player.stats.nodes == 0 and player.stats.ponder_nodes > 0
+    reference: AlphaBetaPlayer = AlphaBetaPlayer(1, 4, 4, SimpleHeuristic(4), search_mode=search_mode)
+    assert reference.search(board) == move and reference.best_score == player.best_score
+    player.close()
+
+
+@pytest.mark.parametrize('search_mode', ['alphabeta', 'compiled'])
+def test_stop_pondering_returns_promptly(search_mode: str) -> None:
+    warm_up()
+    player: AlphaBetaPlayer = AlphaBetaPlayer(1, 4, 42, SimpleHeuristic(4), time_limit=0.1, search_mode=search_mode)
+    board: BitBoard = play_moves([3, 3])
+    move: int = player.search(board)
+    searched: tuple = (player.best_score, player.completed_depth, list(player.principal_variation))
+    board.play(move, 1)
+    player.ponder(board) # pondering has no time budget, 42 plies deep never finish
+    time.sleep(0.3)
+
+    start_time: float = time.perf_counter()
+    player.stop_pondering()
+    assert time.perf_counter() - start_time < 0.2
+    assert player._ponder_thread is None and player._ponder_results
+    # Pondering keeps its results apart from the last search
+    assert (player.best_score, player.completed_depth, player.principal_variation) == searched
+    player.new_game()
+    assert not player._ponder_results
+    player.close()
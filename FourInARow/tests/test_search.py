@@ -0,0 +1,57 @@
+from typing import List, Tuple
+import pytest
+from benchmark import CORPUS, load_position
+from kernels import warm_up
+from players import SearchPlayer
+from tournament import PlayerConfig
+
+
+# Options of the alpha-beta player, all of them have to find the score of the plain search
+OPTIONS: List[str] = ['tt', 'killer', 'center', 'tt,killer', 'pvs', 'tt,killer,pvs', 'mtdf', 'tt,killer,mtdf',
+                      'compiled']
+# Options that keep the static move ordering, so ties between moves are broken the same way
+STATIC_OPTIONS: List[str] = ['tt', 'pvs', 'mtdf', 'compiled']
+
+
+def search(spec: str, moves: str, width: int, height: int, game_n: int) -> Tuple[int, float]:
+    """
+    Args:
+        spec (str): specification of the player
+        moves (str): moves of the position, one digit per column
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+
+    Returns:
+        Tuple[int, float]: best move and its score
+    """
+    board, player_id = load_position(width, height, moves)
+    player: SearchPlayer = PlayerConfig(spec).create(player_id, game_n)
+    move: int = player.search(board)
+    player.close()
+    return move, player.best_score
+
+
+@pytest.mark.parametrize('option', OPTIONS)
+@pytest.mark.parametrize('name, width, height, game_n, moves', CORPUS, ids=[entry[0] for entry in CORPUS])
+def test_options_keep_the_score(option: str, name: str, width: int, height: int, game_n: int, moves: str) -> None:
+    expected_move, expected_score = search('alphabeta:simple:5', moves, width, height, game_n)
+    move, score = search(f'alphabeta:simple:5:{option}', moves, width, height, game_n)
+    assert score == expected_score
+    if option in STATIC_OPTIONS:
+        assert move == expected_move
+
+
+def test_time_limit_returns_a_completed_depth() -> None:
+    warm_up() # loading the kernels would overrun the deadline
+    name, width, height, game_n, moves = CORPUS[1]
+    board, player_id = load_position(width, height, moves)
+    player: SearchPlayer = PlayerConfig('alphabeta:simple:42:time=0.2').create(player_id, game_n)
+    move: int = player.search(board)
+    player.close()
+    assert board.is_valid(move)
+    # The deadline falls inside a deeper search, whose result is thrown away
+    assert 1 <= player.completed_depth < 42
+    assert player.stats.elapsed < 0.5
+    assert move == player.principal_variation[0]
+    assert player.best_score == search(f'alphabeta:simple:{player.completed_depth}', moves, width, height, game_n)[1]
@@ -0,0 +1,112 @@
+from typing import Dict, List
+import asyncio
+import json
+import time
+from server import GameServer, with_time_limit
+
+
+class Client:
+    """A connection to the game server that sends one request at a time
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Args:
+            reader (asyncio.StreamReader): the responses of the server
+            writer (asyncio.StreamWriter): the requests to the server
+        """
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+
+
+    async def request(self, **request) -> Dict:
+        """
+        Args:
+            request: the fields of the request, like op='stats'
+
+        Returns:
+            Dict: the response of the server
+        """
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+
+async def connect(server: GameServer) -> Client:
+    """Starts the server on a free port and connects to it
+
+    Args:
+        server (GameServer): the game server
+
+    Returns:
+        Client: the connection
+    """
+    listener: asyncio.AbstractServer = await server.start(port=0)
+    port: int = listener.sockets[0].getsockname()[1]
+    return Client(*await asyncio.open_connection('127.0.0.1', port))
+
+
+def test_with_time_limit_replaces_the_budget() -> None:
+    assert with_time_limit('alphabeta:simple:42', 0.5) == 'alphabeta:simple:42:time=0.5'
+    assert with_time_limit('alphabeta:simple:42:tt,time=3,killer', 1.0) == 'alphabeta:simple:42:tt,killer,time=1.0'
+
+
+def test_protocol() -> None:
+    async def run() -> None:
+        client: Client = await connect(server)
+        first: Dict = await client.request(op='new', engine='alphabeta:simple:4', engine_id=1, time_limit=0.5)
+        assert first['ok'] and first['winner'] == 0 and 0 <= first['engine_col'] < 7
+        second: Dict = await client.request(op='new', width=5, height=4, game_n=3, engine='mcts:simple:200')
+        assert second['ok'] and 'engine_col' not in second and second['game'] != first['game']
+
+        moves: List[int] = [first['engine_col']]
+        response: Dict = await client.request(op='move', game=first['game'], col=3)
+        assert response['ok'] and response['game'] == first['game'] and response['nodes'] > 0
+        moves += [3, response['engine_col']]
+        assert server.games[first['game']].moves == moves
+
+        stats: Dict = await client.request(op='stats')
+        assert stats == {'ok': True, 'games': 2, 'moves': 2, 'pending': 0, 'cancelled': 0, 'timeouts': 0}
+        assert await client.request(op='close', game=second['game']) == {'ok': True, 'game': second['game']}
+        assert (await client.request(op='stats'))['games'] == 1
+
+        for request in [{'op': 'move', 'game': second['game'], 'col': 0}, # closed
+                        {'op': 'move', 'game': first['game'], 'col': 9}, # off the board
+                        {'op': 'move', 'game': first['game']}, # no column given
+                        {'op': 'new', 'width': 50},
+                        {'op': 'new', 'engine': 'alphabeta:simple:4:compiled'},
+                        {'op': 'new', 'engine': 'alphabeta'},
+                        {'op': 'resign', 'game': first['game']}]:
+            response = await client.request(**request)
+            assert not response['ok'] and response['error']
+        assert server.games[first['game']].moves == moves
+        client.writer.close()
+
+    server: GameServer = GameServer(workers=1, time_limit=0.5)
+    try:
+        asyncio.run(run())
+    finally:
+        server.close()
+
+
+def test_disconnect_cancels_the_search() -> None:
+    async def run() -> None:
+        client: Client = await connect(server)
+        game: int = (await client.request(op='new', engine='alphabeta:simple:42', time_limit=10))['game']
+        client.writer.write(json.dumps({'op': 'move', 'game': game, 'col': 3}).encode() + b'\n')
+        await client.writer.drain()
+        while server.stats()['pending'] == 0:
+            await asyncio.sleep(0.01)
+        client.writer.close()
+
+        # The worker stops long before the time budget of 10 seconds
+        start_time: float = time.time()
+        while server.stats()['pending'] > 0:
+            assert time.time() - start_time < 5
+            await asyncio.sleep(0.01)
+        assert server.stats() == {'games': 0, 'moves': 0, 'pending': 0, 'cancelled': 1, 'timeouts': 0}
+
+    server: GameServer = GameServer(workers=1, time_limit=10)
+    try:
+        asyncio.run(run())
+    finally:
+        server.close()
@@ -0,0 +1,86 @@
+from typing import Dict, List, Tuple
+import random
+import pytest
+from board import BitBoard
+from conftest import random_game
+from solver import Solver, result
+
+
+def brute_force(board: BitBoard, player_id: int, game_n: int, empty: int) -> int:
+    """Scores a position by trying every line of play, without any pruning
+
+    Args:
+        board (BitBoard): the position, not over yet
+        player_id (int): player to move
+        game_n (int): n in a row required to win
+        empty (int): number of empty fields
+
+    Returns:
+        int: the score for the player to move, in the scale of Solver
+    """
+    best_score: int = -empty
+    for col in range(board.width):
+        if not board.play(col, player_id):
+            continue
+        if board.is_winning_last_move(game_n) > 0:
+            score: int = (empty + 1) // 2
+        elif empty == 1:
+            score = 0
+        else:
+            score = -brute_force(board, 3 - player_id, game_n, empty - 1)
+        board.undo(col)
+        best_score = max(best_score, score)
+    return best_score
+
+
+def endgames(width: int, height: int, game_n: int, empty: int, count: int, seed: int) -> List[Tuple[BitBoard, int]]:
+    """Plays random games until only a few fields are empty
+
+    Args:
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+        empty (int): number of empty fields of the positions
+        count (int): number of positions
+        seed (int): seed of the random moves
+
+    Returns:
+        List[Tuple[BitBoard, int]]: positions that aren't over, and the player to move
+    """
+    rng: random.Random = random.Random(seed)
+    positions: List[Tuple[BitBoard, int]] = []
+    while len(positions) < count:
+        board: BitBoard = BitBoard(width, height)
+        if len(random_game(board, width * height - empty, rng, game_n)) == width * height - empty \
+                and board.is_winning_last_move(game_n) == 0:
+            positions.append((board, 1 + (width * height - empty) % 2))
+    return positions
+
+
+@pytest.mark.parametrize('width, height, game_n, empty', [(7, 6, 4, 10), (5, 4, 3, 9), (4, 4, 4, 10)])
+def test_solver_matches_brute_force(width: int, height: int, game_n: int, empty: int) -> None:
+    solver: Solver = Solver(game_n) # one table for all positions, as in a game
+    for board, player_id in endgames(width, height, game_n, empty, 12, width * height):
+        expected: int = brute_force(BitBoard(board), player_id, game_n, empty)
+        assert solver.solve(board, player_id) == expected
+        assert solver.solve(board, player_id, weak=True) == result(expected)
+        move, score = solver.best_move(board, player_id)
+        assert score == expected
+        board.play(move, player_id)
+        if board.is_winning_last_move(game_n) <= 0:
+            assert -brute_force(board, 3 - player_id, game_n, empty - 1) == expected
+        board.undo(move)
+
+
+def test_solve_moves_scores_every_move() -> None:
+    solver: Solver = Solver(4)
+    for board, player_id in endgames(7, 6, 4, 9, 6, 1):
+        scores: Dict[int, int] = solver.solve_moves(board, player_id)
+        assert sorted(scores) == [col for col in range(7) if board.is_valid(col)]
+        for col, score in scores.items():
+            board.play(col, player_id)
+            if board.is_winning_last_move(4) > 0:
+                assert score == 5 # (empty + 1) // 2
+            else:
+                assert score == -brute_force(board, 3 - player_id, 4, 8)
+            board.undo(col)
@@ -0,0 +1,57 @@
+from typing import Dict, List
+import csv
+import json
+import pytest
+from tournament import PlayerConfig, ResultWriter, read_openings, run_tournament, schedule
+
+
+def test_read_openings(tmp_path) -> None:
+    (tmp_path / 'openings.txt').write_text('# opening suite\n3324\n\n3,3,2,4\n  0  \n')
+    assert read_openings(str(tmp_path / 'openings.txt'), 7, 6, 4) == [[3, 3, 2, 4], [3, 3, 2, 4], [0]]
+
+
+@pytest.mark.parametrize('line, message', [
+    ('33x4', '2: 33x4 is no move sequence'),
+    ('337', '2: invalid move 7 at ply 2'),
+    ('0000000', '2: invalid move 0 at ply 6'), # the column is full
+    ('0101010', '2: the game is over after ply 6'),
+])
+def test_read_openings_rejects_invalid_lines(tmp_path, line: str, message: str) -> None:
+    (tmp_path / 'openings.txt').write_text(f'33\n{line}\n')
+    with pytest.raises(ValueError, match=message):
+        read_openings(str(tmp_path / 'openings.txt'), 7, 6, 4)
+
+
+@pytest.mark.parametrize('spec', ['alphabeta:simple', 'alpha:simple:4', 'alphabeta:best:4', 'alphabeta:simple:4:fast',
+                                  'mcts:simple:100:pvs', 'alphabeta:window:4:compiled'])
+def test_player_config_rejects_invalid_specifications(spec: str) -> None:
+    with pytest.raises(ValueError):
+        PlayerConfig(spec)
+
+
+def test_schedule_plays_every_opening_with_both_colors() -> None:
+    games: List = list(schedule(3, 2, [[3], [2, 4]]))
+    assert len(games) == 3 * 2 * 2
+    for first, second in [(0, 1), (0, 2), (1, 2)]:
+        for opening in ([3], [2, 4]):
+            assert ((first, second), opening) in games and ((second, first), opening) in games
+
+
+@pytest.mark.parametrize('output', ['results.jsonl', 'results.csv'])
+def test_standings_add_up(tmp_path, output: str) -> None:
+    configs: List[PlayerConfig] = [PlayerConfig('alphabeta:simple:1'), PlayerConfig('alphabeta:simple:3:tt'),
+                                   PlayerConfig('minmax:window:2')]
+    writer: ResultWriter = ResultWriter(str(tmp_path / output))
+    standings: List[List[int]] = run_tournament(configs, 2, [[2], [1, 3]], writer, 5, 4, 3, 2)
+    writer.close()
+
+    with open(tmp_path / output, newline='') as file:
+        results: List[Dict] = list(csv.DictReader(file)) if output.endswith('.csv') else list(map(json.loads, file))
+    assert len(results) == 3 * 2 * 2
+    assert sorted(int(result['game']) for result in results) == list(range(12))
+    # Every entrant plays 2 openings with both colors against the 2 others
+    assert all(sum(score) == 8 for score in standings)
+    assert sum(wins for wins, _, _ in standings) == sum(losses for _, _, losses in standings)
+    for entrant, config in enumerate(configs):
+        wins: int = sum(1 for result in results if result['winner_name'] == config.spec)
+        assert standings[entrant][0] == wins
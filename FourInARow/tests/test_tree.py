@@ -0,0 +1,57 @@
+from typing import List
+import pytest
+from board import Board, BitBoard
+from heuristics import SimpleHeuristic
+from players import MCTSPlayer
+from tree import SearchTree
+
+
+COLUMNS: List[str] = ['move', 'mover', 'winner', 'child_count', 'parent', 'first_child', 'visits', 'value', 'hash_key']
+
+
+def test_expand_and_path() -> None:
+    board: Board = Board(7, 6)
+    board.play(3, 1)
+    tree: SearchTree = SearchTree(board, 1)
+    assert len(tree) == 1 and not tree.is_expanded(0) and tree.children(0) == range(0)
+    assert tree.expand(0, [3, 2, 4]) == range(1, 4)
+    assert tree.expand(2, [0, 6]) == range(4, 6)
+    assert tree.is_expanded(0) and list(tree.children(2)) == [4, 5] and not tree.is_expanded(1)
+    assert [tree.mover[i] for i in range(len(tree))] == [1, 2, 2, 2, 1, 1]
+    assert tree.path(5) == [2, 6] and tree.path(0) == []
+    child: Board = tree.board(5)
+    assert child.get_value(2, 5) == 2 and child.get_value(6, 5) == 1 and board.get_value(2, 5) == 0
+    assert tree.nbytes == 34 * len(tree)
+
+
+@pytest.mark.parametrize('board_type', [Board, BitBoard])
+def test_tree_is_consistent_after_a_search(board_type: type) -> None:
+    board: Board = board_type(7, 6)
+    for i, col in enumerate([3, 3, 2, 4]):
+        board.play(col, 1 + i % 2)
+    player: MCTSPlayer = MCTSPlayer(1, 4, SimpleHeuristic(4), rollouts_per_leaf=4)
+    tree: SearchTree = player._grow_tree(board, 3000, None, 11)
+    count: int = len(tree)
+    assert all(len(getattr(tree, column)) == count for column in COLUMNS)
+    assert tree.nbytes == 34 * count
+    assert player.playout_count == tree.visits[0] >= 3000
+    assert sum(tree.visits[child] for child in tree.children(0)) == tree.visits[0]
+
+    for index in range(1, count):
+        parent: int = tree.parent[index]
+        assert index in tree.children(parent) and tree.mover[index] == 3 - tree.mover[parent]
+        assert 0 <= tree.value[index] <= tree.visits[index]
+        if tree.visits[index] == 0:
+            assert tree.hash_key[index] == 0 and not tree.is_expanded(index)
+            continue
+        position: Board = tree.board(index)
+        assert type(position) is board_type
+        assert tree.hash_key[index] == position.hash_key
+        assert tree.winner[index] == position.is_winning_last_move(4)
+        if tree.is_expanded(index):
+            # The first visit played out from the node itself, the later ones went through a child
+            assert tree.winner[index] == 0
+            assert sorted(tree.move[child] for child in tree.children(index)) == \
+                [col for col in range(7) if position.is_valid(col)]
+            assert tree.visits[index] == player.rollouts_per_leaf + sum(tree.visits[child]
+                                                                         for child in tree.children(index))
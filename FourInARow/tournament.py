@@ -0,0 +1,403 @@
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from board import Board, BitBoard
+from heuristics import Heuristic, SimpleHeuristic, WindowHeuristic
+from opening_book import OpeningBook
+from ordering import CandidateMoves, MoveOrdering, CenterFirstOrdering, KillerHistoryOrdering
+from players import SearchPlayer, MinMaxPlayer, AlphaBetaPlayer, MCTSPlayer
+from stats import SearchHook
+from transposition import TranspositionTable
+
+
+# Names used in a player specification
+PLAYERS: Dict[str, type] = {'minmax': MinMaxPlayer, 'alphabeta': AlphaBetaPlayer, 'mcts': MCTSPlayer}
+HEURISTICS: Dict[str, type] = {'simple': SimpleHeuristic, 'window': WindowHeuristic}
+ORDERINGS: Dict[str, type] = {'center': CenterFirstOrdering, 'killer': KillerHistoryOrdering}
+
+# Help text of a player specification, for the command line tools
+SPEC_HELP: str = ('A player is specified as player:heuristic:depth[:options], like alphabeta:window:6:tt,killer. '
+                  'Players: minmax, alphabeta, mcts (depth is playouts). Heuristics: simple, window. '
+                  'Options: tt, center, killer, pvs, mtdf, compiled, time=<seconds>, book=<path>, solve=<fields>, '
+                  'near=<columns>, workers=<processes>, ponder.')
+
+CSV_FIELDS: List[str] = ['game', 'player1', 'player2', 'opening', 'moves', 'winner', 'winner_name',
+                         'duration', 'latencies', 'nodes']
+
+
+class PlayerConfig:
+    """Configuration of a search player in a tournament, parsed from a specification like alphabeta:window:6:tt,killer
+
+    The specification is the player, the heuristic, the depth (the playouts per move for mcts)
+    and optionally a comma separated list of options:
+    tt (transposition table), center or killer (move ordering), pvs, mtdf or compiled (search mode of alphabeta),
+    time=<seconds> (time budget per move), book=<path> (opening book),
+    solve=<fields> (exact solver from this many empty fields),
+    near=<columns> (only search the columns within this distance of a disc, for large boards),
+    workers=<processes> (parallel search) and ponder (search on the opponent's time).
+    """
+    def __init__(self, spec: str) -> None:
+        """
+        Args:
+            spec (str): specification of the player
+
+        Raises:
+            ValueError: if the specification can't be parsed
+        """
+        parts: List[str] = spec.split(':')
+        if len(parts) not in (3, 4) or parts[0] not in PLAYERS or parts[1] not in HEURISTICS:
+            raise ValueError(f'Invalid player specification {spec}, expected player:heuristic:depth[:options]')
+        self.spec: str = spec
+        self.player: str = parts[0]
+        self.heuristic: str = parts[1]
+        self.depth: int = int(parts[2])
+        self.transposition_table: bool = False
+        self.move_ordering: Optional[str] = None
+        self.time_limit: Optional[float] = None
+        self.book: Optional[str] = None
+        self.search_mode: Optional[str] = None
+        self.solver_threshold: int = 0
+        self.candidate_radius: Optional[int] = None
+        self.workers: int = 1
+        self.ponder: bool = False
+        for option in parts[3].split(',') if len(parts) == 4 else []:
+            name, _, value = option.partition('=')
+            if name == 'tt':
+                self.transposition_table = True
+            elif name in ORDERINGS:
+                self.move_ordering = name
+            elif name == 'time':
+                self.time_limit = float(value)
+            elif name == 'book':
+                self.book = value
+            elif name == 'solve':
+                self.solver_threshold = int(value)
+            elif name == 'near' and self.player != 'mcts':
+                self.candidate_radius = int(value)
+            elif name == 'workers':
+                self.workers = int(value)
+            elif name == 'ponder' and self.player != 'mcts':
+                self.ponder = True
+            elif name in ('pvs', 'mtdf', 'compiled') and self.player == 'alphabeta':
+                self.search_mode = name
+            else:
+                raise ValueError(f'Unknown option {option} in player specification {spec}')
+        if self.search_mode == 'compiled' and (self.heuristic != 'simple' or self.transposition_table
+                                               or self.move_ordering or self.candidate_radius is not None):
+            raise ValueError(f'The compiled search of {spec} only supports the simple heuristic, '
+                             f'without tt, move ordering or near')
+
+
+    def create(self, player_id: int, game_n: int,
+               hooks: Optional[List[SearchHook]] = None) -> Union[SearchPlayer, MCTSPlayer]:
+        """Creates a fresh player, so no state is shared between games
+
+        Args:
+            player_id (int): id of the player, 1 or 2
+            game_n (int): n in a row required to win
+            hooks (Optional[List[SearchHook]], optional): callbacks for instrumenting the search. Defaults to None.
+
+        Returns:
+            Union[SearchPlayer, MCTSPlayer]: the player
+        """
+        heuristic: Heuristic = HEURISTICS[self.heuristic](game_n)
+        if self.player == 'mcts':
+            return MCTSPlayer(player_id, game_n, heuristic, playouts=self.depth, time_limit=self.time_limit,
+                              workers=self.workers, hooks=hooks)
+        move_ordering: Optional[MoveOrdering] = ORDERINGS[self.move_ordering]() if self.move_ordering else None
+        options: Dict = {} if self.search_mode is None else {'search_mode': self.search_mode}
+        if self.candidate_radius is not None:
+            options['candidate_moves'] = CandidateMoves(self.candidate_radius)
+        return PLAYERS[self.player](player_id, game_n, self.depth, heuristic,
+                                    transposition_table=TranspositionTable() if self.transposition_table else None,
+                                    time_limit=self.time_limit, workers=self.workers, move_ordering=move_ordering,
+                                    opening_book=OpeningBook(self.book) if self.book else None, hooks=hooks,
+                                    solver_threshold=self.solver_threshold, ponder=self.ponder, **options)
+
+
+    def __str__(self) -> str:
+        """
+        Returns:
+            str: the specification of the player
+        """
+        return self.spec
+
+
+def random_opening(width: int, height: int, game_n: int, plies: int, rng: random.Random) -> List[int]:
+    """Draws random moves that don't end the game
+
+    Args:
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+        plies (int): number of moves
+        rng (random.Random): random generator
+
+    Returns:
+        List[int]: the columns of the moves, the first move is made by player 1
+    """
+    while True:
+        board: BitBoard = BitBoard(width, height)
+        moves: List[int] = []
+        while len(moves) < plies:
+            move: int = rng.choice([col for col in range(width) if board.is_valid(col)])
+            board.play(move, 1 + len(moves) % 2)
+            moves.append(move)
+            if board.is_winning_last_move(game_n) != 0:
+                break
+        else:
+            return moves
+
+
+def parse_moves(text: str) -> List[int]:
+    """
+    Args:
+        text (str): moves, one digit per column or separated by commas
+
+    Raises:
+        ValueError: if the text is no move sequence
+
+    Returns:
+        List[int]: the columns of the moves
+    """
+    return [int(col) for col in (text.split(',') if ',' in text else text)]
+
+
+def format_moves(moves: List[int], width: int) -> str:
+    """
+    Args:
+        moves (List[int]): the columns of the moves
+        width (int): width of the board
+
+    Returns:
+        str: one digit per column, or the columns separated by commas on boards wider than 10 columns
+    """
+    return ''.join(map(str, moves)) if width <= 10 else ','.join(map(str, moves))
+
+
+def read_openings(path: str, width: int, height: int, game_n: int) -> List[List[int]]:
+    """Reads an opening suite, one opening per line as the columns of its moves,
+    like 3324, or 3,3,12,4 on boards wider than 10 columns
+
+    Args:
+        path (str): path of the file
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+
+    Raises:
+        ValueError: if an opening has an invalid move or ends the game
+
+    Returns:
+        List[List[int]]: the openings
+    """
+    openings: List[List[int]] = []
+    with open(path) as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                moves: List[int] = parse_moves(line)
+            except ValueError:
+                raise ValueError(f'{path}:{line_number}: {line} is no move sequence') from None
+            board: BitBoard = BitBoard(width, height)
+            for i, col in enumerate(moves):
+                if not 0 <= col < width or not board.play(col, 1 + i % 2):
+                    raise ValueError(f'{path}:{line_number}: invalid move {col} at ply {i}')
+                if board.is_winning_last_move(game_n) != 0:
+                    raise ValueError(f'{path}:{line_number}: the game is over after ply {i}')
+            openings.append(moves)
+    return openings
+
+
+def play_game(game: int, configs: Tuple[PlayerConfig, PlayerConfig], opening: List[int], width: int, height: int,
+              game_n: int, bitboard: bool = True) -> Dict:
+    """Plays one game without any output, runs inside a process of the pool
+
+    Args:
+        game (int): number of the game
+        configs (Tuple[PlayerConfig, PlayerConfig]): the player that moves first and the player that moves second
+        opening (List[int]): moves that are played before the players take over
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+        bitboard (bool, optional): play on a BitBoard instead of a Board. Defaults to True.
+
+    Returns:
+        Dict: the result of the game, with the latency in seconds and the number of nodes of every searched move
+    """
+    start_time: float = time.time()
+    players: List[Union[SearchPlayer, MCTSPlayer]] = [config.create(player_id, game_n)
+                                                      for player_id, config in enumerate(configs, 1)]
+    board: Board = BitBoard(width, height) if bitboard else Board(width, height)
+    moves: List[int] = []
+    latencies: List[float] = []
+    nodes: List[int] = []
+    winner: int = 0
+
+    for move in opening:
+        board.play(move, 1 + len(moves) % 2)
+        moves.append(move)
+        winner = board.is_winning_last_move(game_n) # an opening that ends the game is not continued
+        if winner != 0:
+            break
+
+    while winner == 0:
+        player: Union[SearchPlayer, MCTSPlayer] = players[len(moves) % 2]
+        move: int = player.search(board)
+        latencies.append(round(player.stats.elapsed, 6))
+        nodes.append(player.stats.nodes)
+        board.play(move, player.player_id)
+        moves.append(move)
+        winner = board.is_winning_last_move(game_n)
+
+    for player in players:
+        player.close()
+
+    return {'game': game, 'player1': configs[0].spec, 'player2': configs[1].spec,
+            'opening': format_moves(opening, width), 'moves': format_moves(moves, width),
+            'winner': winner, 'winner_name': configs[winner - 1].spec if winner > 0 else None,
+            'duration': round(time.time() - start_time, 6), 'latencies': latencies, 'nodes': nodes}
+
+
+def schedule(entrants: int, games: int, openings: List[List[int]]) -> Iterator[Tuple[Tuple[int, int], List[int]]]:
+    """Pairs every two entrants, every opening is played twice so both players move first once
+
+    Args:
+        entrants (int): number of players in the tournament
+        games (int): number of openings per pair
+        openings (List[List[int]]): the openings, reused from the start when there are fewer than games
+
+    Yields:
+        Iterator[Tuple[Tuple[int, int], List[int]]]: the indices of the players in the order they move and the opening
+    """
+    for first, second in itertools.combinations(range(entrants), 2):
+        for i in range(games):
+            opening: List[int] = openings[i % len(openings)]
+            yield (first, second), opening
+            yield (second, first), opening
+
+
+class ResultWriter:
+    """Streams game results to a JSON lines or CSV file, flushed after every game
+    """
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): path of the output, a .csv extension writes CSV, anything else JSON lines. - writes to stdout.
+        """
+        self._file = sys.stdout if path == '-' else open(path, 'w', newline='')
+        self._csv: Optional[csv.DictWriter] = None
+        if path.endswith('.csv'):
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+            self._csv.writeheader()
+
+
+    def write(self, result: Dict) -> None:
+        """
+        Args:
+            result (Dict): result of a game
+        """
+        if self._csv is not None:
+            self._csv.writerow({**result, 'latencies': ' '.join(map(str, result['latencies'])),
+                                'nodes': ' '.join(map(str, result['nodes']))})
+        else:
+            self._file.write(json.dumps(result) + '\n')
+        self._file.flush()
+
+
+    def close(self) -> None:
+        """Closes the file, unless it is stdout
+        """
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+def run_tournament(configs: List[PlayerConfig], games: int, openings: List[List[int]], writer: ResultWriter,
+                   width: int, height: int, game_n: int, workers: int, bitboard: bool = True) -> List[List[int]]:
+    """Plays all games of a tournament in a process pool, results are written as soon as a game finishes
+
+    Args:
+        configs (List[PlayerConfig]): the players of the tournament
+        games (int): number of openings per pair of players
+        openings (List[List[int]]): the openings
+        writer (ResultWriter): destination of the results
+        width (int): width of the board
+        height (int): height of the board
+        game_n (int): n in a row required to win
+        workers (int): number of processes
+        bitboard (bool, optional): play on a BitBoard instead of a Board. Defaults to True.
+
+    Returns:
+        List[List[int]]: wins, draws and losses per player, in the order of configs,
+            so entrants with the same specification are counted apart
+    """
+    standings: List[List[int]] = [[0, 0, 0] for _ in configs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures: Dict[Future, Tuple[int, int]] = {
+            executor.submit(play_game, game, (configs[pair[0]], configs[pair[1]]), opening, width, height, game_n,
+                            bitboard): pair
+            for game, (pair, opening) in enumerate(schedule(len(configs), games, openings))}
+        for future in as_completed(futures):
+            result: Dict = future.result()
+            writer.write(result)
+            for player_id, entrant in enumerate(futures[future], 1):
+                standings[entrant][0 if result['winner'] == player_id else 1 if result['winner'] < 0 else 2] += 1
+    return standings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Plays a headless tournament between search players',
+                                     epilog=SPEC_HELP)
+    parser.add_argument('players', nargs='+', help='two or more player specifications')
+    parser.add_argument('--games', type=int, default=10, help='number of openings per pair, each played twice')
+    parser.add_argument('--output', default='-', help='results file, .csv for CSV, otherwise JSON lines')
+    parser.add_argument('--random-plies', type=int, default=2, help='length of the random openings')
+    parser.add_argument('--openings', help='file with an opening per line, like 3324 or 3,3,12,4, '
+                                           'instead of random openings')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random openings')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--numpy-board', action='store_true', help='play on the numpy Board instead of the BitBoard')
+    parser.add_argument('--width', type=int, default=7)
+    parser.add_argument('--height', type=int, default=6)
+    parser.add_argument('--game-n', type=int, default=4)
+    args = parser.parse_args()
+
+    if len(args.players) < 2:
+        parser.error('a tournament needs at least two players')
+    player_configs: List[PlayerConfig] = [PlayerConfig(spec) for spec in args.players]
+    if args.openings:
+        try:
+            game_openings: List[List[int]] = read_openings(args.openings, args.width, args.height, args.game_n)
+        except ValueError as error:
+            parser.error(str(error))
+    else:
+        # Distinct openings, as far as there are enough of them
+        rng: random.Random = random.Random(args.seed)
+        game_openings = []
+        for _ in range(10 * args.games):
+            opening: List[int] = random_opening(args.width, args.height, args.game_n, args.random_plies, rng)
+            if opening not in game_openings:
+                game_openings.append(opening)
+                if len(game_openings) == args.games:
+                    break
+
+    result_writer: ResultWriter = ResultWriter(args.output)
+    start_time: float = time.time()
+    results: List[List[int]] = run_tournament(player_configs, args.games, game_openings, result_writer,
+                                              args.width, args.height, args.game_n, args.workers,
+                                              not args.numpy_board)
+    result_writer.close()
+
+    print(f'Played {sum(sum(score) for score in results) // 2} games '
+          f'in {time.time() - start_time:.1f} seconds', file=sys.stderr)
+    for entrant, (config, (wins, draws, losses)) in enumerate(zip(player_configs, results), 1):
+        print(f'{entrant}. {config}: {wins} wins, {draws} draws, {losses} losses', file=sys.stderr)
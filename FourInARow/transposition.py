@@ -0,0 +1,143 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import random
+import numpy as np
+
+
+# Bound types of a stored search value
+EXACT: int = 0 # the value is the exact minimax value
+LOWER: int = 1 # the search failed high, the real value is at least the stored value
+UPPER: int = 2 # the search failed low, the real value is at most the stored value
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(width: int, height: int) -> List[List[List[int]]]:
+    """Gets the Zobrist keys for a board size
+
+    The keys are drawn from a generator seeded with the board size,
+    so every process computes the same hash for the same position.
+
+    Args:
+        width (int): width of the board
+        height (int): height of the board
+
+    Returns:
+        List[List[List[int]]]: 64 bit key for every [col][row][player_id], index 0 of player_id is unused
+    """
+    rng: random.Random = random.Random(f'zobrist-{width}x{height}')
+    return [[[0, rng.getrandbits(64), rng.getrandbits(64)] for _ in range(height)] for _ in range(width)]
+
+
+def compute_hash(state: np.ndarray) -> int:
+    """Computes the Zobrist hash of a board state from scratch
+
+    Args:
+        state (np.ndarray): the board state
+
+    Returns:
+        int: the Zobrist hash of the board state
+    """
+    width, height = state.shape
+    keys: List[List[List[int]]] = zobrist_keys(width, height)
+    hash_key: int = 0
+    for col in range(width):
+        for row in range(height):
+            if state[col, row] != 0:
+                hash_key ^= keys[col][row][state[col, row]]
+    return hash_key
+
+
+class TranspositionTable:
+    """Fixed size hash table with search results, indexed by the Zobrist hash of a position
+
+    Every entry stores the remaining search depth, the bound type, the value, the best move
+    and the number of discs of the position. The table is kept between moves, so the next search reuses
+    the work of the previous ones. When two positions map to the same slot the entry with the deepest search
+    is kept, unless the entry has fewer discs than the root of the current search: that position can't be
+    reached anymore, so its slot is free.
+    """
+    ENTRY_BYTES: int = 18 # key (8) + value (4) + depth (2) + discs (2) + bound type (1) + move (1)
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024) -> None:
+        """
+        Args:
+            max_bytes (int, optional): memory cap of the table in bytes. Defaults to 16 MiB.
+        """
+        self.size: int = max(1, max_bytes // self.ENTRY_BYTES)
+        self.keys: np.ndarray = np.zeros(self.size, dtype=np.uint64)
+        self.values: np.ndarray = np.zeros(self.size, dtype=np.int32)
+        self.depths: np.ndarray = np.full(self.size, -1, dtype=np.int16) # -1 marks an empty slot
+        self.flags: np.ndarray = np.zeros(self.size, dtype=np.int8)
+        self.moves: np.ndarray = np.full(self.size, -1, dtype=np.int8)
+        self.discs: np.ndarray = np.zeros(self.size, dtype=np.int16)
+        self.root_discs: int = 0 # discs of the root of the current search
+        self.hits: int = 0
+        self.misses: int = 0
+
+
+    def probe(self, hash_key: int) -> Optional[Tuple[int, int, int, int]]:
+        """Looks up a position
+
+        Args:
+            hash_key (int): Zobrist hash of the position
+
+        Returns:
+            Optional[Tuple[int, int, int, int]]: depth, bound type, value and best move (-1 if none),
+                or None if the position is not in the table
+        """
+        index: int = hash_key % self.size
+        if self.depths[index] >= 0 and self.keys[index] == hash_key:
+            self.hits += 1
+            return int(self.depths[index]), int(self.flags[index]), int(self.values[index]), int(self.moves[index])
+        self.misses += 1
+        return None
+
+
+    def new_search(self, root_discs: int) -> None:
+        """Called before a search starts, positions with fewer discs than the root become replaceable
+
+        Args:
+            root_discs (int): number of discs of the root position
+        """
+        self.root_discs = root_discs
+
+
+    def store(self, hash_key: int, depth: int, flag: int, value: int, move: Optional[int], discs: int = 0) -> None:
+        """Stores a search result, unless its slot holds a result of a deeper search of a reachable position
+
+        Args:
+            hash_key (int): Zobrist hash of the position
+            depth (int): remaining search depth of the result
+            flag (int): bound type of the value, one of EXACT, LOWER or UPPER
+            value (int): value of the position
+            move (Optional[int]): best move in the position, None if there is none
+            discs (int, optional): number of discs of the position. Defaults to 0.
+        """
+        index: int = hash_key % self.size
+        if depth < self.depths[index] and self.discs[index] >= self.root_discs:
+            return
+        self.keys[index] = hash_key
+        self.depths[index] = depth
+        self.flags[index] = flag
+        self.values[index] = value
+        self.moves[index] = -1 if move is None else move
+        self.discs[index] = discs
+
+
+    def clear(self) -> None:
+        """Removes all entries and resets the statistics
+        """
+        self.depths.fill(-1)
+        self.hits = 0
+        self.misses = 0
+
+
+    def __str__(self) -> str:
+        """
+        Returns:
+            str: summary of the table usage
+        """
+        filled: np.ndarray = self.depths >= 0
+        reachable: int = int(np.count_nonzero(filled & (self.discs >= self.root_discs)))
+        return (f'{int(np.count_nonzero(filled))}/{self.size} entries ({reachable} reachable), '
+                f'{self.hits} hits, {self.misses} misses')
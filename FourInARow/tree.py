@@ -0,0 +1,135 @@
+from __future__ import annotations
+from array import array
+from typing import List, TYPE_CHECKING
+if TYPE_CHECKING:
+    from board import Board
+
+
+class SearchTree:
+    """Game tree stored as parallel typed arrays with one entry per node, instead of an object per node
+
+    The children of a node are created together when the node is expanded and are stored next to each other,
+    so a node only keeps the index of its first child and the number of children.
+    Nodes don't keep a board: a node stores the Zobrist hash of its position once the position was played,
+    and the position itself is restored by playing the moves from the root.
+    A node takes 34 bytes.
+
+    Node 0 is the root. The value of a node is the sum of the results of the playouts through it,
+    for the player that made the move of the node.
+    """
+    def __init__(self, board: Board, mover: int) -> None:
+        """
+        Args:
+            board (Board): position of the root, copied
+            mover (int): player that made the last move of the root position, the other player is to move
+        """
+        self.root_board: Board = type(board)(board)
+        self.move: array = array('h', [-1]) # the move that led to the node
+        self.mover: array = array('b', [mover]) # player that made the move
+        self.winner: array = array('b', [0]) # like Board.is_winning_last_move, once the position was played
+        self.child_count: array = array('h', [0]) # 0 until the node is expanded
+        self.parent: array = array('i', [-1])
+        self.first_child: array = array('i', [-1]) # -1 until the node is expanded
+        self.visits: array = array('i', [0])
+        self.value: array = array('d', [0])
+        self.hash_key: array = array('Q', [board.hash_key]) # Zobrist hash, 0 until the position was played
+
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: number of nodes
+        """
+        return len(self.move)
+
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: memory taken by the nodes in bytes
+        """
+        return sum(len(column) * column.itemsize for column in (self.move, self.mover, self.winner, self.child_count,
+                                                                self.parent, self.first_child, self.visits,
+                                                                self.value, self.hash_key))
+
+
+    def is_expanded(self, index: int) -> bool:
+        """
+        Args:
+            index (int): the node
+
+        Returns:
+            bool: whether the children of the node were created
+        """
+        return self.first_child[index] >= 0
+
+
+    def children(self, index: int) -> range:
+        """
+        Args:
+            index (int): the node
+
+        Returns:
+            range: indices of the children, empty if the node is not expanded
+        """
+        first: int = self.first_child[index]
+        return range(first, first + self.child_count[index]) if first >= 0 else range(0)
+
+
+    def expand(self, index: int, moves: List[int]) -> range:
+        """Creates the children of a node
+
+        Args:
+            index (int): the node, not expanded yet
+            moves (List[int]): the valid moves of the node, in the order the children are stored
+
+        Returns:
+            range: indices of the children
+        """
+        first: int = len(self.move)
+        count: int = len(moves)
+        self.move.extend(moves)
+        self.mover.extend([3 - self.mover[index]] * count)
+        self.winner.extend([0] * count)
+        self.child_count.extend([0] * count)
+        self.parent.extend([index] * count)
+        self.first_child.extend([-1] * count)
+        self.visits.extend([0] * count)
+        self.value.extend([0] * count)
+        self.hash_key.extend([0] * count)
+        self.first_child[index] = first
+        self.child_count[index] = count
+        return range(first, first + count)
+
+
+    def path(self, index: int) -> List[int]:
+        """
+        Args:
+            index (int): the node
+
+        Returns:
+            List[int]: the moves from the root to the node
+        """
+        moves: List[int] = []
+        while index > 0:
+            moves.append(self.move[index])
+            index = self.parent[index]
+        return moves[::-1]
+
+
+    def board(self, index: int) -> Board:
+        """Restores the position of a node
+
+        Args:
+            index (int): the node
+
+        Returns:
+            Board: a new board with the position, of the same type as the root board
+        """
+        board: Board = type(self.root_board)(self.root_board)
+        mover: int = self.mover[0]
+        for move in self.path(index):
+            mover = 3 - mover
+            board.play(move, mover)
+        return board